@@ -0,0 +1,68 @@
+"""
+Benchmark de create_comparison_csv: bucle original (host in z_host) contra SubstringIndex.
+
+Uso:
+    python benchmarks/bench_comparison.py [n_dispositivos] [n_hosts_zabbix]
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from zabbix_matching import SubstringIndex
+
+
+def synthetic_names(count, seed):
+    rng = random.Random(seed)
+    prefixes = ["PE", "CL", "CO", "AR"]
+    roles = ["SW", "RT", "FW", "AP", "ACC", "CORE"]
+    return [
+        f"{rng.choice(prefixes)}-{''.join(rng.choices(string.ascii_uppercase, k=5))}-"
+        f"{rng.choice(roles)}-{rng.randint(1, 99):02d}"
+        for _ in range(count)
+    ]
+
+
+def naive_matches(devices, zabbix_hosts):
+    # Misma lógica que la versión original de create_comparison_csv
+    status = {}
+    for host in devices:
+        status[host] = False
+        for z_host in zabbix_hosts:
+            if host in z_host:
+                status[host] = True
+                break
+    return status
+
+
+def indexed_matches(devices, zabbix_hosts):
+    matches = SubstringIndex(devices).match_texts(zabbix_hosts)
+    return {host: host in matches for host in devices}
+
+
+if __name__ == "__main__":
+    n_devices = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_zabbix = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    zabbix_hosts = synthetic_names(n_zabbix, seed=1)
+    # La mitad de los dispositivos existen en Zabbix (como subcadena), la otra mitad no
+    devices = [h.rsplit("-", 1)[0] for h in zabbix_hosts[:n_devices // 2]]
+    devices += synthetic_names(n_devices - len(devices), seed=2)
+
+    print(f"📊 {len(devices)} dispositivos contra {len(zabbix_hosts)} hosts de Zabbix")
+
+    started = time.perf_counter()
+    indexed = indexed_matches(devices, zabbix_hosts)
+    indexed_time = time.perf_counter() - started
+    print(f"➡️  SubstringIndex: {indexed_time:.3f}s")
+
+    started = time.perf_counter()
+    naive = naive_matches(devices, zabbix_hosts)
+    naive_time = time.perf_counter() - started
+    print(f"➡️  Bucle original: {naive_time:.3f}s")
+
+    assert naive == indexed, "Los resultados difieren"
+    print(f"✅ Mismos resultados, {naive_time / indexed_time:.1f}x más rápido")
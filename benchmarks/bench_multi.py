@@ -0,0 +1,72 @@
+"""
+Exportación de varios servidores: uno tras otro frente a MultiZabbixManager
+(todos a la vez, fusionados en streaming). Con servidores de latencias
+distintas el tiempo concurrente debería acercarse al del más lento.
+
+Uso:
+    python benchmarks/bench_multi.py --hosts 20000 --latencies 0.005,0.01,0.02
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_zabbix import FakeZabbixServer
+from zabbix_connector import ZabbixManager
+from zabbix_export import MULTI_SERVER_COLUMNS, export_hosts
+from zabbix_multi import MultiZabbixManager
+
+
+def serve(hosts, latencies, urls):
+    # Los servidores falsos corren en otro proceso para no competir por el GIL con el cliente
+    started = [FakeZabbixServer(hosts=hosts, latency=latency).start() for latency in latencies]
+    urls.put([server.url for server in started])
+    while True:
+        time.sleep(3600)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportación secuencial vs concurrente de varios servidores")
+    parser.add_argument("--hosts", type=int, default=20000, help="Hosts por servidor")
+    parser.add_argument("--latencies", default="0.005,0.01,0.02", help="Latencia por petición de cada servidor (s)")
+    parser.add_argument("--page-size", type=int, default=500)
+    args = parser.parse_args()
+    latencies = [float(latency) for latency in args.latencies.split(",")]
+
+    urls = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(args.hosts, latencies, urls), daemon=True)
+    process.start()
+    servers = [(f"S{n}", url, "benchmark") for n, url in enumerate(urls.get())]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        output = os.path.join(workdir, "hosts.csv")
+
+        per_server = {}
+        for name, url, token in servers:
+            zb = ZabbixManager(url, token, cache_ttl=0)
+            zb.connect()
+            started = time.perf_counter()
+            export_hosts(zb.iter_raw_hosts(page_size=args.page_size), output)
+            per_server[name] = time.perf_counter() - started
+
+        multi = MultiZabbixManager(servers, cache_ttl=0)
+        multi.connect()
+        started = time.perf_counter()
+        count = export_hosts(multi.iter_raw_hosts(page_size=args.page_size), output, columns=MULTI_SERVER_COLUMNS)
+        concurrent = time.perf_counter() - started
+    process.terminate()
+
+    print()
+    for (name, _, _), latency in zip(servers, latencies):
+        print(f"{name} (latencia {latency * 1000:.0f} ms): {per_server[name]:.2f}s")
+    print(f"➡️  Secuencial (suma): {sum(per_server.values()):.2f}s")
+    print(f"➡️  Concurrente:       {concurrent:.2f}s ({count} hosts; el más lento solo: {max(per_server.values()):.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
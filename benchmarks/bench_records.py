@@ -0,0 +1,76 @@
+"""
+Memoria por host de los registros de get_processed_hosts: el dict + set de
+antes frente a HostRecord (slots, grupos como ids, tags internados).
+
+Los hosts se decodifican desde JSON como los devuelve la API, así que cada
+string es un objeto distinto; se mide lo que queda retenido tras liberar
+los hosts crudos.
+
+Uso:
+    python benchmarks/bench_records.py --hosts 200000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_zabbix import FIRST_HOSTID, synthetic_host
+from zabbix_connector import ZabbixManager
+from zabbix_records import GroupTable
+
+
+def legacy_process_host(host, tag_name):
+    # Formato anterior: dict nuevo y set de nombres de grupo por host
+    return {
+        "hostid": host["hostid"],
+        "hostname": host["host"],
+        "name": host["name"],
+        "ip": host["interfaces"][0]["ip"] if host.get("interfaces") else "No IP",
+        "groups": {g["name"] for g in host.get("groups", [])},
+        "tags": ZabbixManager._extract_tag_value(None, host.get("tags", []), tag_name),
+    }
+
+
+def raw_hosts(count):
+    payload = json.dumps([synthetic_host(FIRST_HOSTID + n) for n in range(count)])
+    return json.loads(payload)
+
+
+def retained_bytes(build, count):
+    hosts = raw_hosts(count)
+    gc.collect()
+    tracemalloc.start()
+    records = build(hosts)
+    del hosts
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria por host de los registros procesados")
+    parser.add_argument("--hosts", type=int, default=100000)
+    args = parser.parse_args()
+
+    manager = ZabbixManager("http://benchmark/api_jsonrpc.php", token=None, cache_ttl=0)
+    table = GroupTable()
+    builds = {
+        "dict + set": lambda hosts: [legacy_process_host(h, "marca") for h in hosts],
+        "HostRecord": lambda hosts: [manager._process_host(h, "marca", table) for h in hosts],
+    }
+
+    print(f"🧪 {args.hosts} hosts")
+    for name, build in builds.items():
+        retained = retained_bytes(build, args.hosts)
+        print(f"{name:<12} {retained / 1e6:>9.1f} MB {retained / args.hosts:>8.0f} bytes/host")
+
+
+if __name__ == "__main__":
+    main()
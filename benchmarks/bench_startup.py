@@ -0,0 +1,102 @@
+"""
+Tiempo de arranque de zabbix_cli.py por comando: cada comando se ejecuta en un
+proceso nuevo contra el Zabbix falso (inventario mínimo, para que domine el
+arranque) y se mide el tiempo total y el de los imports (python -X importtime).
+
+Como referencia se mide también un CLI que importara todo al arrancar
+(todos los módulos de los comandos, incluido netmiko).
+
+Uso:
+    python benchmarks/bench_startup.py [--repeat 5]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_zabbix import FakeZabbixServer
+
+# Todo lo que cargaría un CLI sin imports diferidos
+EAGER_MODULES = (
+    "zabbix_connector", "zabbix_export", "zabbix_compare_hosts", "zabbix_reconcile", "zabbix_snapshot",
+    "zabbix_filter_hosts", "zabbix_get_host_by_ip", "zabbix_netmiko_manager",
+)
+
+COMMANDS = {
+    "help": ["--help"],
+    "filter (CSV)": ["filter", "filtros.txt", "zabbix_hosts.csv"],
+    "groups": ["groups"],
+    "templates": ["templates"],
+    "find-ip": ["find-ip", "10.0.0.1"],
+    "export": ["export", "export.csv"],
+    "compare": ["compare", os.path.join(ROOT, "host.csv"), "zabbix_hosts.csv"],
+    "probe": ["probe"],
+}
+
+
+def parse_importtime(stderr):
+    """
+    Suma el tiempo acumulado de los imports de primer nivel y devuelve (total_ms, {módulo: ms}).
+    """
+    top = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):  # Un espacio tras "|": import de primer nivel
+            top[name.strip()] = int(cumulative) / 1000
+    return sum(top.values()), top
+
+
+def run(argv, cwd, env, repeat):
+    walls, imports = [], []
+    heaviest = {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        process = subprocess.run([sys.executable, "-X", "importtime"] + argv, cwd=cwd, env=env,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        walls.append((time.perf_counter() - started) * 1000)
+        total, top = parse_importtime(process.stderr)
+        imports.append(total)
+        heaviest = top
+    names = sorted(heaviest, key=heaviest.get, reverse=True)[:3]
+    return min(walls), min(imports), ", ".join(f"{name} {heaviest[name]:.0f}" for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque de zabbix_cli.py por comando")
+    parser.add_argument("--repeat", type=int, default=5, help="Ejecuciones por comando (se toma la mínima)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_startup_")
+    cli = os.path.join(ROOT, "zabbix_cli.py")
+    try:
+        with FakeZabbixServer(hosts=50) as server:
+            env = dict(os.environ, PYTHONPATH=ROOT, ZABBIX_SERVER=server.url.split("/")[2], ZABBIX_API="benchmark")
+            subprocess.run([sys.executable, cli, "export", "zabbix_hosts.csv"], cwd=workdir, env=env,
+                           stdout=subprocess.DEVNULL, check=True)
+            with open(os.path.join(workdir, "filtros.txt"), "w", encoding="utf-8") as file:
+                file.write("pe: text ~ PE\n")
+            with open(os.path.join(workdir, "HOST_FILTRADOS.csv"), "w", encoding="utf-8") as file:
+                file.write("Host,Name,IP,Groups,Tags\n")  # Sin hosts: probe solo arranca
+
+            print(f"{'comando':<14} {'total ms':>9} {'imports ms':>11}  imports más pesados (ms)")
+            baseline = run(["-c", "pass"], workdir, env, args.repeat)
+            print(f"{'(python)':<14} {baseline[0]:>9.0f} {baseline[1]:>11.0f}")
+            for name, argv in COMMANDS.items():
+                wall, imports, heaviest = run([cli] + argv, workdir, env, args.repeat)
+                print(f"{name:<14} {wall:>9.0f} {imports:>11.0f}  {heaviest}")
+            eager = run(["-c", "import " + ", ".join(EAGER_MODULES)], ROOT, env, args.repeat)
+            print(f"{'(todo eager)':<14} {eager[0]:>9.0f} {eager[1]:>11.0f}  {eager[2]}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
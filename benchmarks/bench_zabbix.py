@@ -0,0 +1,424 @@
+"""
+Benchmarks offline de los caminos de importación/exportación contra un Zabbix falso.
+
+Cada escenario se ejecuta en un subproceso propio para medir su pico de RSS por
+separado. Se informa el throughput (elementos/s), los percentiles de latencia
+de las llamadas a la API y el pico de memoria.
+
+Uso:
+    python benchmarks/bench_zabbix.py --hosts 50000 --latency 0.01
+    python benchmarks/bench_zabbix.py --hosts 200000 --scenarios raw_hosts,iter_raw_hosts
+    python benchmarks/bench_zabbix.py --scenarios probe --probe-hosts 2000 --workers 64
+    python benchmarks/bench_zabbix.py --scenarios history --history-hosts 500 --history-days 7
+    python benchmarks/bench_zabbix.py --transport urllib   # comparar con el transporte de zabbix_utils
+"""
+import argparse
+import contextlib
+import csv
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = [
+    "raw_hosts",
+    "iter_raw_hosts",
+    "processed_hosts",
+    "export_hosts_to_csv",
+    "export_compare",
+    "export_jsonl_gz",
+    "import_rows",
+    "import_batched",
+    "reimport_upsert",
+    "mass_tags",
+    "compare_status",
+    "filter",
+    "reconcile",
+    "probe",
+    "commands",
+    "history",
+]
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def timed_api(zb, latencies):
+    """
+    Envuelve send_api_request de la instancia para registrar la latencia de cada llamada.
+    """
+    original = zb.zapi.send_api_request
+
+    def send_api_request(method, params=None, need_auth=True):
+        started = time.perf_counter()
+        try:
+            return original(method, params, need_auth)
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    zb.zapi.send_api_request = send_api_request
+
+
+def write_import_csv(path, rows, prefix):
+    with open(path, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["hostname", "ip", "group_ids", "visible_name", "description", "tags", "templates", "ping_only", "mac"])
+        for i in range(rows):
+            writer.writerow([
+                f"{prefix}-{i:06d}", f"172.16.{(i >> 8) & 255}.{i & 255}", "1,6", "", "", "marca=cisco",
+                "10101", "true" if i % 2 else "false", f"00:1A:2B:{(i >> 16) & 255:02X}:{(i >> 8) & 255:02X}:{i & 255:02X}",
+            ])
+
+
+def write_devices_csv(path, zabbix_csv, rows):
+    """
+    Inventario de dispositivos: mitad presentes en Zabbix, mitad nuevos.
+    """
+    with open(zabbix_csv, encoding="utf-8") as file:
+        known = [(row["Host"], row["IP"]) for _, row in zip(range(rows // 2), csv.DictReader(file))]
+    with open(path, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Hostname", "IP"])
+        writer.writerows(known)
+        for i in range(rows - len(known)):
+            writer.writerow([f"NEW-DEVICE-{i:05d}", f"192.168.{(i >> 8) & 255}.{i & 255}"])
+
+
+class SimulatedSession:
+    """
+    Sesión Netmiko simulada: cada comando cuesta un RTT.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def send_command(self, command, read_timeout=30, use_textfsm=False):
+        time.sleep(self.latency)
+        return f"{command}: ok"
+
+    def is_alive(self):
+        return True
+
+    def disconnect(self):
+        pass
+
+
+class SimulatedNetmikoManager:
+    """
+    Fábrica de un NetmikoManager con ping/TCP/SSH simulados (sin red real):
+    70% de equipos responden a todo, 10% solo a SSH y 20% están caídos.
+    """
+
+    @staticmethod
+    def build(latency, dead_timeout):
+        from zabbix_netmiko_manager import NetmikoManager
+
+        class Simulated(NetmikoManager):
+
+            def _kind(self, ip):
+                return random.Random(ip).random()
+
+            def ping_host(self, ip, timeout=1):
+                alive = self._kind(ip) < 0.7
+                time.sleep(latency if alive else dead_timeout)
+                return alive
+
+            def tcp_port_open(self, ip, port=22, timeout=2):
+                open_port = self._kind(ip) < 0.8
+                time.sleep(latency if open_port else dead_timeout)
+                return open_port
+
+            def test_ssh_connection(self, ip, username, password, timeout=10, device_types=None, deadline=None):
+                if self._kind(ip) >= 0.8:
+                    time.sleep(min(timeout, dead_timeout))
+                    return None
+                for device_type in device_types or ["huawei", "cisco_ios"]:
+                    time.sleep(latency * 5)  # Un handshake SSH cuesta varios RTT
+                    if device_type == ("cisco_ios" if self._kind(ip) < 0.4 else "huawei") and username == "radius":
+                        return device_type
+                return None
+
+            def _open_session(self, device):
+                time.sleep(latency * 5)
+                return SimulatedSession(latency)
+
+        manager = Simulated()
+        manager.usuario_no_radius = "local"
+        manager.usuario_radius = "radius"
+        return manager
+
+
+def run_scenario(name, args, workdir):
+    """
+    Ejecuta un escenario en este proceso.
+    Retorna (elementos procesados, latencias, instante de inicio de la medición);
+    la preparación (volcados previos, conexión) queda fuera de la medición.
+    Las latencias son por llamada a la API, o por host en el escenario probe.
+    """
+    from zabbix_connector import ZabbixManager
+
+    latencies = []
+    zabbix_csv = os.path.join(workdir, "zabbix_hosts.csv")
+
+    def manager():
+        zb = ZabbixManager(url=args.url, token="benchmark")
+        zb.connect()
+        timed_api(zb, latencies)
+        return zb
+
+    if name == "probe":
+        hosts_csv = os.path.join(workdir, "probe_hosts.csv")
+        with open(hosts_csv, mode="w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(["Host", "Name", "IP", "Groups", "Tags"])
+            for i in range(args.probe_hosts):
+                writer.writerow([f"SW-{i:05d}", f"SW-{i:05d}", f"10.250.{i >> 8}.{i & 255}", "switch", "marca:cisco"])
+        netmiko = SimulatedNetmikoManager.build(args.probe_latency, args.probe_dead_timeout)
+        probe_host = netmiko.probe_host
+
+        def timed_probe_host(*probe_args, **probe_kwargs):
+            probe_started = time.perf_counter()
+            try:
+                return probe_host(*probe_args, **probe_kwargs)
+            finally:
+                latencies.append(time.perf_counter() - probe_started)
+
+        netmiko.probe_host = timed_probe_host
+        started = time.perf_counter()
+        netmiko.process_hosts_from_csv(hosts_csv, os.path.join(workdir, "probe_results.csv"), workers=args.workers, host_deadline=30)
+        return args.probe_hosts, latencies, started
+
+    if name == "commands":
+        # Dos pasadas de dos comandos por equipo: la segunda reutiliza las sesiones del pool
+        from zabbix_access_cache import AccessCache
+
+        netmiko = SimulatedNetmikoManager.build(args.probe_latency, args.probe_dead_timeout)
+        netmiko.access_cache = AccessCache(None)
+        netmiko.sessions.max_idle = args.probe_hosts
+        hosts = [(f"SW-{i:05d}", f"10.250.{i >> 8}.{i & 255}") for i in range(args.probe_hosts)]
+        for host, ip in hosts:
+            netmiko.access_cache.record(ip, host, "cisco_ios", "radius")
+        run_on_host = netmiko._run_on_host
+
+        def timed_run_on_host(*run_args, **run_kwargs):
+            run_started = time.perf_counter()
+            try:
+                return run_on_host(*run_args, **run_kwargs)
+            finally:
+                latencies.append(time.perf_counter() - run_started)
+
+        netmiko._run_on_host = timed_run_on_host
+        started = time.perf_counter()
+        for _ in range(2):
+            netmiko.run_commands(hosts, ["show version", "show inventory"], os.path.join(workdir, "commands.jsonl"),
+                                 workers=args.workers)
+        print(f"🔌 Sesiones SSH: {netmiko.sessions.stats()}")
+        netmiko.close()
+        return 2 * args.probe_hosts, latencies, started
+
+    if name in ("compare_status", "filter", "reconcile"):
+        # Preparación sin medir: volcado de Zabbix y dispositivos
+        from zabbix_compare_hosts import export_zabbix_hosts_to_csv
+        export_zabbix_hosts_to_csv(manager(), zabbix_csv)
+        devices_csv = os.path.join(workdir, "devices.csv")
+        write_devices_csv(devices_csv, zabbix_csv, args.devices)
+        latencies.clear()
+
+    zb = manager() if name not in ("compare_status", "filter", "reconcile") else None
+    latencies.clear()
+    started = time.perf_counter()
+
+    if name == "history":
+        # Historia de icmpping (un punto por minuto) de los primeros hosts, por ventanas en paralelo
+        from fake_zabbix import FIRST_HOSTID, synthetic_host
+
+        hostnames = [synthetic_host(FIRST_HOSTID + n)["host"] for n in range(min(args.history_hosts, args.hosts))]
+        items = zb.get_items(hostnames, key="icmpping")
+        latencies.clear()
+        started = time.perf_counter()
+        time_till = 1790812800  # Fijo: el mismo volumen en cada ejecución
+        points = zb.export_history(items, os.path.join(workdir, "history.jsonl.gz"),
+                                   time_till - args.history_days * 86400, time_till, workers=4)
+        return points or 0, latencies, started
+
+    if name == "raw_hosts":
+        return len(zb.get_raw_hosts()), latencies, started
+    if name == "iter_raw_hosts":
+        return sum(1 for _ in zb.iter_raw_hosts(page_size=args.page_size)), latencies, started
+    if name == "processed_hosts":
+        return len(zb.get_processed_hosts()), latencies, started
+    if name == "export_hosts_to_csv":
+        zb.export_hosts_to_csv(zb.iter_processed_hosts(page_size=args.page_size), os.path.join(workdir, "export.csv"))
+        return args.hosts, latencies, started
+    if name == "export_compare":
+        from zabbix_compare_hosts import export_zabbix_hosts_to_csv
+        export_zabbix_hosts_to_csv(zb, zabbix_csv, page_size=args.page_size)
+        return args.hosts, latencies, started
+    if name == "export_jsonl_gz":
+        from zabbix_compare_hosts import export_zabbix_hosts_to_csv
+        export_zabbix_hosts_to_csv(zb, os.path.join(workdir, "export.jsonl.gz"), page_size=args.page_size)
+        return args.hosts, latencies, started
+    if name in ("import_rows", "import_batched"):
+        import_csv = os.path.join(workdir, f"{name}.csv")
+        write_import_csv(import_csv, args.import_rows, name)
+        if name == "import_rows":
+            zb.create_host_csv(import_csv)
+        else:
+            zb.create_host_csv(import_csv, batch_size=args.batch_size, report_file=os.path.join(workdir, "report.csv"))
+        return args.import_rows, latencies, started
+    if name == "reimport_upsert":
+        # Segunda importación del mismo archivo: la primera (sin medir) ya creó todos los hosts
+        import_csv = os.path.join(workdir, f"{name}.csv")
+        write_import_csv(import_csv, args.import_rows, name)
+        zb.create_host_csv(import_csv, batch_size=args.batch_size, report_file=None)
+        latencies.clear()
+        started = time.perf_counter()
+        zb.create_host_csv(import_csv, upsert=True, batch_size=args.batch_size, report_file=None)
+        return args.import_rows, latencies, started
+    if name == "mass_tags":
+        # Agregar un tag a hosts importados, cada uno con su tag mac propio: los conjuntos
+        # finales de tags no se repiten, así que no caben en host.massupdate compartidos
+        import_csv = os.path.join(workdir, f"{name}.csv")
+        write_import_csv(import_csv, args.import_rows, name)
+        zb.create_host_csv(import_csv, batch_size=args.batch_size, report_file=None)
+        latencies.clear()
+        started = time.perf_counter()
+        specs = {f"{name}-{i:06d}": {"add_tags": [("modelo", "C9300")]} for i in range(args.import_rows)}
+        plan = zb.plan_mass_changes(specs)
+        expected = -(-args.import_rows // 500)  # Una llamada por bloque de chunk_size hosts
+        if plan is None or len(plan["operations"]) > expected:
+            raise RuntimeError(f"mass_tags: se esperaban como máximo {expected} llamadas, el plan tiene "
+                               f"{None if plan is None else len(plan['operations'])}")
+        zb.apply_mass_changes(plan)
+        return args.import_rows, latencies, started
+    if name == "compare_status":
+        from zabbix_compare_with_status import create_comparison_csv
+        create_comparison_csv(devices_csv, zabbix_csv, os.path.join(workdir, "comparison.csv"))
+        return args.devices, latencies, started
+    if name == "filter":
+        from zabbix_filter_hosts import filter_hosts_from_csv
+        filter_hosts_from_csv(zabbix_csv, os.path.join(workdir, "filtered.csv"))
+        return args.hosts, latencies, started
+    if name == "reconcile":
+        from zabbix_reconcile import reconcile_csv
+        reconcile_csv(devices_csv, zabbix_csv, os.path.join(workdir, "reconciliation.jsonl"))
+        return args.devices, latencies, started
+    raise ValueError(f"Escenario desconocido: {name}")
+
+
+def peak_rss_mb():
+    """
+    Pico de RSS de este proceso. En Linux se usa VmHWM, que (a diferencia de
+    ru_maxrss) no hereda el pico del proceso padre.
+    """
+    try:
+        with open("/proc/self/status", encoding="utf-8") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(args):
+    """
+    Proceso hijo: ejecuta un escenario y escribe el resultado en JSON por stdout.
+    """
+    baseline_rss = peak_rss_mb()
+    with tempfile.TemporaryDirectory() as workdir:
+        real_stdout = sys.stdout
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            items, latencies, started = run_scenario(args.child, args, workdir)
+            elapsed = time.perf_counter() - started
+    real_stdout.write(json.dumps({
+        "scenario": args.child,
+        "items": items,
+        "seconds": elapsed,
+        "throughput": items / elapsed if elapsed else 0.0,
+        "api_calls": len(latencies),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_rss_mb": peak_rss_mb(),
+        "baseline_rss_mb": baseline_rss,
+    }) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks offline contra un Zabbix falso")
+    parser.add_argument("--hosts", type=int, default=10000, help="Tamaño del inventario sintético")
+    parser.add_argument("--latency", type=float, default=0.005, help="Latencia por petición del servidor falso (s)")
+    parser.add_argument("--scenarios", default="all", help="Lista separada por comas o 'all': " + ", ".join(SCENARIOS))
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--import-rows", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--devices", type=int, default=2000, help="Filas del inventario de dispositivos para comparar")
+    parser.add_argument("--probe-hosts", type=int, default=500)
+    parser.add_argument("--probe-latency", type=float, default=0.002, help="RTT simulado de ping/SSH (s)")
+    parser.add_argument("--probe-dead-timeout", type=float, default=0.05, help="Timeout simulado de un equipo caído (s)")
+    parser.add_argument("--history-hosts", type=int, default=200, help="Hosts cuya historia de icmpping se exporta")
+    parser.add_argument("--history-days", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--transport", choices=["pooled", "urllib"], default="pooled",
+                        help="Transporte HTTP de ZabbixManager (ZABBIX_TRANSPORT)")
+    parser.add_argument("--json", help="Guardar los resultados en este archivo JSON")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    from fake_zabbix import FakeZabbixServer
+
+    scenarios = SCENARIOS if args.scenarios == "all" else [s.strip() for s in args.scenarios.split(",")]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Escenarios desconocidos: {', '.join(sorted(unknown))}")
+
+    results = []
+    print(f"🧪 Inventario sintético: {args.hosts} hosts, latencia {args.latency * 1000:.1f} ms, transporte {args.transport}")
+    print(f"{'escenario':<22}{'items':>9}{'seg':>9}{'items/s':>11}{'llamadas':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'RSS MB':>9}")
+    for scenario in scenarios:
+        # Servidor nuevo por escenario: los hosts creados no se acumulan entre escenarios
+        with FakeZabbixServer(hosts=args.hosts, latency=args.latency) as server:
+            command = [sys.executable, os.path.abspath(__file__), "--child", scenario, "--url", server.url]
+            for option in ("hosts", "page_size", "import_rows", "batch_size", "devices", "probe_hosts",
+                           "probe_latency", "probe_dead_timeout", "history_hosts", "history_days", "workers"):
+                command += [f"--{option.replace('_', '-')}", str(getattr(args, option))]
+            completed = subprocess.run(command, capture_output=True, text=True,
+                                       env=dict(os.environ, ZABBIX_TRANSPORT=args.transport))
+
+        if completed.returncode != 0:
+            print(f"{scenario:<22}❌ falló:\n{completed.stderr.strip()}")
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        results.append(result)
+        print(
+            f"{scenario:<22}{result['items']:>9}{result['seconds']:>9.2f}{result['throughput']:>11.0f}"
+            f"{result['api_calls']:>10}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+            f"{result['peak_rss_mb']:>9.1f}"
+        )
+
+    if args.json:
+        with open(args.json, mode="w", encoding="utf-8") as file:
+            json.dump({"hosts": args.hosts, "latency": args.latency, "transport": args.transport, "results": results}, file, indent=2)
+        print(f"✅ Resultados guardados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
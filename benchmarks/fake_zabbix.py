@@ -0,0 +1,370 @@
+"""
+Servidor JSON-RPC local que imita la API de Zabbix con un inventario sintético.
+
+Responde apiinfo.version, host.get, host.create, host.update, host.massadd/massremove/massupdate,
+hostgroup.get, template.get, hostinterface.get/update, item.get, history.get y trend.get. Los hosts se generan de forma
+determinista a partir de su hostid, así que inventarios de cientos de miles de
+hosts no ocupan memoria (solo se guardan los hosts creados y los cambios aplicados).
+Cada host tiene los ítems icmpping e icmppingsec con un punto por minuto, también
+generados a partir del itemid y el clock.
+Habla HTTP/1.1 con keep-alive y comprime con gzip si el cliente lo pide.
+
+Uso independiente:
+    python benchmarks/fake_zabbix.py --hosts 50000 --latency 0.02 --port 8080
+"""
+import argparse
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COUNTRIES = ["PE", "CL", "CO", "AR"]
+ROLES = ["SW", "RT", "FW", "AP", "ACC"]
+BRANDS = ["cisco", "huawei", "hp"]
+GROUPS = [{"groupid": str(i + 1), "name": name} for i, name in enumerate(
+    ["switch", "router", "firewall", "FLUJOS", "CITOFONIA"] + [f"{c}-SITE{n:02d}" for c in COUNTRIES for n in range(25)]
+)]
+TEMPLATES = [{"templateid": "10001", "name": "ICMP Ping 5 minutos"}] + [
+    {"templateid": str(10100 + i), "name": f"Template Net {i}"} for i in range(150)
+]
+FIRST_HOSTID = 10000
+# (clave, value_type) de los ítems de cada host; itemid = hostid * 10 + posición + 1
+ITEMS = [("icmpping", "3"), ("icmppingsec", "0")]
+HISTORY_INTERVAL = 60
+
+
+def synthetic_host(hostid):
+    """
+    Genera el host completo (interfaces, grupos, tags) para un hostid.
+    """
+    n = hostid - FIRST_HOSTID
+    country = COUNTRIES[n % len(COUNTRIES)]
+    role = ROLES[(n // 4) % len(ROLES)]
+    name = f"{country}-S{(n // 20) % 500:03d}-{role}-{n % 20:02d}"
+    return {
+        "hostid": str(hostid),
+        "host": name,
+        "name": name,
+        "description": "",
+        "interfaces": [{"interfaceid": str(hostid), "type": "1", "main": "1", "useip": "1",
+                        "ip": f"10.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}", "dns": "", "port": "10050"}],
+        "groups": [GROUPS[(n // 4) % len(ROLES)], GROUPS[5 + (n // 20) % 100]],
+        "tags": [{"tag": "marca", "value": BRANDS[n % len(BRANDS)]}, {"tag": "modelo", "value": f"M{n % 7}"}],
+        "parentTemplates": [TEMPLATES[1 + n % 10]],
+    }
+
+
+class FakeZabbix:
+    """
+    Estado del servidor falso: tamaño del inventario, latencia y hosts creados.
+    """
+
+    def __init__(self, hosts=10000, latency=0.0, history_limit=None):
+        """
+        :param history_limit: Máximo de puntos por history.get/trend.get (más = error, como un timeout)
+        """
+        self.host_count = hosts
+        self.latency = latency
+        self.history_limit = history_limit
+        self.created = {}  # hostid → host completo creado con host.create
+        self.created_names = set()
+        self.changes = {}  # hostid → campos modificados por host.update / host.mass*
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def all_hostids(self):
+        yield from range(FIRST_HOSTID, FIRST_HOSTID + self.host_count)
+        yield from list(self.created)
+
+    def exists(self, hostid):
+        return FIRST_HOSTID <= hostid < FIRST_HOSTID + self.host_count or hostid in self.created
+
+    def host(self, hostid):
+        host = dict(self.created[hostid]) if hostid in self.created else synthetic_host(hostid)
+        host.update(self.changes.get(hostid, {}))
+        return host
+
+    def _host_fields(self, item, hostid):
+        """
+        Campos de host.create/host.update con grupos y plantillas resueltos por id.
+        """
+        fields = {}
+        for key in ("host", "name", "description"):
+            if key in item:
+                fields[key] = item[key] or ""
+        if "interfaces" in item:
+            fields["interfaces"] = [
+                {"interfaceid": interface.get("interfaceid") or f"{hostid}{index}", "type": "1", "main": "1",
+                 "useip": "1", "dns": "", "port": "10050", **{k: str(v) for k, v in interface.items()}}
+                for index, interface in enumerate(item["interfaces"])
+            ]
+        if "groups" in item:
+            wanted = {g["groupid"] for g in item["groups"]}
+            fields["groups"] = [g for g in GROUPS if g["groupid"] in wanted]
+        if "tags" in item:
+            fields["tags"] = [{"tag": t["tag"], "value": t.get("value", "")} for t in item["tags"]]
+        if "templates" in item:
+            wanted = {t["templateid"] for t in item["templates"]}
+            fields["parentTemplates"] = [t for t in TEMPLATES if t["templateid"] in wanted]
+        return fields
+
+    def host_get(self, params):
+        if "hostids" in params:
+            hostids = [int(h) for h in params["hostids"]]
+        else:
+            hostids = self.all_hostids()
+
+        ip_filter = set((params.get("filter") or {}).get("ip") or [])
+        name_filter = set((params.get("filter") or {}).get("host") or [])
+        search = params.get("search") or {}
+        group_names = {g["name"] for g in GROUPS if g["groupid"] in set(params.get("groupids") or [])}
+        output = params.get("output", "extend")
+
+        result = []
+        for hostid in hostids:
+            if not self.exists(hostid):
+                continue
+            host = self.host(hostid)
+            if name_filter and host["host"] not in name_filter:
+                continue
+            if ip_filter and host["interfaces"][0]["ip"] not in ip_filter:
+                continue
+            if search:
+                hits = [str(value).upper() in host.get(field, "").upper() for field, value in search.items()]
+                if not (any(hits) if params.get("searchByAny") else all(hits)):
+                    continue
+            if group_names and not group_names & {g["name"] for g in host["groups"]}:
+                continue
+            item = {k: v for k, v in host.items() if output == "extend" or k in output}
+            for sub_object, select in (("interfaces", "selectInterfaces"), ("groups", "selectGroups"),
+                                       ("tags", "selectTags"), ("parentTemplates", "selectParentTemplates")):
+                if select in params:
+                    item[sub_object] = host[sub_object]
+            result.append(item)
+        return result
+
+    def host_create(self, params):
+        items = params if isinstance(params, list) else [params]
+        with self.lock:
+            names = {item["host"] for item in items}
+            if len(names) != len(items) or names & self.created_names:
+                raise ValueError("Host with the same name already exists.")
+            hostids = []
+            for item in items:
+                hostid = FIRST_HOSTID + self.host_count + len(self.created)
+                host = {"hostid": str(hostid), "name": item["host"], "description": "", "interfaces": [],
+                        "groups": [], "tags": [], "parentTemplates": []}
+                host.update(self._host_fields(item, hostid))
+                self.created[hostid] = host
+                self.created_names.add(item["host"])
+                hostids.append(str(hostid))
+        return {"hostids": hostids}
+
+    def host_update(self, params):
+        items = params if isinstance(params, list) else [params]
+        with self.lock:
+            if any(not self.exists(int(item["hostid"])) for item in items):
+                raise ValueError("No permissions to referred object or it does not exist!")
+            for item in items:
+                hostid = int(item["hostid"])
+                self.changes.setdefault(hostid, {}).update(self._host_fields(item, hostid))
+        return {"hostids": [str(item["hostid"]) for item in items]}
+
+    def host_mass(self, method, params):
+        hostids = [int(h["hostid"]) for h in params["hosts"]] if "hosts" in params else [int(h) for h in params["hostids"]]
+        with self.lock:
+            for hostid in hostids:
+                host = self.host(hostid)
+                changes = self.changes.setdefault(hostid, {})
+                if method == "massadd":
+                    known = {g["groupid"] for g in host["groups"]}
+                    changes["groups"] = host["groups"] + [g for g in GROUPS if g["groupid"] in
+                                                          {x["groupid"] for x in params.get("groups", [])} - known]
+                    known = {t["templateid"] for t in host["parentTemplates"]}
+                    changes["parentTemplates"] = host["parentTemplates"] + [t for t in TEMPLATES if t["templateid"] in
+                                                                            {x["templateid"] for x in params.get("templates", [])} - known]
+                elif method == "massremove":
+                    changes["groups"] = [g for g in host["groups"] if g["groupid"] not in set(params.get("groupids", []))]
+                    changes["parentTemplates"] = [t for t in host["parentTemplates"] if t["templateid"] not in set(params.get("templateids", []))]
+                    if not changes["groups"]:
+                        raise ValueError("Host without host groups.")
+                elif "tags" in params:
+                    changes["tags"] = [dict(tag) for tag in params["tags"]]
+        return {"hostids": [str(hostid) for hostid in hostids]}
+
+    def hostgroup_get(self, params):
+        if "selectHosts" not in params:
+            return GROUPS
+        members = {group["groupid"]: [] for group in GROUPS}
+        for host in map(self.host, self.all_hostids()):
+            for group in host["groups"]:
+                members[group["groupid"]].append({"hostid": host["hostid"]})
+        return [dict(group, hosts=members[group["groupid"]]) for group in GROUPS]
+
+    def hostinterface_get(self, params):
+        return [
+            {"ip": h["interfaces"][0]["ip"], "hostid": h["hostid"], "hosts": [{"host": h["host"], "name": h["name"]}]}
+            for h in map(self.host, self.all_hostids())
+        ]
+
+    def hostinterface_update(self, params):
+        items = params if isinstance(params, list) else [params]
+        with self.lock:
+            owners = {i["interfaceid"]: h for h in map(self.host, self.all_hostids()) for i in h["interfaces"]}
+            if any(str(item["interfaceid"]) not in owners for item in items):
+                raise ValueError("No permissions to referred object or it does not exist!")
+            for item in items:
+                host = owners[str(item["interfaceid"])]
+                interfaces = [dict(i, **{k: str(v) for k, v in item.items()}) if i["interfaceid"] == str(item["interfaceid"]) else i
+                              for i in host["interfaces"]]
+                self.changes.setdefault(int(host["hostid"]), {})["interfaces"] = interfaces
+        return {"interfaceids": [str(item["interfaceid"]) for item in items]}
+
+    def item_get(self, params):
+        hostids = [int(h) for h in params["hostids"]] if "hostids" in params else self.all_hostids()
+        key = (params.get("filter") or {}).get("key_")
+        pattern = (params.get("search") or {}).get("key_", "").replace("*", "")
+        result = []
+        for hostid in hostids:
+            if not self.exists(hostid):
+                continue
+            for position, (item_key, value_type) in enumerate(ITEMS):
+                if (key and item_key != key) or pattern not in item_key:
+                    continue
+                item = {"itemid": str(hostid * 10 + position + 1), "hostid": str(hostid), "key_": item_key,
+                        "value_type": value_type}
+                if "selectHosts" in params:
+                    item["hosts"] = [{"host": self.host(hostid)["host"]}]
+                result.append(item)
+        return result
+
+    @staticmethod
+    def history_value(itemid, clock):
+        if itemid % 10 == 1:  # icmpping: 1 salvo alguna caída
+            return 0 if (clock // HISTORY_INTERVAL + itemid) % 97 == 0 else 1
+        return round(0.001 * (1 + (clock // HISTORY_INTERVAL + itemid) % 50), 6)
+
+    def history_get(self, params, trends=False):
+        step = 3600 if trends else HISTORY_INTERVAL
+        first = -(-int(params["time_from"]) // step) * step
+        clocks = range(first, int(params["time_till"]) + 1, step)
+        if self.history_limit and len(clocks) * len(params["itemids"]) > self.history_limit:
+            raise ValueError("Too many points requested")
+        result = []
+        for itemid in map(int, params["itemids"]):
+            if not trends and str(params.get("history", 3)) != ITEMS[itemid % 10 - 1][1]:
+                continue
+            for clock in clocks:
+                if trends:
+                    values = [self.history_value(itemid, clock + minute * 60) for minute in range(60)]
+                    result.append({"itemid": str(itemid), "clock": str(clock), "num": "60",
+                                   "value_min": str(min(values)), "value_avg": str(sum(values) / 60),
+                                   "value_max": str(max(values))})
+                else:
+                    result.append({"itemid": str(itemid), "clock": str(clock),
+                                   "value": str(self.history_value(itemid, clock))})
+        return result
+
+    def dispatch(self, method, params):
+        if method == "apiinfo.version":
+            return "7.0.0"
+        if method == "host.get":
+            return self.host_get(params or {})
+        if method == "host.create":
+            return self.host_create(params)
+        if method == "host.update":
+            return self.host_update(params)
+        if method in ("host.massadd", "host.massremove", "host.massupdate"):
+            return self.host_mass(method.split(".")[1], params)
+        if method == "hostgroup.get":
+            return self.hostgroup_get(params or {})
+        if method == "template.get":
+            return TEMPLATES
+        if method == "hostinterface.get":
+            return self.hostinterface_get(params or {})
+        if method == "hostinterface.update":
+            return self.hostinterface_update(params)
+        if method == "item.get":
+            return self.item_get(params or {})
+        if method in ("history.get", "trend.get"):
+            return self.history_get(params, trends=method == "trend.get")
+        raise ValueError(f"Method {method} not supported by the fake server")
+
+
+def _handler_for(state):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with state.lock:
+                state.calls += 1
+            if state.latency:
+                time.sleep(state.latency)
+            try:
+                body = {"jsonrpc": "2.0", "result": state.dispatch(request["method"], request.get("params")), "id": request["id"]}
+            except Exception as e:
+                body = {"jsonrpc": "2.0", "error": {"code": -32602, "message": "Invalid params.", "data": str(e)}, "id": request["id"]}
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            if "gzip" in (self.headers.get("Accept-Encoding") or ""):
+                data = gzip.compress(data, compresslevel=1)
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+class FakeZabbixServer:
+    """
+    Arranca el servidor falso en un hilo: with FakeZabbixServer(hosts=50000) as server: server.url
+    """
+
+    def __init__(self, hosts=10000, latency=0.0, port=0, history_limit=None):
+        self.state = FakeZabbix(hosts, latency, history_limit)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _handler_for(self.state))
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/api_jsonrpc.php"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor Zabbix falso para benchmarks")
+    parser.add_argument("--hosts", type=int, default=10000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Segundos de latencia por petición")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    server = FakeZabbixServer(args.hosts, args.latency, args.port)
+    print(f"🧪 Zabbix falso con {args.hosts} hosts en {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,66 @@
+import json
+import os
+import threading
+import time
+
+
+class AccessCache:
+    """
+    Recuerda, por IP y por hostname, el device_type y el juego de credenciales
+    ("no_radius" / "radius") que funcionaron en el último sondeo SSH.
+    Se guarda en un archivo JSON; las entradas más viejas que max_age se ignoran.
+    """
+
+    def __init__(self, path="netmiko_access_cache.json", max_age=7 * 86400):
+        self.path = path
+        self.max_age = max_age
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def get(self, ip=None, hostname=None):
+        """
+        Retorna {"device_type", "credential", "ts"} o None. Busca primero por IP.
+        """
+        with self._lock:
+            for key in (f"ip:{ip}" if ip else None, f"host:{hostname}" if hostname else None):
+                entry = self._entries.get(key) if key else None
+                if entry and time.time() - entry["ts"] <= self.max_age:
+                    return entry
+        return None
+
+    def record(self, ip, hostname, device_type, credential):
+        entry = {"device_type": device_type, "credential": credential, "ts": time.time()}
+        with self._lock:
+            if ip:
+                self._entries[f"ip:{ip}"] = entry
+            if hostname:
+                self._entries[f"host:{hostname}"] = entry
+
+    def forget(self, ip=None, hostname=None):
+        with self._lock:
+            self._entries.pop(f"ip:{ip}", None)
+            self._entries.pop(f"host:{hostname}", None)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = dict(self._entries)
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, mode="w", encoding="utf-8") as file:
+                json.dump(data, file)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar la caché de accesos '{self.path}': {e}")
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                self._entries = json.load(file)
+        except Exception as e:
+            print(f"⚠️ No se pudo leer la caché de accesos '{self.path}': {e}")
+            self._entries = {}
@@ -0,0 +1,285 @@
+import asyncio
+import os
+from zabbix_utils import AsyncZabbixAPI
+from zabbix_cache import LookupCache
+from zabbix_connector import ZabbixManager
+from zabbix_records import GroupTable
+
+class AsyncZabbixManager:
+    """
+    Variante asíncrona de ZabbixManager sobre AsyncZabbixAPI.
+    Limita a max_concurrency las peticiones en vuelo para que las consultas
+    independientes solapen su latencia sin saturar el frontend de Zabbix.
+
+    Uso:
+        async with AsyncZabbixManager(url, token) as zb:
+            groups, templates = await asyncio.gather(zb.get_host_groups(), zb.get_templates())
+    """
+
+    # Helpers puros compartidos con el conector síncrono
+    _filter_by_name = ZabbixManager._filter_by_name
+    _build_host_data = ZabbixManager._build_host_data
+    _process_host = ZabbixManager._process_host
+    _extract_tag_value = ZabbixManager._extract_tag_value
+    _parse_host_row = ZabbixManager._parse_host_row
+
+    def __init__(self, url, token, max_concurrency=8, cache_ttl=3600, cache_file=None):
+        """
+        :param max_concurrency: Máximo de peticiones simultáneas a la API
+        :param cache_ttl: Segundos de validez de la caché de plantillas/grupos
+        :param cache_file: Archivo JSON de caché compartido (ver ZabbixManager)
+        """
+        self.url = url
+        self.token = token
+        self.zapi = None
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self._lookup_lock = None
+        self._ping_template_id = None
+        self.cache = LookupCache(url, ttl=cache_ttl, path=cache_file or os.getenv("ZABBIX_CACHE_FILE"))
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def connect(self):
+        print("🔄 Connecting to the Zabbix API (async)...")
+        try:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._lookup_lock = asyncio.Lock()
+            self.zapi = AsyncZabbixAPI(url=self.url)
+            await self.zapi.login(token=self.token)
+            version = await self._call("apiinfo.version")
+            print(f"✅ Connected to Zabbix API version {version}")
+            return True
+        except Exception as e:
+            print(f"❌ Failed to connect to Zabbix API: {e}")
+            exit()
+            return False
+
+    async def close(self):
+        if self.zapi:
+            await self.zapi.logout()
+            self.zapi = None
+
+    async def _call(self, method, *args, **kwargs):
+        """
+        Ejecuta "objeto.método" respetando el límite de concurrencia.
+        """
+        api_object, api_method = method.split(".", 1)
+        async with self._semaphore:
+            return await getattr(getattr(self.zapi, api_object), api_method)(*args, **kwargs)
+
+    async def get_host_groups(self, group_names=None):
+
+        try:
+            groups = self.cache.get("hostgroups")
+            if groups is None:
+                groups = await self._call("hostgroup.get", output=["groupid", "name"])
+                self.cache.set("hostgroups", groups)
+
+            return self._filter_by_name(groups, group_names)
+        except Exception as e:
+            print(f"❌ Failed to get host groups: {e}")
+            return []
+
+    async def get_templates(self, template_names=None):
+        """
+        Obtiene una lista de todas las plantillas o filtra por nombre.
+        """
+        print("🔍 Obteniendo plantillas desde Zabbix...")
+        try:
+            templates = self._filter_by_name(await self._get_all_templates(), template_names)
+            print(f"✅ Se encontraron {len(templates)} plantillas.")
+            return templates
+        except Exception as e:
+            print(f"❌ Error al obtener las plantillas: {e}")
+            return []
+
+    async def _get_all_templates(self):
+
+        templates = self.cache.get("templates")
+        if templates is None:
+            templates = await self._call("template.get", output=["templateid", "name"])
+            self.cache.set("templates", templates)
+        return templates
+
+    async def _resolve_ping_template_id(self):
+        """
+        Busca el ID de la plantilla de ICMP Ping y lo guarda en la instancia (y en la
+        caché, si está activa). Con la caché fría, las corrutinas concurrentes esperan
+        a un único template.get.
+        """
+        if self._ping_template_id is None:
+            self._ping_template_id = self.cache.get("ping_template_id")
+        if self._ping_template_id:
+            return self._ping_template_id
+        async with self._lookup_lock:
+            if self._ping_template_id:
+                return self._ping_template_id
+            try:
+                for t in await self._get_all_templates():
+                    if "ICMP Ping 5 minutos" in t["name"]:
+                        self._ping_template_id = t["templateid"]
+                        self.cache.set("ping_template_id", t["templateid"])
+                        return t["templateid"]
+                return None
+            except Exception as e:
+                print(f"❌ Error buscando plantilla de ping: {e}")
+                return None
+
+    def _get_ping_template_id(self):
+        # _build_host_data es síncrono: create_host resuelve antes el ID con _resolve_ping_template_id
+        # (se lee de la instancia: con cache_ttl=0 la caché no guarda nada)
+        return self._ping_template_id
+
+    async def get_raw_hosts(self, group_ids=None, page_size=None):
+        """
+        Obtiene los hosts con interfaces, grupos y tags.
+
+        :param page_size: Si se indica, lista primero los hostid y pide el
+                          detalle por páginas en paralelo
+        """
+        print("🔍 Fetching raw host data from Zabbix...")
+        params = {
+            "output": ["hostid", "host", "name"],
+            "selectInterfaces": ["interfaceid", "ip"],
+            "selectGroups": ["name"],
+            "selectTags": ["tag", "value"],
+        }
+        try:
+            if not page_size:
+                if group_ids:
+                    params["groupids"] = group_ids
+                return await self._call("host.get", **params)
+
+            id_params = {"output": ["hostid"]}
+            if group_ids:
+                id_params["groupids"] = group_ids
+            host_ids = sorted((h["hostid"] for h in await self._call("host.get", **id_params)), key=int)
+            pages = await asyncio.gather(*(
+                self._call("host.get", hostids=host_ids[start:start + page_size], **params)
+                for start in range(0, len(host_ids), page_size)
+            ))
+            return sorted((host for page in pages for host in page), key=lambda h: int(h["hostid"]))
+        except Exception as e:
+            print(f"❌ Failed to get raw hosts: {e}")
+            return []
+
+    async def get_processed_hosts(self, group_ids=None, tag_name="marca", page_size=None):
+        hosts = await self.get_raw_hosts(group_ids, page_size=page_size)
+        table = GroupTable()
+        return [self._process_host(host, tag_name, table) for host in hosts]
+
+    async def get_hosts_by_ip(self, ip_list, chunk_size=200):
+        """
+        Busca hosts por IP, repartiendo listas largas en peticiones concurrentes.
+        """
+        try:
+            chunks = await asyncio.gather(*(
+                self._call(
+                    "host.get",
+                    output=["hostid", "host", "name"],
+                    selectInterfaces=["ip"],
+                    filter={"ip": ip_list[start:start + chunk_size]},
+                )
+                for start in range(0, len(ip_list), chunk_size)
+            ))
+            return [host for chunk in chunks for host in chunk]
+        except Exception as e:
+            print(f"❌ Error al buscar hosts por IP: {e}")
+            return []
+
+    async def get_all_host_names(self):
+
+        try:
+            hosts = await self._call("host.get", output=["host"])
+            return [host['host'] for host in hosts]
+        except Exception as e:
+            print(f"❌ Error al obtener nombres de host: {e}")
+            return []
+
+    async def create_host(self, hostname, ip, group_ids, description=None, tags=None, templates=None, visible_name=None, ping_only=False):
+        """
+        Crea un nuevo host en Zabbix (mismos parámetros que ZabbixManager.create_host).
+        """
+        if not self.zapi:
+            print("❌ Not connected to Zabbix API")
+            return None
+
+        if ping_only:
+            await self._resolve_ping_template_id()
+
+        host_data, error = self._build_host_data(
+            hostname, ip, group_ids,
+            description=description,
+            tags=tags,
+            templates=templates,
+            visible_name=visible_name,
+            ping_only=ping_only
+        )
+        if error:
+            print(f"❌ {error}")
+            return None
+
+        try:
+            result = await self._call("host.create", **host_data)
+
+            if "hostids" in result and result["hostids"]:
+                print(f"✅ Host '{hostname}' creado exitosamente con ID {result['hostids'][0]}")
+            else:
+                print("⚠️ Host creado, pero no se recibió ID de retorno")
+            return result
+
+        except Exception as e:
+            print(f"❌ Error al crear el host '{hostname}': {e}")
+            return None
+
+    async def create_hosts(self, hosts):
+        """
+        Crea varios hosts en paralelo (limitado por max_concurrency).
+
+        :param hosts: Lista de dicts con los parámetros de create_host
+        :return: Lista de resultados en el mismo orden
+        """
+        if any(params.get("ping_only") for params in hosts):
+            await self._resolve_ping_template_id()  # Una sola búsqueda antes de lanzar las altas
+        return await asyncio.gather(*(self.create_host(**params) for params in hosts))
+
+    async def create_host_csv(self, filename="hosts_import.csv"):
+        """
+        Crea los hosts de un CSV de importación con peticiones concurrentes.
+        """
+        import csv
+
+        try:
+            with open(filename, newline='', encoding='utf-8') as file:
+                rows = [self._parse_host_row(row) for row in csv.DictReader(file)]
+        except Exception as e:
+            print(f"❌ Error leyendo CSV: {e}")
+            return []
+
+        print(f"🚀 Creando {len(rows)} hosts (hasta {self.max_concurrency} en paralelo)")
+        return await self.create_hosts(rows)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    ZP_KEY = os.getenv("ZABBIX_API")
+    ZB_SERVER = os.getenv("ZABBIX_SERVER")
+
+    async def main():
+        async with AsyncZabbixManager(url=f"http://{ZB_SERVER}/api_jsonrpc.php", token=ZP_KEY) as zb:
+            # Las tres consultas son independientes y se solapan
+            groups, templates, hosts = await asyncio.gather(
+                zb.get_host_groups(), zb.get_templates(), zb.get_raw_hosts(page_size=500)
+            )
+            print(f"📦 {len(groups)} grupos, {len(templates)} plantillas, {len(hosts)} hosts")
+
+    asyncio.run(main())
@@ -0,0 +1,155 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Un lock por archivo para todo el proceso: varios ZabbixManager (uno por
+# servidor en zabbix_multi) comparten el mismo ZABBIX_CACHE_FILE
+_FILE_LOCKS = {}
+_FILE_LOCKS_GUARD = threading.Lock()
+
+
+def _file_lock(path):
+    with _FILE_LOCKS_GUARD:
+        return _FILE_LOCKS.setdefault(os.path.abspath(path), threading.Lock())
+
+
+class LookupCache:
+    """
+    Caché simple con TTL para datos de búsqueda nombre→id (plantillas, grupos...).
+    Opcionalmente se persiste en un archivo JSON compartido entre ejecuciones.
+    Las entradas se separan por namespace (normalmente la URL del servidor).
+    Las listas grandes (set(..., separate=True)) van a un archivo propio por
+    servidor y clave, para no reescribirlas con cada cambio del archivo común.
+    """
+
+    def __init__(self, namespace, ttl=3600, path=None):
+        """
+        :param namespace: Identificador del servidor Zabbix (p.ej. la URL)
+        :param ttl: Segundos de validez de cada entrada (0 desactiva la caché)
+        :param path: Archivo JSON para compartir la caché entre scripts (opcional)
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.path = path
+        self._entries = {}
+        self._load()
+
+    def get(self, key):
+        """
+        Retorna el valor guardado o None si no existe o expiró.
+        """
+        entry = self._entries.get(key)
+        if not entry and self.path:
+            entry = self._load_separate(key)
+        if not entry:
+            return None
+        if time.time() - entry["ts"] > self.ttl:
+            del self._entries[key]
+            return None
+        return entry["value"]
+
+    def set(self, key, value, separate=False):
+        """
+        :param separate: Guardar la entrada en su propio archivo y no en el común
+        """
+        if self.ttl <= 0:
+            return
+        self._entries[key] = {"ts": time.time(), "value": value}
+        if separate:
+            self._write_separate(key)
+        else:
+            self._save(changed=[key])
+
+    def invalidate(self, key=None):
+        """
+        Borra una entrada, o toda la caché de este namespace si key es None.
+        """
+        if key is None:
+            removed = list(self._entries)
+            self._entries.clear()
+        else:
+            removed = [key]
+            self._entries.pop(key, None)
+        self._save(removed=removed)
+        if self.path:
+            for path in glob.glob(glob.escape(self._separate_path("")) + ("*" if key is None else glob.escape(key))):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def _separate_path(self, key):
+        return f"{self.path}.{hashlib.sha1(self.namespace.encode()).hexdigest()[:12]}.{key}"
+
+    def _load_separate(self, key):
+        try:
+            with open(self._separate_path(key), encoding="utf-8") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        self._entries[key] = entry
+        return entry
+
+    def _write_separate(self, key):
+        if not self.path:
+            return
+        path = self._separate_path(key)
+        try:
+            self._write_atomic(path, self._entries[key])
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar la caché '{path}': {e}")
+
+    @staticmethod
+    def _write_atomic(path, data):
+        """
+        Escritura atómica (temporal único en el mismo directorio) para no corromper la caché.
+        """
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(fd, mode="w", encoding="utf-8") as file:
+                json.dump(data, file)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                self._entries = json.load(file).get(self.namespace, {})
+        except Exception as e:
+            print(f"⚠️ No se pudo leer la caché '{self.path}': {e}")
+            self._entries = {}
+
+    def _save(self, changed=(), removed=()):
+        """
+        Aplica solo las entradas cambiadas/borradas sobre el contenido actual del
+        archivo (releído bajo el lock), para no pisar lo que otro servidor o
+        script guardó desde que se cargó esta caché.
+        """
+        if not self.path:
+            return
+        try:
+            with _file_lock(self.path):
+                data = {}
+                if os.path.exists(self.path):
+                    try:
+                        with open(self.path, encoding="utf-8") as file:
+                            data = json.load(file)
+                    except ValueError:
+                        data = {}  # Archivo dañado: se reescribe
+                entries = data.setdefault(self.namespace, {})
+                for key in removed:
+                    entries.pop(key, None)
+                for key in changed:
+                    if key in self._entries:
+                        entries[key] = self._entries[key]
+                self._write_atomic(self.path, data)
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar la caché '{self.path}': {e}")
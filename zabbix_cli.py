@@ -0,0 +1,534 @@
+"""
+Punto de entrada único para los scripts del proyecto:
+
+    python zabbix_cli.py <comando> [opciones] [+ <comando> [opciones] ...] [--profile] [--servers all|CL,PE]
+
+Los comandos encadenados con "+" comparten la misma conexión autenticada a
+Zabbix (y las mismas métricas con --profile), p.ej.:
+
+    python zabbix_cli.py export + filter + probe
+
+Con --servers los comandos de consulta (groups, templates, export, compare,
+filter --server, find-ip) se ejecutan a la vez contra varios servidores
+(ZABBIX_SERVERS, ver zabbix_multi) y cada resultado indica su origen.
+
+Cada comando importa sus dependencias al ejecutarse: los comandos de Zabbix no
+cargan netmiko/paramiko y "filter" sobre un CSV no carga ni zabbix_utils.
+"""
+import os
+import sys
+
+
+class Session:
+    """
+    Estado compartido entre los comandos de una invocación: métricas y una
+    única conexión a Zabbix, creada la primera vez que un comando la pide.
+    """
+
+    def __init__(self, metrics=None, servers=None):
+        """
+        :param servers: None (un solo servidor, ZABBIX_SERVER), "all" o lista de nombres de ZABBIX_SERVERS
+        """
+        self.metrics = metrics
+        self.servers = servers
+        self._zabbix = None
+        self._netmiko = None
+        self._env_loaded = False
+
+    @property
+    def multi(self):
+        return self.servers is not None
+
+    def load_env(self):
+        """
+        Carga .env una sola vez (python-dotenv también se importa solo si hace falta).
+        """
+        if not self._env_loaded:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            self._env_loaded = True
+
+    def zabbix(self):
+        """
+        ZabbixManager conectado, o MultiZabbixManager si se eligieron varios servidores.
+        """
+        if self._zabbix is None:
+            self.load_env()
+            if self.multi:
+                from zabbix_multi import MultiZabbixManager, servers_from_env
+
+                try:
+                    servers = servers_from_env(None if self.servers == "all" else self.servers)
+                except ValueError as e:
+                    print(f"❌ {e}")
+                    exit()
+                self._zabbix = MultiZabbixManager(servers, metrics=self.metrics)
+            else:
+                from zabbix_connector import ZabbixManager
+
+                self._zabbix = ZabbixManager(url=f"http://{os.getenv('ZABBIX_SERVER')}/api_jsonrpc.php",
+                                             token=os.getenv("ZABBIX_API"), metrics=self.metrics)
+            self._zabbix.connect()
+        return self._zabbix
+
+    def netmiko(self):
+        """
+        NetmikoManager compartido (probe + run reutilizan las sesiones SSH del pool).
+        """
+        if self._netmiko is None:
+            # netmiko/paramiko (y su pila criptográfica) solo se cargan aquí
+            from zabbix_netmiko_manager import NetmikoManager
+
+            self.load_env()
+            self._netmiko = NetmikoManager(
+                access_cache_file=os.getenv("NETMIKO_ACCESS_CACHE", "netmiko_access_cache.json"), metrics=self.metrics
+            )
+        return self._netmiko
+
+    def close(self):
+        if self._netmiko is not None:
+            self._netmiko.close()
+
+
+def _source(record):
+    return f" [{record['source']}]" if record.get("source") else ""
+
+
+def cmd_groups(session, args):
+    groups = session.zabbix().get_host_groups()
+
+    print("📦 Grupos disponibles en Zabbix:")
+    for group in groups:
+        print(f"➡️  {group['name']} (ID: {group['groupid']}){_source(group)}")
+    return 0
+
+
+def cmd_templates(session, args):
+    templates = session.zabbix().get_templates()
+
+    if templates:
+        print("📦 Plantillas disponibles en Zabbix:")
+        for tpl in templates:
+            print(f"➡️  {tpl['name']} (ID: {tpl['templateid']}){_source(tpl)}")
+    else:
+        print("🤷 No se encontraron plantillas o hubo un error.")
+    return 0
+
+
+def cmd_export(session, args):
+    columns = None
+    if "--columns" in args:
+        position = args.index("--columns")
+        if position + 1 >= len(args):
+            print("Uso: zabbix_cli.py export [archivo] [--columns Host,IP,...] [--snapshot]")
+            return 1
+        columns = [column.strip() for column in args[position + 1].split(",") if column.strip()]
+        del args[position:position + 2]
+    use_snapshot = "--snapshot" in args
+    args = [arg for arg in args if arg != "--snapshot"]
+    filename = args[0] if args else "zabbix_hosts.csv"
+    if use_snapshot and session.multi:
+        print("❌ --snapshot trabaja con un solo servidor")
+        return 1
+
+    from zabbix_export import MULTI_SERVER_COLUMNS, export_hosts
+
+    if columns is None and session.multi:
+        columns = MULTI_SERVER_COLUMNS
+    zb = session.zabbix()
+    try:
+        if use_snapshot:
+            from zabbix_snapshot import HostSnapshot
+
+            snapshot = HostSnapshot(os.getenv("ZABBIX_SNAPSHOT_DB", "zabbix_snapshot.db"))
+            if snapshot.refresh(zb) is None:
+                snapshot.close()
+                return 1  # No exportar un snapshot desactualizado como si fuera el actual
+            count = export_hosts(snapshot.iter_raw_hosts(), filename, columns=columns, metrics=session.metrics)
+            snapshot.close()
+        else:
+            count = export_hosts(zb.iter_raw_hosts(), filename, columns=columns, metrics=session.metrics)
+        print(f"✅ {count} hosts exportados a {filename}")
+    except Exception as e:
+        print(f"❌ Error al exportar hosts a {filename}: {e}")
+        return 1
+    return 0
+
+
+def cmd_compare(session, args):
+    use_snapshot = "--snapshot" in args
+    args = [arg for arg in args if arg != "--snapshot"]
+    devices_csv = args[0] if args else "host.csv"
+    zabbix_csv = args[1] if len(args) > 1 else "zabbix_hosts.csv"
+    if use_snapshot and session.multi:
+        print("❌ --snapshot trabaja con un solo servidor")
+        return 1
+
+    import json
+    from contextlib import nullcontext
+    from zabbix_compare_hosts import export_zabbix_hosts_to_csv
+    from zabbix_export import MULTI_SERVER_COLUMNS
+    from zabbix_reconcile import reconcile_csv
+
+    try:
+        zb = session.zabbix()
+
+        # Exportar hosts de Zabbix a CSV (con --snapshot, desde el snapshot local tras un refresh incremental)
+        if use_snapshot:
+            from zabbix_snapshot import HostSnapshot
+
+            snapshot = HostSnapshot(os.getenv("ZABBIX_SNAPSHOT_DB", "zabbix_snapshot.db"))
+            exported = None
+            if snapshot.refresh(zb) is not None:
+                exported = export_zabbix_hosts_to_csv(snapshot, zabbix_csv)
+            snapshot.close()
+        else:
+            exported = export_zabbix_hosts_to_csv(zb, zabbix_csv, columns=MULTI_SERVER_COLUMNS if session.multi else None)
+        if exported is None:
+            return 1  # Sin el inventario completo la conciliación daría faltantes falsos
+
+        # Conciliar por IP, hostname y MAC en una sola pasada (diff en reconciliation.jsonl)
+        with (session.metrics.phase("reconcile") if session.metrics else nullcontext()):
+            counts = reconcile_csv(devices_csv, zabbix_csv, "reconciliation.jsonl")
+        if counts is None:
+            return 1
+        print(f"📄 Hosts en {devices_csv}: {sum(counts.values())}")
+        print(f"❓ Hosts faltantes en Zabbix: {counts['missing']}")
+        print(f"✏️ Renombrados (misma IP, otro nombre): {counts['renamed']}")
+        print(f"⚠️ En conflicto (IP usada por otro host): {counts['conflicting']}")
+
+        # Detalle de los que no coinciden, leído del diff recién escrito
+        details = {"missing": [], "renamed": [], "conflicting": []}
+        with open("reconciliation.jsonl", encoding="utf-8") as file:
+            for line in file:
+                record = json.loads(line)
+                if record["status"] in details:
+                    details[record["status"]].append(record)
+        if details["missing"]:
+            print("\nHosts que están en el CSV de dispositivos pero no en Zabbix:")
+            for record in details["missing"]:
+                print(f"- {record['device'] or record['ip']}")
+        else:
+            print("Todos los hosts del CSV están en Zabbix.")
+        if details["renamed"]:
+            print("\nHosts renombrados (en Zabbix con otro nombre):")
+            for record in details["renamed"]:
+                print(f"- {record['device']} ({record['ip']}) -> {record['zabbix_host']} (por {record['match_key']})")
+        if details["conflicting"]:
+            print("\nHosts en conflicto (su IP la usa otro host de Zabbix):")
+            for record in details["conflicting"]:
+                print(f"- {record['device']} ({record['ip']}) -> IP usada por {record['zabbix_host']}")
+    except Exception as e:
+        print(f"❌ Error general en la ejecución: {e}")
+        return 1
+    return 0
+
+
+def cmd_filter(session, args):
+    from zabbix_filter_hosts import DEFAULT_FILTER, filter_hosts_from_csv, filter_hosts_from_zabbix, \
+        filter_hosts_multi, load_filters
+
+    input_csv = "zabbix_hosts.csv"
+    output_csv = "HOST_FILTRADOS.csv"
+
+    # Filtrado en el servidor, sin zabbix_hosts.csv: filter --server ["expresión"]
+    if args and args[0] == "--server":
+        filter_hosts_from_zabbix(session.zabbix(), output_csv, args[1] if len(args) > 1 else DEFAULT_FILTER)
+        return 0
+
+    # Con un archivo de filtros ("nombre: expresión" por línea) se evalúan todos en una pasada:
+    #   filter filtros.txt [zabbix_hosts.csv]
+    if args:
+        input_csv = args[1] if len(args) > 1 else input_csv
+        try:
+            filters = load_filters(args[0])
+        except (OSError, ValueError) as e:
+            print(f"❌ Error al leer filtros: {e}")
+            return 1
+        counts = filter_hosts_multi(input_csv, filters)
+        if counts is None:
+            return 1
+        for name, count in counts.items():
+            print(f"➡️  {name}: {count} hosts" + (f" → HOST_FILTRADOS_{name}.csv" if count else ""))
+    else:
+        filter_hosts_from_csv(input_csv, output_csv)
+    return 0
+
+
+def cmd_find_ip(session, args):
+    usage = (
+        "Uso: zabbix_cli.py find-ip [--cached] [-f archivo|-] <ip|cidr|rango> ...\n"
+        "     cidr: 10.231.0.0/16   rango: 10.0.0.1-10.0.0.50   -f -: leer de stdin\n"
+        "     --cached: resolver también las IPs exactas con el índice local"
+    )
+    use_index_for_ips = "--cached" in args
+    args = [arg for arg in args if arg != "--cached"]
+
+    from zabbix_get_host_by_ip import IPIntervalIndex, find_hosts_by_ip, find_hosts_by_ip_index, is_exact_ip, \
+        read_ip_specs
+
+    # Extrae las IPs de los argumentos de la línea de comandos (y de -f)
+    ip_specs = []
+    while args:
+        arg = args.pop(0)
+        if arg == "-f":
+            if not args:
+                print(usage)
+                return 1
+            specs = read_ip_specs(args.pop(0))
+            if specs is None:
+                return 1
+            ip_specs.extend(specs)
+        else:
+            ip_specs.append(arg)
+
+    # Verifica si se pasaron IPs
+    if not ip_specs:
+        print(usage)
+        return 1
+
+    zb = session.zabbix()
+    exact_ips = [spec for spec in ip_specs if is_exact_ip(spec)]
+    networks = [spec for spec in ip_specs if not is_exact_ip(spec)]
+
+    # Busca los hosts (el hostid solo es único dentro de cada servidor)
+    matching_hosts = {}
+    if networks or use_index_for_ips:
+        index = IPIntervalIndex(zb.get_host_interfaces())
+        specs = networks + (exact_ips if use_index_for_ips else [])
+        for host in find_hosts_by_ip_index(index, specs):
+            matching_hosts[(host.get("source"), host["hostid"])] = host
+    if exact_ips and not use_index_for_ips:
+        if session.multi:
+            hosts = zb.map(lambda server: find_hosts_by_ip(server, exact_ips))
+        else:
+            hosts = find_hosts_by_ip(zb, exact_ips)
+        for host in hosts:
+            matching_hosts.setdefault((host.get("source"), host["hostid"]), host)
+
+    if matching_hosts:
+        print("🖥️ Hosts encontrados por IP:")
+        for host in matching_hosts.values():
+            # Extrae la IP de la interfaz para mostrarla
+            ip_found = "N/A"
+            if host.get("interfaces"):
+                ip_found = host["interfaces"][0]["ip"]
+
+            print(f"➡️ {host['host']} (ID: {host['hostid']}, IP: {ip_found}){_source(host)}")
+    else:
+        print("🤷 No se encontraron hosts para las IPs proporcionadas.")
+    return 0
+
+
+def cmd_import(session, args):
+    # Tamaño de lote opcional: import 200
+    # --upsert: crea los hosts nuevos, actualiza los modificados y omite los que no cambiaron
+    # --resume: salta las filas que hosts_import.csv.journal ya da por importadas
+    upsert = "--upsert" in args
+    resume = "--resume" in args
+    args = [arg for arg in args if arg not in ("--upsert", "--resume")]
+    try:
+        batch_size = int(args[0]) if args else None
+    except ValueError:
+        print("Uso: zabbix_cli.py import [tamaño_de_lote] [--upsert] [--resume]")
+        return 1
+    if session.multi:
+        print("❌ import trabaja con un solo servidor (sin --servers)")
+        return 1
+
+    session.zabbix().create_host_csv(filename="hosts_import.csv", batch_size=batch_size, upsert=upsert,
+                                     resume=resume)
+    return 0
+
+
+def cmd_probe(session, args):
+    manager = session.netmiko()
+    csv_file = "HOST_FILTRADOS.csv"
+    output_csv = "netmiko_results.csv"
+    workers = int(os.getenv("PROBE_WORKERS", "16"))
+    # --resume: continúa un barrido interrumpido usando netmiko_results.csv.journal
+    manager.process_hosts_from_csv(csv_file, output_csv, workers=workers, host_deadline=60, resume="--resume" in args)
+    return 0
+
+
+def cmd_run(session, args):
+    usage = (
+        "Uso: zabbix_cli.py run [--input HOST_FILTRADOS.csv] [--output netmiko_commands.jsonl] [--workers N]\n"
+        "       [--textfsm] \"comando\" [\"comando\" ...]\n"
+        "     Usa el device_type y la credencial del último probe (NETMIKO_ACCESS_CACHE)"
+    )
+    options = {"--input": "HOST_FILTRADOS.csv", "--output": "netmiko_commands.jsonl", "--workers": "8"}
+    use_textfsm = False
+    commands = []
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg in options:
+            if not args:
+                print(usage)
+                return 1
+            options[arg] = args.pop(0)
+        elif arg == "--textfsm":
+            use_textfsm = True
+        else:
+            commands.append(arg)
+    if not commands or not options["--workers"].isdigit():
+        print(usage)
+        return 1
+
+    import csv
+
+    try:
+        with open(options["--input"], mode="r", encoding="utf-8") as file:
+            hosts = [(row.get("Host", "").strip(), row.get("IP", "").strip()) for row in csv.DictReader(file)]
+    except FileNotFoundError:
+        print(f"❌ Error: Archivo {options['--input']} no encontrado.")
+        return 1
+
+    completed = session.netmiko().run_commands(hosts, commands, options["--output"],
+                                               workers=int(options["--workers"]), use_textfsm=use_textfsm)
+    return 0 if completed is not None else 1
+
+
+def cmd_history(session, args):
+    usage = (
+        "Uso: zabbix_cli.py history [archivo] [--input HOST_FILTRADOS.csv | --all] [--key icmpping]\n"
+        "       [--from now-30d] [--till now] [--window 6h] [--trends] [--workers 4] [--resume]\n"
+        "     archivo: .jsonl.gz (por defecto history.jsonl.gz / trends.jsonl.gz), .jsonl, .csv o .csv.gz"
+    )
+    options = {"--input": "HOST_FILTRADOS.csv", "--key": "icmpping", "--from": "now-30d", "--till": "now",
+               "--window": None, "--workers": "4"}
+    flags = {"--all": False, "--trends": False, "--resume": False}
+    positional = []
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg in options:
+            if not args:
+                print(usage)
+                return 1
+            options[arg] = args.pop(0)
+        elif arg in flags:
+            flags[arg] = True
+        else:
+            positional.append(arg)
+    if len(positional) > 1 or not options["--workers"].isdigit():
+        print(usage)
+        return 1
+    if session.multi:
+        print("❌ history trabaja con un solo servidor (sin --servers)")
+        return 1
+
+    import csv
+    from zabbix_history import parse_duration, parse_time
+
+    try:
+        time_from, time_till = parse_time(options["--from"]), parse_time(options["--till"])
+        window = parse_duration(options["--window"]) if options["--window"] else None
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    if time_from > time_till:
+        print("❌ --from es posterior a --till")
+        return 1
+
+    hostnames = None
+    if not flags["--all"]:
+        try:
+            with open(options["--input"], mode="r", encoding="utf-8") as file:
+                hostnames = [row["Host"].strip() for row in csv.DictReader(file) if row.get("Host", "").strip()]
+        except FileNotFoundError:
+            print(f"❌ Error: Archivo {options['--input']} no encontrado.")
+            return 1
+
+    zb = session.zabbix()
+    items = zb.get_items(hostnames, key=options["--key"])
+    if not items:
+        print(f"🤷 No se encontraron ítems '{options['--key']}' para los hosts indicados.")
+        return 1
+    filename = positional[0] if positional else ("trends.jsonl.gz" if flags["--trends"] else "history.jsonl.gz")
+    written = zb.export_history(items, filename, time_from, time_till, trends=flags["--trends"], window=window,
+                                workers=int(options["--workers"]), resume=flags["--resume"])
+    return 0 if written is not None else 1
+
+
+# nombre → (función, descripción)
+COMMANDS = {
+    "groups": (cmd_groups, "Lista los grupos de hosts"),
+    "templates": (cmd_templates, "Lista las plantillas"),
+    "export": (cmd_export, "Exporta los hosts a CSV/JSONL [archivo] [--columns ...] [--snapshot]"),
+    "compare": (cmd_compare, "Concilia host.csv con Zabbix [dispositivos.csv] [zabbix_hosts.csv] [--snapshot]"),
+    "filter": (cmd_filter, "Filtra hosts [filtros.txt [entrada.csv]] | [--server [expresión]]"),
+    "find-ip": (cmd_find_ip, "Busca hosts por IP, red CIDR o rango [--cached] [-f archivo] ..."),
+    "import": (cmd_import, "Crea hosts desde hosts_import.csv [lote] [--upsert] [--resume]"),
+    "probe": (cmd_probe, "Prueba ping/SSH de HOST_FILTRADOS.csv [--resume]"),
+    "run": (cmd_run, "Ejecuta comandos en los equipos probados [--output archivo] [--textfsm] \"comando\" ..."),
+    "history": (cmd_history, "Exporta history/trends por ventanas [archivo] [--key icmpping] [--from now-30d] [--resume]"),
+}
+
+
+def usage():
+    lines = ["Uso: python zabbix_cli.py <comando> [opciones] [+ <comando> ...] [--profile] [--servers all|CL,PE]",
+             "", "Comandos:"]
+    lines.extend(f"  {name:<10} {description}" for name, (_, description) in COMMANDS.items())
+    return "\n".join(lines)
+
+
+def split_commands(argv):
+    """
+    ["export", "a.csv", "+", "filter"] → [["export", "a.csv"], ["filter"]]
+    """
+    commands = [[]]
+    for arg in argv:
+        if arg == "+":
+            commands.append([])
+        else:
+            commands[-1].append(arg)
+    return [command for command in commands if command]
+
+
+def main(argv=None):
+    """
+    Ejecuta uno o más comandos encadenados con "+"; se detiene en el primero que falla.
+    :return: Código de salida
+    """
+    argv = list(sys.argv[1:] if argv is None else argv)
+    servers = None
+    if "--servers" in argv:
+        position = argv.index("--servers")
+        if position + 1 >= len(argv):
+            print(usage())
+            return 1
+        servers = argv[position + 1]
+        servers = servers if servers == "all" else [name.strip() for name in servers.split(",") if name.strip()]
+        del argv[position:position + 2]
+    commands = split_commands([arg for arg in argv if arg != "--profile"])
+    if not commands or commands[0][0] in ("-h", "--help", "help"):
+        print(usage())
+        return 0 if commands else 1
+    unknown = [command[0] for command in commands if command[0] not in COMMANDS]
+    if unknown:
+        print(f"❌ Comando desconocido: {', '.join(unknown)}")
+        print(usage())
+        return 1
+
+    session = Session(servers=servers)
+    if "--profile" in argv:
+        from zabbix_metrics import profile_from_argv
+
+        session.load_env()  # ZABBIX_METRICS_FILE puede venir de .env
+        session.metrics = profile_from_argv(argv)  # --profile: desglose de tiempos y métricas al salir
+    try:
+        for name, *args in split_commands(argv):
+            function, _ = COMMANDS[name]
+            status = function(session, args)
+            if status:
+                return status
+        return 0
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
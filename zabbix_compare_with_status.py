@@ -1,4 +1,5 @@
 import csv
+from zabbix_matching import SubstringIndex
 
 def get_hosts_from_csv(csv_file):
     """
@@ -24,22 +25,22 @@ def create_comparison_csv(devices_csv, zabbix_csv, output_csv="comparison_result
     """
     Crea un CSV con todos los hosts de devices_csv y su status respecto a Zabbix.
     Busca coincidencias parciales: si el hostname de devices está contenido en algún hostname de Zabbix.
+    Los hostnames de Zabbix que coinciden se listan en la columna Zabbix_Hosts.
     """
     try:
         devices_hosts = get_hosts_from_csv(devices_csv)
         zabbix_hosts = get_hosts_from_csv(zabbix_csv)
 
+        # Un solo recorrido de los hostnames de Zabbix con un autómata de todos los dispositivos
+        matches = SubstringIndex(devices_hosts).match_texts(zabbix_hosts)
+
         with open(output_csv, mode='w', newline='', encoding='utf-8') as file:
             writer = csv.writer(file)
-            writer.writerow(["Hostname", "Status"])  # Encabezados
+            writer.writerow(["Hostname", "Status", "Zabbix_Hosts"])  # Encabezados
             for host in devices_hosts:
-                # Verificar si el host está contenido en algún host de Zabbix
-                status = "No en Zabbix"
-                for z_host in zabbix_hosts:
-                    if host in z_host:
-                        status = "En Zabbix"
-                        break
-                writer.writerow([host, status])
+                matched = matches.get(host, [])
+                status = "En Zabbix" if matched else "No en Zabbix"
+                writer.writerow([host, status, "; ".join(matched)])
 
         print(f"✅ Comparación completada. Resultado guardado en {output_csv}")
     except Exception as e:
@@ -1,17 +1,52 @@
 import csv
+import os
+import time
+from contextlib import nullcontext
 from zabbix_utils import ZabbixAPI
+from zabbix_cache import LookupCache
+from zabbix_journal import Journal
+from zabbix_ratelimit import AdaptiveLimiter
+from zabbix_export import PROCESSED_COLUMNS, export_hosts, processed_row
+from zabbix_records import GroupTable, HostRecord, intern_value
+from zabbix_transport import PooledZabbixAPI
 
 class ZabbixManager:
-    def __init__(self, url, token):
-
+    def __init__(self, url, token, cache_ttl=3600, cache_file=None, metrics=None, transport=None, timeout=30,
+                 limiter=None):
+        """
+        :param cache_ttl: Segundos de validez de la caché de plantillas/grupos
+        :param cache_file: Archivo JSON para compartir la caché entre ejecuciones
+                           (por defecto ZABBIX_CACHE_FILE del entorno, si existe)
+        :param metrics: zabbix_metrics.Metrics para registrar cada llamada a la API (opcional)
+        :param transport: "pooled" (keep-alive + gzip, por defecto) o "urllib" (una conexión
+                          por petición, como zabbix_utils); también ZABBIX_TRANSPORT del entorno
+        :param timeout: Segundos de timeout por petición (ZABBIX_TIMEOUT del entorno si existe)
+        :param limiter: zabbix_ratelimit.AdaptiveLimiter para las llamadas a la API (por defecto
+                        uno configurado con ZABBIX_MAX_CONCURRENCY, ZABBIX_RATE_LIMIT, ...)
+        """
         self.url = url
         self.token = token
+        self.transport = transport or os.getenv("ZABBIX_TRANSPORT", "pooled")
+        self.timeout = int(os.getenv("ZABBIX_TIMEOUT", timeout))
         self.zapi = None
+        self.cache = LookupCache(url, ttl=cache_ttl, path=cache_file or os.getenv("ZABBIX_CACHE_FILE"))
+        self.metrics = metrics
+        self.limiter = limiter or AdaptiveLimiter.from_env("api", "ZABBIX", initial=4, max_limit=16, tolerance=None)
+
+    def _phase(self, name):
+        return self.metrics.phase(name) if self.metrics else nullcontext()
 
     def connect(self):
         print("🔄 Connecting to the Zabbix API...")
         try:
-            self.zapi = ZabbixAPI(url=self.url, token=self.token)
+            if self.transport == "urllib":
+                self.zapi = ZabbixAPI(url=self.url, token=self.token, timeout=self.timeout)
+            else:
+                self.zapi = PooledZabbixAPI(url=self.url, token=self.token, timeout=self.timeout)
+            if self.metrics:
+                self.metrics.instrument_api(self.zapi)
+            # Después de las métricas: cada reintento queda registrado como una llamada
+            self.limiter.limit_api(self.zapi, target=self.url)
             version = self.zapi.apiinfo.version()
             print(f"✅ Connected to Zabbix API version {version}")
             return True
@@ -23,15 +58,34 @@ class ZabbixManager:
     def get_host_groups(self, group_names=None):
 
         try:
-            params = {"output": ["groupid", "name"]}
-            if group_names:
-                params["filter"] = {"name": group_names}
+            groups = self.cache.get("hostgroups")
+            if groups is None:
+                groups = self.zapi.hostgroup.get(output=["groupid", "name"])
+                self.cache.set("hostgroups", groups)
 
-            return self.zapi.hostgroup.get(**params)
+            return self._filter_by_name(groups, group_names)
         except Exception as e:
             print(f"❌ Failed to get host groups: {e}")
             return []
 
+    def _filter_by_name(self, items, names):
+        """
+        Equivalente local de filter={"name": names} sobre una lista cacheada.
+        """
+        if not names:
+            return items
+        if isinstance(names, str):
+            names = [names]
+        wanted = set(names)
+        return [item for item in items if item["name"] in wanted]
+
+    def invalidate_cache(self, key=None):
+        """
+        Invalida la caché de búsquedas ("hostgroups", "templates", "ping_template_id", "interfaces")
+        o toda la caché si no se indica key.
+        """
+        self.cache.invalidate(key)
+
     def get_raw_hosts(self, group_ids=None):
 
         print("🔍 Fetching raw host data from Zabbix...")
@@ -50,30 +104,128 @@ class ZabbixManager:
             print(f"❌ Failed to get raw hosts: {e}")
             return []
 
+    def query_hosts(self, expression=None, output=None, select=None, group_ids=None):
+        """
+        Consulta hosts filtrando en el servidor todo lo posible.
+
+        La expresión (ver zabbix_filter_expr) se traduce en parámetros search,
+        groupids y filter de host.get; el resultado se vuelve a filtrar
+        localmente con la expresión completa, así que el servidor solo reduce
+        el volumen transferido.
+
+        :param expression: Expresión de filtro, p.ej. 'text ~ PE and (text ~ SW or text ~ SWITCH)'
+        :param output: Campos del host a devolver (por defecto hostid, host, name) o "extend"
+        :param select: Subobjetos a incluir: "interfaces", "groups", "tags"
+                       (se añaden automáticamente los que la expresión necesita)
+        :param group_ids: Lista de IDs de grupo (opcional)
+        :return: Lista de hosts con el formato de host.get
+        """
+        from zabbix_filter_expr import parse, pushdown_params, compile_filter, prepare_record, host_to_row
+
+        try:
+            # output puede ser una lista de campos o "extend"
+            params = {"output": output if isinstance(output, str) else list(output or ["hostid", "host", "name"])}
+            predicate = None
+            needs = set()
+            if expression:
+                node = parse(expression)
+                pushed, needs = pushdown_params(node)
+                if "groups" in needs:
+                    group_ids_by_name = {}
+                    for group in self.get_host_groups():
+                        group_ids_by_name.setdefault(group["name"].upper(), []).append(group["groupid"])
+                    pushed, needs = pushdown_params(node, group_ids_by_name)
+                params.update(pushed)
+                predicate = compile_filter(expression)
+                for field in ("host", "name"):
+                    if not isinstance(params["output"], str) and field not in params["output"]:
+                        params["output"].append(field)
+            if group_ids:
+                params["groupids"] = group_ids
+
+            for sub_object in set(select or []) | needs:
+                fields = {"interfaces": ["interfaceid", "ip"], "groups": ["name"], "tags": ["tag", "value"]}[sub_object]
+                params["select" + sub_object.capitalize()] = fields
+
+            hosts = self.zapi.host.get(**params)
+            if predicate:
+                hosts = [host for host in hosts if predicate(prepare_record(host_to_row(host)))]
+            return hosts
+        except ValueError as e:
+            print(f"❌ Error en la expresión de filtro: {e}")
+            return []
+        except Exception as e:
+            print(f"❌ Failed to query hosts: {e}")
+            return []
+
+    def iter_raw_hosts(self, group_ids=None, page_size=500):
+        """
+        Igual que get_raw_hosts pero paginado: primero lista solo los hostid
+        (ordenados) y luego pide el detalle por bloques de page_size,
+        entregando cada host a medida que llega.
+
+        Si una petición falla (tras los reintentos del limitador) la excepción se
+        propaga: quien consume el generador no debe dar por completo un inventario parcial.
+
+        :param group_ids: Lista de IDs de grupo para filtrar (opcional)
+        :param page_size: Cantidad de hosts por petición host.get
+        """
+        print("🔍 Fetching raw host data from Zabbix (paginated)...")
+        try:
+            id_params = {"output": ["hostid"]}
+            if group_ids:
+                id_params["groupids"] = group_ids
+            host_ids = sorted((h["hostid"] for h in self.zapi.host.get(**id_params)), key=int)
+        except Exception as e:
+            print(f"❌ Failed to list host ids: {e}")
+            raise
+
+        for start in range(0, len(host_ids), page_size):
+            page = host_ids[start:start + page_size]
+            try:
+                hosts = self.zapi.host.get(
+                    output=["hostid", "host", "name"],
+                    hostids=page,
+                    selectInterfaces=["interfaceid", "ip"],
+                    selectGroups=["name"],
+                    selectTags=["tag", "value"],
+                    sortfield="hostid",
+                )
+            except Exception as e:
+                print(f"❌ Failed to get raw hosts page {start // page_size + 1}: {e}")
+                raise
+            # sortfield ordena como texto; se reordena numéricamente dentro de la página
+            hosts.sort(key=lambda h: int(h["hostid"]))
+            yield from hosts
+
     def get_processed_hosts(self, group_ids=None, tag_name="marca"):
-        hosts = self.get_raw_hosts(group_ids)
-        processed = []
-
-        for host in hosts:
-            host_id = host["hostid"]
-            hostname = host["host"]
-            visible_name = host["name"]
-            ip = host["interfaces"][0]["ip"] if host.get("interfaces") else "No IP"
-            groups = {g["name"] for g in host.get("groups", [])}  # ← set sin duplicados
-            tag_value = self._extract_tag_value(host.get("tags", []), tag_name)
-
-            processed.append(
-                {
-                    "hostid": host_id,
-                    "hostname": hostname,
-                    "name": visible_name,
-                    "ip": ip,
-                    "groups": groups,
-                    "tags": tag_value,
-                }
-            )
+        # iter_processed_hosts propaga el error; aquí, como el resto de getters, se retorna []
+        try:
+            return list(self.iter_processed_hosts(group_ids, tag_name))
+        except Exception as e:
+            print(f"❌ Error al obtener hosts procesados: {e}")
+            return []
+
+    def iter_processed_hosts(self, group_ids=None, tag_name="marca", page_size=500, table=None):
+        """
+        Versión en streaming de get_processed_hosts (usa iter_raw_hosts).
+
+        :param table: GroupTable compartida por los registros (se crea una si no se indica)
+        """
+        table = table if table is not None else GroupTable()
+        for host in self.iter_raw_hosts(group_ids, page_size=page_size):
+            yield self._process_host(host, tag_name, table)
+
+    def _process_host(self, host, tag_name, table):
+        """
+        Convierte un host de la API en un HostRecord (acceso tipo dict:
+        hostid, hostname, name, ip, groups, tags).
+        """
+        ip = host["interfaces"][0]["ip"] if host.get("interfaces") else "No IP"
+        group_ids = table.ids_for(g["name"] for g in host.get("groups", []))  # ← ids sin duplicados
+        tag_value = intern_value(self._extract_tag_value(host.get("tags", []), tag_name))
 
-        return processed
+        return HostRecord(host["hostid"], host["host"], host["name"], ip, group_ids, tag_value, table)
 
     def _extract_tag_value(self, tags, tag_name):
 
@@ -82,18 +234,20 @@ class ZabbixManager:
                 return tag["value"]
         return None
 
-    def export_hosts_to_csv(self, hosts, filename="zabbix_hosts_export.csv"):
-
+    def export_hosts_to_csv(self, hosts, filename="zabbix_hosts_export.csv", columns=None):
+        """
+        Exporta registros de get_processed_hosts/iter_processed_hosts (se escriben
+        a medida que llegan). Con extensión .gz, .jsonl o .jsonl.gz se usa ese
+        formato (ver zabbix_export).
+        """
         try:
-            with open(filename, mode="w", newline="", encoding="utf-8") as file:
-                writer = csv.writer(file)
-                writer.writerow(
-                    ["hostid", "host", "name", "ip", "groups", "tag"]
-                )  # Header
-                writer.writerows(hosts)
+            export_hosts(hosts, filename, columns=columns, metrics=self.metrics,
+                         row_builder=processed_row, available_columns=PROCESSED_COLUMNS)
             print(f"✅ Hosts exported successfully to '{filename}'")
+            return True
         except Exception as e:
             print(f"❌ Failed to export CSV: {e}")
+            return False
 
     def create_host(self, hostname, ip, group_ids, description=None, tags=None, templates=None, visible_name=None, ping_only=False):
         """
@@ -112,55 +266,19 @@ class ZabbixManager:
             print("❌ Not connected to Zabbix API")
             return None
 
-        if not hostname or not ip or not group_ids:
-            print("❌ hostname, ip y group_ids son requeridos")
-            return None
-
-        if not isinstance(group_ids, list):
-            print("❌ group_ids debe ser una lista")
+        host_data, error = self._build_host_data(
+            hostname, ip, group_ids,
+            description=description,
+            tags=tags,
+            templates=templates,
+            visible_name=visible_name,
+            ping_only=ping_only
+        )
+        if error:
+            print(f"❌ {error}")
             return None
 
         try:
-            host_data = {
-                "host": hostname,
-                "interfaces": [
-                    {
-                        "type": 1,
-                        "main": 1,
-                        "useip": 1,
-                        "ip": ip,
-                        "dns": "",
-                        "port": "10050"
-                    }
-                ],
-                "groups": [{"groupid": gid} for gid in group_ids],
-                "description": description or None
-            }
-
-            if visible_name:
-                host_data["name"] = visible_name
-
-            if tags:
-                if isinstance(tags, list):
-                    host_data["tags"] = tags
-                else:
-                    print("⚠️ 'tags' debe ser una lista de diccionarios")
-                    return None
-
-            # Si ping_only, asociar plantilla ICMP automáticamente
-            if ping_only:
-                ping_template_id = self._get_ping_template_id()
-                if not ping_template_id:
-                    print("❌ Plantilla ICMP Ping no encontrada.")
-                    return None
-                host_data["templates"] = [{"templateid": ping_template_id}]
-            elif templates:
-                if isinstance(templates, list):
-                    host_data["templates"] = templates
-                else:
-                    print("⚠️ 'templates' debe ser una lista de diccionarios con 'templateid'")
-                    return None
-
             result = self.zapi.host.create(**host_data)
 
             if "hostids" in result and result["hostids"]:
@@ -174,15 +292,69 @@ class ZabbixManager:
             print(f"❌ Error al crear el host '{hostname}': {e}")
             return None
 
+    def _build_host_data(self, hostname, ip, group_ids, description=None, tags=None, templates=None, visible_name=None, ping_only=False):
+        """
+        Construye el payload de host.create sin enviarlo.
+        Retorna: (host_data, None) o (None, mensaje de error).
+        """
+        if not hostname or not ip or not group_ids:
+            return None, "hostname, ip y group_ids son requeridos"
+
+        if not isinstance(group_ids, list):
+            return None, "group_ids debe ser una lista"
+
+        host_data = {
+            "host": hostname,
+            "interfaces": [
+                {
+                    "type": 1,
+                    "main": 1,
+                    "useip": 1,
+                    "ip": ip,
+                    "dns": "",
+                    "port": "10050"
+                }
+            ],
+            "groups": [{"groupid": gid} for gid in group_ids],
+            "description": description or None
+        }
+
+        if visible_name:
+            host_data["name"] = visible_name
+
+        if tags:
+            if isinstance(tags, list):
+                host_data["tags"] = tags
+            else:
+                return None, "'tags' debe ser una lista de diccionarios"
+
+        # Si ping_only, asociar plantilla ICMP automáticamente
+        if ping_only:
+            ping_template_id = self._get_ping_template_id()
+            if not ping_template_id:
+                return None, "Plantilla ICMP Ping no encontrada."
+            host_data["templates"] = [{"templateid": ping_template_id}]
+        elif templates:
+            if isinstance(templates, list):
+                host_data["templates"] = templates
+            else:
+                return None, "'templates' debe ser una lista de diccionarios con 'templateid'"
+
+        return host_data, None
+
     def _get_ping_template_id(self):
         """
         Busca el ID de la plantilla de ICMP Ping.
         Retorna: templateid como string o None si no se encuentra.
         """
         try:
-            templates = self.zapi.template.get(output=["templateid", "name"])
-            for t in templates:
+            ping_template_id = self.cache.get("ping_template_id")
+            if ping_template_id:
+                return ping_template_id
+
+            for t in self._get_all_templates():
                 if "ICMP Ping 5 minutos" in t["name"]:
+                    self.cache.set("ping_template_id", t["templateid"])
                     return t["templateid"]
             return None
         except Exception as e:
@@ -198,73 +370,326 @@ class ZabbixManager:
         """
         print("🔍 Obteniendo plantillas desde Zabbix...")
         try:
-            params = {"output": ["templateid", "name"]}
-            if template_names:
-                params["filter"] = {"name": template_names}
-            
-            templates = self.zapi.template.get(**params)
+            templates = self._filter_by_name(self._get_all_templates(), template_names)
             print(f"✅ Se encontraron {len(templates)} plantillas.")
             return templates
         except Exception as e:
             print(f"❌ Error al obtener las plantillas: {e}")
             return []
 
-    def create_host_csv(self, filename="hosts_import.csv"):
+    def _get_all_templates(self):
+        """
+        Lista completa de plantillas (templateid, name), servida desde la caché si es válida.
+        """
+        templates = self.cache.get("templates")
+        if templates is None:
+            templates = self.zapi.template.get(output=["templateid", "name"])
+            self.cache.set("templates", templates)
+        return templates
+
+    def create_host_csv(self, filename="hosts_import.csv", batch_size=None, report_file="hosts_import_report.csv", upsert=False,
+                        journal_file=None, resume=False):
         """
         Crea múltiples hosts a partir de un archivo CSV.
         Columnas esperadas:
             hostname, ip, group_ids, visible_name, tags, templates, ping_only, mac
-        """
-        import csv
 
+        :param filename: Archivo CSV de entrada
+        :param batch_size: Si se indica, envía los hosts en lotes de ese tamaño
+                           (un host.create por lote); por defecto, uno por fila
+        :param report_file: Reporte por fila de los modos por lotes y upsert (None para omitirlo)
+        :param upsert: Si True, consulta una vez los hosts existentes y clasifica cada fila en
+                       created / updated / unchanged: solo se envían altas y modificaciones
+        :param journal_file: Diario de progreso (por defecto filename + ".journal"; fsync tras cada
+                             lote, o cada 100 filas / 2 s en el modo fila a fila)
+        :param resume: Si True, salta las filas que el diario ya da por importadas
+        :return: Lista de resultados por fila
+        """
         if not self.zapi:
             print("❌ Not connected to Zabbix API")
             return
 
+        journal_file = journal_file or filename + ".journal"
+        if upsert or batch_size:
+            with Journal(journal_file, resume=resume, sync_every=batch_size or 100) as journal:
+                if upsert:
+                    return self._upsert_host_csv(filename, batch_size or 100, report_file, journal)
+                return self._create_host_csv_batched(filename, batch_size, report_file, journal)
+
+        # Fila a fila: también queda en el diario (para --resume), pero sin fsync por fila
+        # (el diario sincroniza cada sync_every filas o sync_interval segundos) y sin reporte
+        with Journal(journal_file, resume=resume) as journal:
+            return self._create_host_csv_batched(filename, 1, None, journal, sync_chunks=False)
+
+    def _parse_host_row(self, row):
+        """
+        Convierte una fila del CSV de importación en los parámetros de create_host.
+        """
+        hostname = row["hostname"].strip()
+        ip = row["ip"].strip()
+        group_ids = [gid.strip() for gid in row["group_ids"].split(",") if gid.strip()]
+        visible_name = (row.get("visible_name") or "").strip() or None
+        description = (row.get("description") or "").strip() or None
+        ping_only = (row.get("ping_only") or "false").strip().lower() == "true"
+
+        # Construcción de tags
+        tags = []
+        if row.get("tags"):
+            for tag_pair in row["tags"].split(";"):
+                if "=" in tag_pair:
+                    tag, val = tag_pair.split("=", 1)
+                    tags.append({"tag": tag.strip(), "value": val.strip()})
+
+        # Agregar MAC como tag si existe
+        if row.get("mac"):
+            tags.append({"tag": "mac", "value": row["mac"].strip()})
+
+        # Construcción de templates (si no es ping_only)
+        templates = []
+        if not ping_only and row.get("templates"):
+            templates = [{"templateid": tid.strip()} for tid in row["templates"].split(",") if tid.strip()]
+
+        return {
+            "hostname": hostname,
+            "ip": ip,
+            "group_ids": group_ids,
+            "tags": tags,
+            "templates": templates,
+            "visible_name": visible_name,
+            "description": description,
+            "ping_only": ping_only,
+        }
+
+    def _create_host_csv_batched(self, filename, batch_size, report_file, journal, sync_chunks=True):
+        """
+        Lee el CSV por bloques de batch_size filas y crea cada bloque con un solo host.create.
+        Si un bloque falla se divide en mitades hasta aislar las filas problemáticas.
+        El resultado de cada fila queda en el diario; las filas ya importadas se saltan.
+
+        :param sync_chunks: Si True, fsync del diario tras cada bloque
+        """
+        results = []
+        chunk = []
+
         try:
             with open(filename, newline='', encoding='utf-8') as file:
                 reader = csv.DictReader(file)
-                for row in reader:
-                    hostname = row["hostname"].strip()
-                    ip = row["ip"].strip()
-                    group_ids = [gid.strip() for gid in row["group_ids"].split(",") if gid.strip()]
-                    visible_name = row.get("visible_name", "").strip() or None
-                    description = row.get("description", "").strip() or None
-                    ping_only = row.get("ping_only", "false").strip().lower() == "true"
-
-                    # Construcción de tags
-                    tags = []
-                    if row.get("tags"):
-                        for tag_pair in row["tags"].split(";"):
-                            if "=" in tag_pair:
-                                tag, val = tag_pair.split("=", 1)
-                                tags.append({"tag": tag.strip(), "value": val.strip()})
-
-                    # Agregar MAC como tag si existe
-                    if row.get("mac"):
-                        tags.append({"tag": "mac", "value": row["mac"].strip()})
-
-                    # Construcción de templates (si no es ping_only)
-                    templates = []
-                    if not ping_only and row.get("templates"):
-                        templates = [{"templateid": tid.strip()} for tid in row["templates"].split(",") if tid.strip()]
-
-                    # Crear host
-                    print(f"🚀 Creando host: {hostname}")
-                    self.create_host(
-                        hostname=hostname,
-                        ip=ip,
-                        group_ids=group_ids,
-                        tags=tags,
-                        templates=templates,
-                        visible_name=visible_name,
-                        description=description,
-                        ping_only=ping_only
-                    )
+                # line 1 es el encabezado
+                for line, row in enumerate(reader, start=2):
+                    hostname = (row.get("hostname") or "").strip()
+                    if self._journaled_result(journal, line, hostname, results):
+                        continue
+                    with self._phase("parse_rows"):
+                        try:
+                            host_data, error = self._build_host_data(**self._parse_host_row(row))
+                        except Exception as e:
+                            host_data, error = None, f"Fila inválida: {e}"
+
+                    if error:
+                        self._journal_results(journal, results, [{"line": line, "hostname": hostname, "status": "failed", "hostid": "", "error": error}])
+                        continue
+
+                    chunk.append((line, host_data))
+                    if len(chunk) >= batch_size:
+                        self._send_hosts_chunk(chunk, results, "create", journal, sync_chunks)
+                        chunk = []
+
+                if chunk:
+                    self._send_hosts_chunk(chunk, results, "create", journal, sync_chunks)
 
         except Exception as e:
             print(f"❌ Error leyendo CSV: {e}")
 
+        results.sort(key=lambda r: r["line"])
+        created = sum(1 for r in results if r["status"] == "created")
+        print(f"📊 Importación finalizada: {created} creados, {len(results) - created} fallidos")
+
+        if report_file:
+            with self._phase("write_report"):
+                self._write_import_report(results, report_file)
+
+        return results
+
+    def _create_hosts_chunk(self, chunk, results, method="create"):
+        """
+        Envía un bloque [(line, host_data), ...] como un único host.create (o host.update).
+        La llamada es transaccional: si falla, se reintenta cada mitad por separado.
+        En update, los cambios de IP ("_interface" de _host_update_diff) se envían antes
+        en un único hostinterface.update.
+        """
+        label = {"create": "Creando", "update": "Actualizando"}[method]
+        status = {"create": "created", "update": "updated"}[method]
+        print(f"🚀 {label} lote de {len(chunk)} hosts")
+        try:
+            params = [host_data for _, host_data in chunk]
+            if method == "update":
+                interfaces = [host_data["_interface"] for host_data in params if "_interface" in host_data]
+                if interfaces:
+                    self.zapi.hostinterface.update(interfaces)
+                params = [{k: v for k, v in host_data.items() if k != "_interface"} for host_data in params]
+            result = getattr(self.zapi.host, method)(params)
+        except Exception as e:
+            if len(chunk) == 1:
+                line, host_data = chunk[0]
+                hostname = host_data.get("host") or host_data.get("hostid")
+                print(f"❌ Error al {'crear' if method == 'create' else 'actualizar'} el host '{hostname}': {e}")
+                results.append({"line": line, "hostname": hostname, "status": "failed", "hostid": host_data.get("hostid", ""), "error": str(e)})
+                return
+            middle = len(chunk) // 2
+            self._create_hosts_chunk(chunk[:middle], results, method)
+            self._create_hosts_chunk(chunk[middle:], results, method)
+            return
+
+        hostids = result.get("hostids", []) if result else []
+        for index, (line, host_data) in enumerate(chunk):
+            hostid = hostids[index] if index < len(hostids) else host_data.get("hostid", "")
+            results.append({"line": line, "hostname": host_data.get("host", ""), "status": status, "hostid": hostid, "error": ""})
+        print(f"✅ Lote de {len(chunk)} hosts {'creado' if method == 'create' else 'actualizado'} exitosamente")
+
+    def _upsert_host_csv(self, filename, batch_size, report_file, journal):
+        """
+        Importación idempotente: obtiene en una sola pasada el estado de los hosts del CSV
+        que ya existen y envía solo las altas (host.create) y los cambios (host.update),
+        en lotes de batch_size. Volver a importar un archivo sin cambios no escribe nada.
+        """
+        results = []
+        rows = []
+        try:
+            with open(filename, newline='', encoding='utf-8') as file:
+                for line, row in enumerate(csv.DictReader(file), start=2):
+                    hostname = (row.get("hostname") or "").strip()
+                    if self._journaled_result(journal, line, hostname, results):
+                        continue
+                    with self._phase("parse_rows"):
+                        try:
+                            host_data, error = self._build_host_data(**self._parse_host_row(row))
+                        except Exception as e:
+                            host_data, error = None, f"Fila inválida: {e}"
+                    if error:
+                        self._journal_results(journal, results, [{"line": line, "hostname": hostname, "status": "failed", "hostid": "", "error": error}])
+                    else:
+                        rows.append((line, host_data))
+        except Exception as e:
+            print(f"❌ Error leyendo CSV: {e}")
+
+        try:
+            with self._phase("fetch_state"):
+                existing = {host["host"]: host for host in self.get_hosts_state([data["host"] for _, data in rows])}
+        except Exception as e:
+            print(f"❌ Error al consultar los hosts existentes: {e}")
+            return results
+
+        creates, updates, unchanged = [], [], []
+        with self._phase("diff_rows"):
+            for line, host_data in rows:
+                current = existing.get(host_data["host"])
+                if current is None:
+                    creates.append((line, host_data))
+                    continue
+                update = self._host_update_diff(host_data, current)
+                if update:
+                    updates.append((line, update))
+                else:
+                    unchanged.append({"line": line, "hostname": host_data["host"], "status": "unchanged", "hostid": current["hostid"], "error": ""})
+        self._journal_results(journal, results, unchanged)
+        journal.sync()
+        print(f"📋 {len(creates)} para crear, {len(updates)} para actualizar, {len(unchanged)} sin cambios")
+
+        for method, pending in (("create", creates), ("update", updates)):
+            for start in range(0, len(pending), batch_size):
+                self._send_hosts_chunk(pending[start:start + batch_size], results, method, journal)
+
+        results.sort(key=lambda r: r["line"])
+        counts = {status: sum(1 for r in results if r["status"] == status) for status in ("created", "updated", "unchanged", "failed")}
+        print(f"📊 Importación finalizada: {counts['created']} creados, {counts['updated']} actualizados, "
+              f"{counts['unchanged']} sin cambios, {counts['failed']} fallidos")
+
+        if report_file:
+            with self._phase("write_report"):
+                self._write_import_report(results, report_file)
+        return results
+
+    def _send_hosts_chunk(self, chunk, results, method, journal, sync=True):
+        """
+        _create_hosts_chunk + registro de los resultados del lote en el diario
+        (con fsync si sync; si no, según sync_every / sync_interval del diario).
+        """
+        chunk_results = []
+        self._create_hosts_chunk(chunk, chunk_results, method)
+        self._journal_results(journal, results, chunk_results)
+        if sync:
+            journal.sync()
+
+    def _journal_results(self, journal, results, new_results):
+        for result in new_results:
+            journal.record(f"{result['line']}:{result['hostname']}", result)
+        results.extend(new_results)
+
+    def _journaled_result(self, journal, line, hostname, results):
+        """
+        Si el diario ya tiene la fila importada (cualquier estado salvo failed), agrega
+        ese resultado a results y retorna True para saltarla.
+        """
+        result = journal.get(f"{line}:{hostname}")
+        if result and result["status"] != "failed":
+            results.append(result)
+            return True
+        return False
+
+    def _host_update_diff(self, host_data, current):
+        """
+        Parámetros de host.update para llevar current (get_hosts_state) a host_data
+        (_build_host_data), o None si no hay cambios. Grupos y tags del CSV reemplazan
+        los actuales; las plantillas del CSV se vinculan sin desvincular las demás.
+        Un cambio de IP va en "_interface" (parámetros de hostinterface.update de la
+        interfaz principal) para no reescribir las demás interfaces, p.ej. las SNMP.
+        """
+        update = {}
+        if host_data.get("name") and host_data["name"] != current.get("name"):
+            update["name"] = host_data["name"]
+        if host_data.get("description") and host_data["description"] != current.get("description"):
+            update["description"] = host_data["description"]
+
+        ip = host_data["interfaces"][0]["ip"]
+        interfaces = current.get("interfaces") or []
+        main = next((i for i in interfaces if i.get("main") == "1" and i.get("type") == "1"), interfaces[0] if interfaces else None)
+        if main is None:
+            update["interfaces"] = host_data["interfaces"]
+        elif main.get("ip") != ip:
+            update["_interface"] = {"interfaceid": main["interfaceid"], "ip": ip, "useip": 1}
+
+        groups = {g["groupid"] for g in host_data["groups"]}
+        if groups != {g["groupid"] for g in current.get("groups", [])}:
+            update["groups"] = host_data["groups"]
+
+        if "tags" in host_data:
+            tags = {(t["tag"], t["value"]) for t in host_data["tags"]}
+            if tags != {(t["tag"], t["value"]) for t in current.get("tags", [])}:
+                update["tags"] = host_data["tags"]
+
+        if "templates" in host_data:
+            linked = {t["templateid"] for t in current.get("parentTemplates", [])}
+            missing = {t["templateid"] for t in host_data["templates"]} - linked
+            if missing:
+                update["templates"] = [{"templateid": tid} for tid in sorted(linked | missing)]
+
+        if not update:
+            return None
+        update["hostid"] = current["hostid"]
+        update["host"] = host_data["host"]
+        return update
+
+    def _write_import_report(self, results, filename):
+
+        try:
+            with open(filename, mode="w", newline="", encoding="utf-8") as file:
+                writer = csv.DictWriter(file, fieldnames=["line", "hostname", "status", "hostid", "error"])
+                writer.writeheader()
+                writer.writerows(results)
+            print(f"✅ Reporte de importación guardado en '{filename}'")
+        except Exception as e:
+            print(f"❌ Failed to write import report: {e}")
+
     def get_all_host_names(self):
         """
         Obtiene una lista de todos los nombres de host en Zabbix.
@@ -275,3 +700,193 @@ class ZabbixManager:
         except Exception as e:
             print(f"❌ Error al obtener nombres de host: {e}")
             return []
+
+    def get_host_interfaces(self, refresh=False):
+        """
+        Lista todas las interfaces (ip, hostid, host, name), servida desde la caché si es válida.
+
+        :param refresh: Si True, ignora la caché y vuelve a consultar Zabbix
+        """
+        try:
+            interfaces = None if refresh else self.cache.get("interfaces")
+            if interfaces is None:
+                raw = self.zapi.hostinterface.get(output=["ip", "hostid"], selectHosts=["host", "name"])
+                interfaces = [
+                    {
+                        "ip": i["ip"],
+                        "hostid": i["hostid"],
+                        "host": i["hosts"][0]["host"] if i.get("hosts") else "",
+                        "name": i["hosts"][0]["name"] if i.get("hosts") else "",
+                    }
+                    for i in raw
+                ]
+                self.cache.set("interfaces", interfaces, separate=True)  # Lista grande: archivo propio
+            return interfaces
+        except Exception as e:
+            print(f"❌ Error al obtener interfaces: {e}")
+            return []
+
+    def get_hosts_state(self, hostnames, chunk_size=500):
+        """
+        Estado actual (nombre visible, descripción, interfaces, grupos, plantillas
+        vinculadas y tags) de los hosts indicados por nombre.
+        """
+        hostnames = list(hostnames)
+        hosts = []
+        for start in range(0, len(hostnames), chunk_size):
+            hosts.extend(self.zapi.host.get(
+                output=["hostid", "host", "name", "description"],
+                filter={"host": hostnames[start:start + chunk_size]},
+                selectInterfaces=["interfaceid", "type", "main", "useip", "ip", "dns", "port"],
+                selectGroups=["groupid", "name"],
+                selectParentTemplates=["templateid", "name"],
+                selectTags=["tag", "value"],
+            ))
+        return hosts
+
+    def get_items(self, hostnames=None, key="icmpping", chunk_size=500):
+        """
+        Ítems monitoreados con la clave indicada (itemid, key_, value_type y el host).
+
+        :param hostnames: Nombres de host (por defecto todos los hosts)
+        :param key: Clave exacta, o con comodines "*" (p.ej. "net.if.in[*]")
+        """
+        params = {"output": ["itemid", "hostid", "key_", "value_type"], "selectHosts": ["host"], "monitored": True}
+        if "*" in key:
+            params.update(search={"key_": key}, searchWildcardsEnabled=True)
+        else:
+            params["filter"] = {"key_": key}
+        try:
+            if hostnames is None:
+                return self.zapi.item.get(**params)
+            hostnames = list(hostnames)
+            items = []
+            for start in range(0, len(hostnames), chunk_size):
+                hosts = self.zapi.host.get(output=["hostid"], filter={"host": hostnames[start:start + chunk_size]})
+                if hosts:
+                    items.extend(self.zapi.item.get(hostids=[h["hostid"] for h in hosts], **params))
+            return items
+        except Exception as e:
+            print(f"❌ Error al obtener ítems '{key}': {e}")
+            return []
+
+    def get_history(self, itemids, value_type, time_from, time_till):
+        """
+        Puntos de history.get (itemid, clock, value) de ítems de un mismo value_type.
+        Los errores se propagan (export_history parte la ventana y reintenta).
+        """
+        return self.zapi.history.get(history=int(value_type), itemids=itemids, time_from=time_from,
+                                     time_till=time_till, output=["itemid", "clock", "value"])
+
+    def get_trends(self, itemids, time_from, time_till):
+        """
+        Tendencias horarias de trend.get (itemid, clock, num, value_min, value_avg, value_max).
+        """
+        return self.zapi.trend.get(itemids=itemids, time_from=time_from, time_till=time_till,
+                                   output=["itemid", "clock", "num", "value_min", "value_avg", "value_max"])
+
+    def export_history(self, items, filename="history.jsonl.gz", time_from=None, time_till=None, trends=False,
+                       **kwargs):
+        """
+        Exporta history.get/trend.get de items por ventanas en paralelo, reanudable
+        (ver zabbix_history.export_history). Por defecto, los últimos 30 días.
+
+        :return: Cantidad de puntos escritos, o None si hubo error
+        """
+        from zabbix_history import export_history
+
+        time_till = int(time.time()) if time_till is None else time_till
+        time_from = time_till - 30 * 86400 if time_from is None else time_from
+        with self._phase("history"):
+            return export_history(self, items, filename, time_from, time_till, trends=trends, **kwargs)
+
+    def plan_mass_changes(self, specs, chunk_size=500):
+        """
+        Calcula los cambios masivos necesarios para llevar los hosts al estado deseado
+        (ver zabbix_mass). Los grupos y plantillas pueden indicarse por nombre o ID.
+
+        :param specs: dict {hostname: spec}, p.ej. {"SW-01": {"add_tags": [("modelo", "C9300")]}}
+        :param chunk_size: Máximo de hosts por llamada
+        :return: dict con operations, problems y los nombres de grupos/plantillas, o None si falla
+        """
+        from zabbix_mass import plan_changes
+
+        try:
+            groups = self.get_host_groups()
+            templates = self._get_all_templates()
+            group_ids = {g["name"]: g["groupid"] for g in groups}
+            template_ids = {t["name"]: t["templateid"] for t in templates}
+            group_names = {g["groupid"]: g["name"] for g in groups}
+            template_names = {t["templateid"]: t["name"] for t in templates}
+
+            problems = []
+            resolved = {}
+            for hostname, spec in specs.items():
+                spec = dict(spec)
+                unknown = len(problems)
+                for field, ids, names, label in (("groups", group_ids, group_names, "grupo desconocido"),
+                                                 ("templates", template_ids, template_names, "plantilla desconocida")):
+                    for column in (field, f"add_{field}", f"remove_{field}"):
+                        if column not in spec:
+                            continue
+                        values = []
+                        for value in spec[column]:
+                            if value in ids:
+                                values.append(ids[value])
+                            elif value in names:
+                                values.append(value)
+                            else:
+                                problems.append((hostname, f"{label}: {value}"))
+                        spec[column] = values
+                if len(problems) == unknown:  # Hosts con referencias desconocidas no se tocan
+                    resolved[hostname] = spec
+
+            with self._phase("fetch_state"):
+                current = self.get_hosts_state(resolved, chunk_size=chunk_size)
+            operations, plan_problems = plan_changes(current, resolved, chunk_size=chunk_size)
+            return {
+                "operations": operations,
+                "problems": problems + plan_problems,
+                "hosts": len(resolved),
+                "group_names": group_names,
+                "template_names": template_names,
+            }
+        except Exception as e:
+            print(f"❌ Error al planificar cambios masivos: {e}")
+            return None
+
+    def apply_mass_changes(self, plan, dry_run=False):
+        """
+        Muestra el plan de plan_mass_changes y, salvo en dry_run, lo aplica
+        (una llamada host.massadd/massremove/massupdate/update por operación).
+
+        :return: Lista de resultados por operación (method, hosts, status, error)
+        """
+        from zabbix_mass import describe
+
+        for hostname, problem in plan["problems"]:
+            print(f"⚠️ {hostname}: {problem}")
+        operations = plan["operations"]
+        print(f"📋 Plan: {len(operations)} llamadas para {plan['hosts']} hosts")
+        for operation in operations:
+            print(f"➡️  {describe(operation, plan['group_names'], plan['template_names'])}")
+        if dry_run:
+            print("🧪 Dry-run: no se aplicó ningún cambio.")
+            return []
+
+        results = []
+        for operation in operations:
+            obj, method = operation["method"].split(".")
+            try:
+                call = getattr(getattr(self.zapi, obj), method)
+                if isinstance(operation["params"], list):
+                    call(operation["params"])  # host.update con un elemento por host
+                else:
+                    call(**operation["params"])
+                results.append({"method": operation["method"], "hosts": len(operation["hosts"]), "status": "applied", "error": ""})
+            except Exception as e:
+                print(f"❌ {operation['method']} falló para {len(operation['hosts'])} hosts: {e}")
+                results.append({"method": operation["method"], "hosts": len(operation["hosts"]), "status": "failed", "error": str(e)})
+        applied = sum(1 for result in results if result["status"] == "applied")
+        print(f"✅ {applied}/{len(results)} llamadas aplicadas.")
+        return results
@@ -1,14 +1,7 @@
-from dotenv import load_dotenv
-import os
-from zabbix_connector import ZabbixManager
-
-load_dotenv()
-
-ZP_KEY=os.getenv("ZABBIX_API")
-ZB_SERVER=os.getenv("ZABBIX_SERVER")
+import sys
 
 if __name__ == "__main__":
-    zb = ZabbixManager(url=f"http://{ZB_SERVER}/api_jsonrpc.php", token=ZP_KEY)
-    zb.connect()
+    # Equivale a: python zabbix_cli.py import [tamaño_de_lote] [--upsert] [--resume]
+    from zabbix_cli import main
 
-    zb.create_host_csv (filename="hosts_import.csv")
\ No newline at end of file
+    sys.exit(main(["import"] + sys.argv[1:]))
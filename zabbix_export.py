@@ -0,0 +1,171 @@
+import csv
+import gzip
+import json
+import sys
+from contextlib import nullcontext
+
+# Columnas de un host de host.get (ZabbixManager.iter_raw_hosts, HostSnapshot.iter_raw_hosts)
+# Source es el servidor de origen en consultas a varios servidores (zabbix_multi)
+HOST_COLUMNS = ("hostid", "Host", "Name", "IP", "Groups", "Tags", "Source")
+DEFAULT_COLUMNS = ("Host", "Name", "IP", "Groups", "Tags")
+MULTI_SERVER_COLUMNS = DEFAULT_COLUMNS + ("Source",)
+
+# Columnas de un registro procesado (ZabbixManager.get_processed_hosts)
+PROCESSED_COLUMNS = ("hostid", "host", "name", "ip", "groups", "tag")
+
+FORMATS = ("csv", "jsonl")
+
+
+def host_row(host):
+    """
+    Fila de exportación de un host de host.get. Groups es una lista de nombres y
+    Tags una lista de {"tag", "value"}; cada formato los codifica a su manera.
+    """
+    interfaces = host.get("interfaces") or []
+    return {
+        "hostid": host.get("hostid", ""),
+        "Host": host.get("host", ""),
+        "Name": host.get("name", ""),
+        "IP": interfaces[0].get("ip", "") if interfaces else "",
+        "Groups": [g.get("name", "") for g in host.get("groups", [])],
+        "Tags": [{"tag": t.get("tag", ""), "value": t.get("value", "")} for t in host.get("tags", [])],
+        "Source": host.get("source", ""),
+    }
+
+
+def processed_row(record):
+    """
+    Fila de exportación de un registro de get_processed_hosts (HostRecord o dict).
+    """
+    return {
+        "hostid": record["hostid"],
+        "host": record["hostname"],
+        "name": record["name"],
+        "ip": record["ip"],
+        "groups": sorted(record["groups"]),
+        "tag": record["tags"],
+    }
+
+
+def csv_value(value):
+    """
+    Codificación CSV de un valor: listas unidas con ", " y tags como "tag:valor".
+    """
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ", ".join(f"{item['tag']}:{item['value']}" if isinstance(item, dict) else str(item) for item in value)
+    return value
+
+
+def csv_row(row):
+    return {column: csv_value(value) for column, value in row.items()}
+
+
+def detect_format(filename):
+    """
+    Deduce (formato, comprimido) de la extensión: .csv, .jsonl/.ndjson y sus variantes .gz.
+    """
+    name = filename.lower()
+    compressed = name.endswith(".gz")
+    if compressed:
+        name = name[:-3]
+    fmt = "jsonl" if name.endswith((".jsonl", ".ndjson")) else "csv"
+    return fmt, compressed
+
+
+class HostExporter:
+    """
+    Escribe hosts uno a uno en CSV o JSON Lines, opcionalmente con gzip,
+    sin acumular el conjunto completo en memoria.
+
+    Uso:
+        with HostExporter("hosts.jsonl.gz", columns=["Host", "IP"]) as exporter:
+            for host in zb.iter_raw_hosts():
+                exporter.write(host)
+    """
+
+    def __init__(self, filename, fmt=None, columns=None, compress=None, row_builder=host_row,
+                 available_columns=HOST_COLUMNS, compresslevel=6):
+        """
+        :param filename: Archivo de salida; el formato y la compresión se deducen de la extensión
+        :param fmt: "csv" o "jsonl" (opcional, prevalece sobre la extensión)
+        :param columns: Columnas a exportar, en orden (por defecto DEFAULT_COLUMNS)
+        :param compress: Forzar (True) o desactivar (False) gzip
+        :param row_builder: Función host → dict de columnas (host_row o processed_row)
+        :param available_columns: Columnas que produce row_builder
+        """
+        detected_fmt, detected_compress = detect_format(filename)
+        self.filename = filename
+        self.fmt = fmt or detected_fmt
+        self.compress = detected_compress if compress is None else compress
+        self.row_builder = row_builder
+        self.compresslevel = compresslevel
+        if columns is None:
+            columns = DEFAULT_COLUMNS if available_columns == HOST_COLUMNS else available_columns
+        self.columns = list(columns)
+
+        if self.fmt not in FORMATS:
+            raise ValueError(f"Formato desconocido '{self.fmt}' (opciones: {', '.join(FORMATS)})")
+        unknown = [column for column in self.columns if column not in available_columns]
+        if unknown:
+            raise ValueError(f"Columnas desconocidas: {', '.join(unknown)} (opciones: {', '.join(available_columns)})")
+
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def open(self):
+        if self.compress:
+            self._file = gzip.open(self.filename, mode="wt", newline="", encoding="utf-8",
+                                   compresslevel=self.compresslevel)
+        else:
+            self._file = open(self.filename, mode="w", newline="", encoding="utf-8")
+        if self.fmt == "csv":
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(self.columns)
+        return self
+
+    def write(self, host):
+        row = self.row_builder(host)
+        if self.fmt == "csv":
+            self._writer.writerow([csv_value(row[column]) for column in self.columns])
+        else:
+            self._file.write(json.dumps({column: row[column] for column in self.columns}, ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def write_all(self, hosts):
+        for host in hosts:
+            self.write(host)
+        return self.count
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def export_hosts(hosts, filename, fmt=None, columns=None, compress=None, metrics=None, **kwargs):
+    """
+    Exporta un iterable de hosts (idealmente un generador, p.ej. iter_raw_hosts).
+
+    :param metrics: zabbix_metrics.Metrics para medir la fase "export" (opcional)
+    :return: Cantidad de hosts escritos
+    """
+    with HostExporter(filename, fmt=fmt, columns=columns, compress=compress, **kwargs) as exporter, \
+            (metrics.phase("export") if metrics else nullcontext()):
+        return exporter.write_all(hosts)
+
+
+if __name__ == "__main__":
+    # Equivale a: python zabbix_cli.py export [archivo] [--columns Host,IP,...] [--snapshot] [--profile]
+    #   archivo: .csv, .csv.gz, .jsonl o .jsonl.gz (por defecto zabbix_hosts.csv)
+    from zabbix_cli import main
+
+    sys.exit(main(["export"] + sys.argv[1:]))
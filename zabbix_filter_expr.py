@@ -0,0 +1,275 @@
+"""
+Pequeño lenguaje de filtros sobre hosts exportados de Zabbix.
+
+Campos:
+    host, name, ip, text (host + " " + name), groups, tag.<nombre>
+Operadores (sin distinguir mayúsculas):
+    ~   contiene          =   igual          !=  distinto
+    ^=  empieza por       $=  termina por    in  IP dentro de una red CIDR
+Combinadores: and, or, not y paréntesis. Los valores pueden ir entre comillas.
+
+Ejemplos:
+    text ~ PE and (text ~ SW or text ~ SWITCH)
+    host ^= "CL-" and tag.marca = cisco
+    groups = switch and ip in 10.231.0.0/16
+"""
+import ipaddress
+import re
+from zabbix_export import DEFAULT_COLUMNS, csv_value, host_row
+
+OPERATORS = ("~", "=", "!=", "^=", "$=", "in")
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<lparen>\() | (?P<rparen>\)) |
+        (?P<op>!=|\^=|\$=|~|=) |
+        "(?P<dquoted>[^"]*)" | '(?P<squoted>[^']*)' |
+        (?P<word>[^\s()"'=~!^$]+)
+    )""", re.VERBOSE)
+
+
+def _tokenize(expression):
+    tokens = []
+    position = 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Carácter inesperado en la posición {position}: {expression[position:]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        if kind in ("dquoted", "squoted"):
+            tokens.append(("value", match.group(kind)))
+        elif kind == "word":
+            word = match.group(kind)
+            if word.lower() in ("and", "or", "not", "in"):
+                tokens.append((word.lower(), word.lower()))
+            else:
+                tokens.append(("value", word))
+        else:
+            tokens.append((kind, match.group(kind)))
+    return tokens
+
+
+class _Parser:
+
+    def __init__(self, expression):
+        self.expression = expression
+        self.tokens = _tokenize(expression)
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def take(self, kind=None):
+        if self.position >= len(self.tokens):
+            raise ValueError(f"Expresión incompleta: {self.expression!r}")
+        token = self.tokens[self.position]
+        if kind and token[0] != kind:
+            raise ValueError(f"Se esperaba {kind} y se encontró {token[1]!r} en {self.expression!r}")
+        self.position += 1
+        return token
+
+    def parse(self):
+        node = self.parse_or()
+        if self.position != len(self.tokens):
+            raise ValueError(f"Sobra {self.tokens[self.position][1]!r} en {self.expression!r}")
+        return node
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.peek() == "or":
+            self.take()
+            node = ("or", node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.peek() == "and":
+            self.take()
+            node = ("and", node, self.parse_not())
+        return node
+
+    def parse_not(self):
+        if self.peek() == "not":
+            self.take()
+            return ("not", self.parse_not())
+        if self.peek() == "lparen":
+            self.take()
+            node = self.parse_or()
+            self.take("rparen")
+            return node
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        field = self.take("value")[1].lower()
+        if field not in ("host", "name", "ip", "text", "groups") and not field.startswith("tag."):
+            raise ValueError(f"Campo desconocido {field!r} en {self.expression!r}")
+        operator = self.take()[1]
+        if operator not in OPERATORS:
+            raise ValueError(f"Operador desconocido {operator!r} en {self.expression!r}")
+        value = self.take("value")[1]
+        if operator == "in":
+            if field != "ip":
+                raise ValueError(f"'in' solo aplica al campo ip en {self.expression!r}")
+            value = ipaddress.ip_network(value, strict=False)
+        return ("cmp", field, operator, value)
+
+
+def parse(expression):
+    """
+    Convierte una expresión en un árbol de tuplas:
+        ("and", a, b) | ("or", a, b) | ("not", a) | ("cmp", campo, operador, valor)
+    """
+    return _Parser(expression).parse()
+
+
+def _compare(operator, value):
+    if operator == "in":
+        def match(text):
+            try:
+                return ipaddress.ip_address(text) in value
+            except ValueError:
+                return False
+        return match
+
+    value = value.upper()
+    if operator == "~":
+        return lambda text: value in text
+    if operator == "=":
+        return lambda text: text == value
+    if operator == "!=":
+        return lambda text: text != value
+    if operator == "^=":
+        return lambda text: text.startswith(value)
+    return lambda text: text.endswith(value)
+
+
+def _compile_node(node):
+    kind = node[0]
+    if kind == "and":
+        left, right = _compile_node(node[1]), _compile_node(node[2])
+        return lambda record: left(record) and right(record)
+    if kind == "or":
+        left, right = _compile_node(node[1]), _compile_node(node[2])
+        return lambda record: left(record) or right(record)
+    if kind == "not":
+        inner = _compile_node(node[1])
+        return lambda record: not inner(record)
+
+    _, field, operator, value = node
+    match = _compare(operator, value)
+    if field == "groups":
+        if operator == "!=":
+            # "groups != X": ningún grupo se llama X
+            equals = _compare("=", value)
+            return lambda record: not any(equals(group) for group in record["groups"])
+        return lambda record: any(match(group) for group in record["groups"])
+    if field.startswith("tag."):
+        tag = field[4:]
+        return lambda record: tag in record["tags"] and match(record["tags"][tag])
+    return lambda record: match(record[field])
+
+
+def compile_filter(expression):
+    """
+    Compila una expresión en un predicado record -> bool (ver prepare_record).
+    """
+    return _compile_node(parse(expression))
+
+
+def prepare_record(row):
+    """
+    Normaliza una fila del CSV exportado (Host, Name, IP, Groups, Tags) una sola vez
+    para evaluarla contra cualquier número de filtros.
+    """
+    host = (row.get("Host") or "").upper()
+    name = (row.get("Name") or "").upper()
+    tags = {}
+    for pair in (row.get("Tags") or "").split(","):
+        tag, separator, value = pair.strip().partition(":")
+        if separator:
+            tags.setdefault(tag.lower(), value.upper())
+    return {
+        "host": host,
+        "name": name,
+        "text": host + " " + name,
+        "ip": (row.get("IP") or "").strip().upper(),
+        "groups": [group.strip().upper() for group in (row.get("Groups") or "").split(",") if group.strip()],
+        "tags": tags,
+    }
+
+
+def host_to_row(host):
+    """
+    Convierte un host de host.get al formato de fila del CSV exportado (Host, Name, IP, Groups, Tags).
+    """
+    row = host_row(host)
+    return {column: csv_value(row[column]) for column in DEFAULT_COLUMNS}
+
+
+def _conjuncts(node):
+    if node[0] == "and":
+        return _conjuncts(node[1]) + _conjuncts(node[2])
+    return [node]
+
+
+def pushdown_params(node, group_ids_by_name=None):
+    """
+    Traduce la parte de la expresión que Zabbix puede evaluar a parámetros de host.get
+    (search, groupids, filter). Solo se traducen condiciones del nivel "and"
+    superior y siempre de forma que el servidor devuelva un superconjunto: la
+    expresión completa se vuelve a evaluar localmente sobre el resultado.
+    No se traducen text ~ con espacios (puede abarcar host y nombre) ni tag.X:
+    localmente el nombre del tag no distingue mayúsculas y en Zabbix sí.
+
+    :param group_ids_by_name: dict {NOMBRE EN MAYÚSCULAS: [groupid, ...]} para traducir groups = X
+    :return: (params, campos requeridos localmente) donde los campos son un subconjunto
+             de {"interfaces", "groups", "tags"}
+    """
+    params = {}
+    search = {}
+    text_value = None
+    needs = set()
+
+    def collect_needs(current):
+        if current[0] in ("and", "or"):
+            collect_needs(current[1])
+            collect_needs(current[2])
+        elif current[0] == "not":
+            collect_needs(current[1])
+        else:
+            field = current[1]
+            if field == "ip":
+                needs.add("interfaces")
+            elif field == "groups":
+                needs.add("groups")
+            elif field.startswith("tag."):
+                needs.add("tags")
+
+    collect_needs(node)
+
+    for conjunct in _conjuncts(node):
+        if conjunct[0] != "cmp":
+            continue
+        _, field, operator, value = conjunct
+        if operator in ("~", "=", "^=", "$=") and field in ("host", "name"):
+            # search es "contiene" y no distingue mayúsculas: superconjunto de ~, =, ^= y $=
+            search.setdefault(field, value)
+        elif operator == "~" and field == "text" and text_value is None and " " not in value:
+            # Sin espacios la coincidencia cae entera en host o en name
+            text_value = value
+        elif operator == "=" and field == "groups" and group_ids_by_name and "groupids" not in params:
+            # Todos los grupos cuyo nombre coincide sin distinguir mayúsculas
+            groupids = group_ids_by_name.get(value.upper())
+            if groupids:
+                params["groupids"] = list(groupids)
+        elif operator == "=" and field == "ip" and "filter" not in params:
+            params["filter"] = {"ip": [value]}
+
+    if search:
+        params["search"] = search
+    elif text_value is not None:
+        params["search"] = {"host": text_value, "name": text_value}
+        params["searchByAny"] = True
+    return params, needs
@@ -1,37 +1,103 @@
 import csv
+import sys
+from zabbix_filter_expr import compile_filter, prepare_record
+from zabbix_export import export_hosts
 
-def filter_hosts_from_csv(input_csv, output_csv="HOST_FILTRADOS.csv"):
+# Regla original: Host o Name contienen 'PE' y ('SW' o 'Switch')
+DEFAULT_FILTER = "text ~ PE and (text ~ SW or text ~ SWITCH)"
+
+def filter_hosts_from_csv(input_csv, output_csv="HOST_FILTRADOS.csv", expression=DEFAULT_FILTER):
     """
-    Filtra hosts de input_csv donde Host o Name contengan 'PE' y ('SW' o 'Switch').
+    Filtra hosts de input_csv donde Host o Name contengan 'PE' y ('SW' o 'Switch'),
+    o según la expresión indicada (ver zabbix_filter_expr).
     Guarda los resultados en output_csv con toda la información.
     """
+    counts = filter_hosts_multi(input_csv, {"default": expression}, {"default": output_csv})
+    if counts is None:
+        return
+    if counts["default"]:
+        print(f"✅ Filtrado completado. {counts['default']} hosts guardados en {output_csv}")
+    else:
+        print("⚠️ No se encontraron hosts que coincidan con los criterios.")
+
+def load_filters(filters_file):
+    """
+    Lee filtros con nombre, uno por línea: "nombre: expresión". Ignora líneas vacías y comentarios (#).
+    """
+    filters = {}
+    with open(filters_file, mode='r', encoding='utf-8') as file:
+        for number, line in enumerate(file, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            name, separator, expression = line.partition(":")
+            if not separator or not name.strip() or not expression.strip():
+                raise ValueError(f"Línea {number} inválida en {filters_file}: {line!r}")
+            filters[name.strip()] = expression.strip()
+    return filters
+
+def filter_hosts_multi(input_csv, filters, outputs=None):
+    """
+    Evalúa varios filtros con nombre en una sola pasada sobre input_csv.
+    Cada fila se normaliza una vez y se escribe en el archivo de cada filtro que la acepte;
+    los archivos se crean solo si el filtro tiene coincidencias.
+
+    :param filters: dict {nombre: expresión}
+    :param outputs: dict {nombre: archivo}; por defecto HOST_FILTRADOS_<nombre>.csv
+    :return: dict {nombre: cantidad de hosts} o None si hubo error
+    """
+    outputs = outputs or {}
+    try:
+        predicates = [(name, compile_filter(expression)) for name, expression in filters.items()]
+    except ValueError as e:
+        print(f"❌ Error en la expresión de filtro: {e}")
+        return None
+
+    counts = dict.fromkeys(filters, 0)
+    files = {}
+    writers = {}
     try:
-        filtered_hosts = []
         with open(input_csv, mode='r', encoding='utf-8') as file:
             reader = csv.DictReader(file)
             for row in reader:
-                host = row.get('Host', '').upper()
-                name = row.get('Name', '').upper()
-                combined = host + ' ' + name  # Combinar para buscar en ambos
-                if 'PE' in combined and ('SW' in combined or 'SWITCH' in combined):
-                    filtered_hosts.append(row)
-
-        if filtered_hosts:
-            with open(output_csv, mode='w', newline='', encoding='utf-8') as file:
-                if filtered_hosts:
-                    writer = csv.DictWriter(file, fieldnames=filtered_hosts[0].keys())
-                    writer.writeheader()
-                    writer.writerows(filtered_hosts)
-            print(f"✅ Filtrado completado. {len(filtered_hosts)} hosts guardados en {output_csv}")
-        else:
-            print("⚠️ No se encontraron hosts que coincidan con los criterios.")
+                record = prepare_record(row)
+                for name, predicate in predicates:
+                    if not predicate(record):
+                        continue
+                    if name not in writers:
+                        files[name] = open(outputs.get(name, f"HOST_FILTRADOS_{name}.csv"), mode='w', newline='', encoding='utf-8')
+                        writers[name] = csv.DictWriter(files[name], fieldnames=reader.fieldnames)
+                        writers[name].writeheader()
+                    writers[name].writerow(row)
+                    counts[name] += 1
+        return counts
     except FileNotFoundError:
         print(f"❌ Error: Archivo {input_csv} no encontrado.")
+        return None
     except Exception as e:
         print(f"❌ Error al filtrar hosts: {e}")
+        return None
+    finally:
+        for output in files.values():
+            output.close()
+
+def filter_hosts_from_zabbix(zb, output_csv="HOST_FILTRADOS.csv", expression=DEFAULT_FILTER):
+    """
+    Igual que filter_hosts_from_csv, pero consultando a Zabbix con el filtro
+    aplicado en el servidor (ZabbixManager.query_hosts) en lugar de un volcado completo.
+    """
+    hosts = zb.query_hosts(expression, select=["interfaces", "groups", "tags"])
+    if not hosts:
+        print("⚠️ No se encontraron hosts que coincidan con los criterios.")
+        return
+    try:
+        export_hosts(hosts, output_csv)
+        print(f"✅ Filtrado completado. {len(hosts)} hosts guardados en {output_csv}")
+    except Exception as e:
+        print(f"❌ Error al guardar {output_csv}: {e}")
 
 if __name__ == "__main__":
-    input_csv = "zabbix_hosts.csv"
-    output_csv = "HOST_FILTRADOS.csv"
+    # Equivale a: python zabbix_cli.py filter [filtros.txt [zabbix_hosts.csv]] | [--server ["expresión"]]
+    from zabbix_cli import main
 
-    filter_hosts_from_csv(input_csv, output_csv)
\ No newline at end of file
+    sys.exit(main(["filter"] + sys.argv[1:]))
@@ -1,60 +1,145 @@
-from dotenv import load_dotenv
-import os
+import bisect
+import ipaddress
 import sys
-from zabbix_connector import ZabbixManager
+from concurrent.futures import ThreadPoolExecutor
 
-load_dotenv()
+class IPIntervalIndex:
+    """
+    Índice ordenado de IPs de interfaces de Zabbix.
+    Responde IPs exactas, redes CIDR y rangos con búsqueda binaria.
+    """
+
+    def __init__(self, interfaces):
+        """
+        :param interfaces: Lista de dicts con ip, hostid, host, name (ZabbixManager.get_host_interfaces)
+        """
+        entries = []
+        for interface in interfaces:
+            try:
+                address = ipaddress.ip_address(interface["ip"])
+            except ValueError:
+                continue  # Interfaces por DNS o IP vacía
+            entries.append(((address.version, int(address)), interface))
+        entries.sort(key=lambda entry: entry[0])
+        self._keys = [key for key, _ in entries]
+        self._interfaces = [interface for _, interface in entries]
+
+    def lookup_range(self, first, last):
+        """
+        Interfaces con IP entre first y last (ipaddress, ambos incluidos).
+        """
+        start = bisect.bisect_left(self._keys, (first.version, int(first)))
+        end = bisect.bisect_right(self._keys, (last.version, int(last)))
+        return self._interfaces[start:end]
 
-ZP_KEY = os.getenv("ZABBIX_API")
-ZB_SERVER = os.getenv("ZABBIX_SERVER")
+    def lookup(self, spec):
+        """
+        :param spec: IP, red CIDR ("10.231.0.0/16") o rango ("10.0.0.1-10.0.0.50")
+        """
+        first, last = parse_ip_spec(spec)
+        return self.lookup_range(first, last)
 
-def find_hosts_by_ip(zb, ip_list):
+
+def parse_ip_spec(spec):
+    """
+    Convierte una IP, red CIDR o rango en (primera, última) dirección.
+    """
+    spec = spec.strip()
+    if "/" in spec:
+        network = ipaddress.ip_network(spec, strict=False)
+        return network[0], network[-1]
+    if "-" in spec:
+        first, last = (ipaddress.ip_address(part.strip()) for part in spec.split("-", 1))
+        return first, last
+    address = ipaddress.ip_address(spec)
+    return address, address
+
+
+def is_exact_ip(spec):
+    return "/" not in spec and "-" not in spec
+
+
+def read_ip_specs(source):
+    """
+    Lee IPs/CIDR/rangos, uno por línea (o separados por comas/espacios), de un archivo o de stdin ("-").
+    Retorna None si no se puede leer el archivo.
+    """
+    try:
+        file = sys.stdin if source == "-" else open(source, encoding="utf-8")
+        try:
+            specs = []
+            for line in file:
+                line = line.split("#", 1)[0]
+                specs.extend(part for part in line.replace(",", " ").split() if part)
+            return specs
+        finally:
+            if file is not sys.stdin:
+                file.close()
+    except FileNotFoundError:
+        print(f"❌ Error: Archivo {source} no encontrado.")
+    except OSError as e:
+        print(f"❌ Error al leer {source}: {e}")
+    return None
+
+
+def find_hosts_by_ip(zb, ip_list, chunk_size=200, workers=4):
     """
     Busca hosts en Zabbix que coincidan con una lista de IPs.
+    Las listas largas se reparten en peticiones de chunk_size IPs enviadas en paralelo.
     """
     if not ip_list:
         print("⚠️ No se proporcionaron IPs para buscar.")
         return []
 
-    # Prepara el filtro para la API de Zabbix
-    search_filter = {"ip": ip_list}
-    
-    try:
+    def fetch(chunk):
         # Llama a la API con el filtro
-        hosts = zb.zapi.host.get(
+        return zb.zapi.host.get(
             output=["hostid", "host", "name"],
             selectInterfaces=["ip"],
-            filter=search_filter
+            filter={"ip": chunk}
         )
-        return hosts
+
+    chunks = [ip_list[start:start + chunk_size] for start in range(0, len(ip_list), chunk_size)]
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as executor:
+            hosts = {}
+            for result in executor.map(fetch, chunks):
+                for host in result:
+                    hosts.setdefault(host["hostid"], host)
+        return list(hosts.values())
     except Exception as e:
         print(f"❌ Error al buscar hosts por IP: {e}")
         return []
 
+
+def find_hosts_by_ip_index(index, specs):
+    """
+    Resuelve IPs, redes y rangos contra el índice local.
+    Retorna hosts con el mismo formato que find_hosts_by_ip.
+    """
+    hosts = {}
+    for spec in specs:
+        try:
+            interfaces = index.lookup(spec)
+        except ValueError as e:
+            print(f"⚠️ Entrada inválida '{spec}': {e}")
+            continue
+        for interface in interfaces:
+            source = interface.get("source")  # Interfaces de varios servidores (zabbix_multi)
+            host = hosts.setdefault((source, interface["hostid"]), {
+                "hostid": interface["hostid"],
+                "host": interface["host"],
+                "name": interface["name"],
+                "interfaces": [],
+            })
+            if source:
+                host["source"] = source
+            host["interfaces"].append({"ip": interface["ip"]})
+    return list(hosts.values())
+
+
 if __name__ == "__main__":
-    # Verifica si se pasaron IPs como argumentos
-    if len(sys.argv) < 2:
-        print("Uso: python zabbix_get_host_by_ip.py <ip1> <ip2> ... <ipN>")
-        sys.exit(1)
-
-    # Extrae las IPs de los argumentos de la línea de comandos
-    ip_list_to_find = sys.argv[1:]
-
-    # Conecta con Zabbix
-    zb = ZabbixManager(url=f"http://{ZB_SERVER}/api_jsonrpc.php", token=ZP_KEY)
-    zb.connect()
-
-    # Busca los hosts
-    matching_hosts = find_hosts_by_ip(zb, ip_list_to_find)
-
-    if matching_hosts:
-        print("🖥️ Hosts encontrados por IP:")
-        for host in matching_hosts:
-            # Extrae la IP de la interfaz para mostrarla
-            ip_found = "N/A"
-            if host.get("interfaces"):
-                ip_found = host["interfaces"][0]["ip"]
-            
-            print(f"➡️ {host['host']} (ID: {host['hostid']}, IP: {ip_found})")
-    else:
-        print("🤷 No se encontraron hosts para las IPs proporcionadas.")
\ No newline at end of file
+    # Equivale a: python zabbix_cli.py find-ip [--cached] [-f archivo|-] <ip|cidr|rango> ...
+    from zabbix_cli import main
+
+    sys.exit(main(["find-ip"] + sys.argv[1:]))
@@ -0,0 +1,307 @@
+"""
+Exportación de history.get / trend.get por ventanas de tiempo.
+
+El rango pedido se parte en ventanas y los ítems en bloques; cada par
+(bloque, ventana) es una llamada a la API. Las llamadas se hacen en paralelo
+(con pocas en vuelo, para no acumular puntos en memoria) y cada ventana se
+escribe en cuanto llega, como un bloque gzip independiente al final del
+archivo. El diario (archivo + ".journal") guarda qué ventanas están escritas
+y hasta qué byte llega el archivo: con resume se recorta lo escrito después
+de la última ventana registrada y solo se piden las pendientes.
+
+Salida (JSON Lines o CSV según la extensión, .gz recomendado), una fila por punto:
+    history: host, itemid, key, clock, value
+    trends:  host, itemid, key, clock, num, min, avg, max
+Las filas quedan en el orden en que terminan las ventanas, no por clock.
+"""
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from zabbix_export import detect_format
+from zabbix_journal import Journal
+
+HISTORY_COLUMNS = ("host", "itemid", "key", "clock", "value")
+TREND_COLUMNS = ("host", "itemid", "key", "clock", "num", "min", "avg", "max")
+
+# Ventana por defecto: ~36000 puntos por llamada con 100 ítems de 1 minuto (history)
+# o de 1 hora (trends)
+HISTORY_WINDOW = 6 * 3600
+TREND_WINDOW = 15 * 86400
+
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_duration(text):
+    """
+    "90" → 90, "30m" → 1800, "6h" → 21600, "7d" → 604800.
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*([smhdw]?)\s*", str(text).lower())
+    if not match:
+        raise ValueError(f"Duración inválida: '{text}' (p.ej. 90, 30m, 6h, 7d)")
+    return int(match.group(1)) * UNITS[match.group(2) or "s"]
+
+
+def parse_time(text, now=None):
+    """
+    Instante en epoch: "now", "now-30d", epoch ("1727740800") o fecha ISO en
+    hora local ("2026-09-01", "2026-09-01T08:00").
+    """
+    now = int(time.time()) if now is None else now
+    text = str(text).strip()
+    if text == "now":
+        return now
+    if text.startswith("now-"):
+        return now - parse_duration(text[4:])
+    if text.isdigit():
+        return int(text)
+    try:
+        return int(datetime.fromisoformat(text).timestamp())
+    except ValueError:
+        raise ValueError(f"Fecha inválida: '{text}' (p.ej. now-30d, 2026-09-01, 2026-09-01T08:00 o epoch)")
+
+
+def time_windows(time_from, time_till, window):
+    """
+    Parte [time_from, time_till] (ambos incluidos, como en la API) en ventanas
+    consecutivas de window segundos: [(desde, hasta), ...].
+    """
+    return [(start, min(start + window, time_till + 1) - 1) for start in range(time_from, time_till + 1, window)]
+
+
+def json_value(value, value_type):
+    """
+    Valor de la API (siempre texto) en JSON: número (tipos 0 y 3) o texto.
+    """
+    if value_type == "0":
+        return repr(float(value))
+    if value_type == "3":
+        return str(int(value))
+    return json.dumps(value, ensure_ascii=False)
+
+
+def items_digest(items):
+    return hashlib.sha1(",".join(sorted(item["itemid"] for item in items)).encode()).hexdigest()[:16]
+
+
+class PointWriter:
+    """
+    Archivo de puntos escrito por bloques: cada bloque (una ventana) se agrega
+    de una vez, como miembro gzip propio si el archivo va comprimido, y se
+    sincroniza a disco antes de registrarlo en el diario. Así el archivo puede
+    recortarse en el límite de cualquier bloque y seguir siendo válido.
+    """
+
+    def __init__(self, filename, trends=False, offset=None, compresslevel=6):
+        """
+        :param trends: Filas de trend.get (TREND_COLUMNS) en lugar de history.get (HISTORY_COLUMNS)
+        :param offset: Byte hasta el que se conserva un archivo existente (None = empezar de cero)
+        """
+        self.fmt, self.compress = detect_format(filename)
+        self.trends = trends
+        self.columns = TREND_COLUMNS if trends else HISTORY_COLUMNS
+        self.compresslevel = compresslevel
+        if offset is None or not os.path.exists(filename):
+            self._file = open(filename, mode="wb")
+        else:
+            self._file = open(filename, mode="r+b")
+            self._file.truncate(offset)
+            self._file.seek(offset)
+        if self.fmt == "csv" and self._file.tell() == 0:
+            self.write(self._compress(",".join(self.columns).encode("utf-8") + b"\r\n"))
+
+    def encode(self, points, items, value_type=None):
+        """
+        Codifica los puntos de una ventana (se llama desde los hilos de descarga).
+
+        :param points: Resultado de history.get / trend.get
+        :param items: Ítems de los puntos (itemid, key_, value_type, hosts)
+        :param value_type: value_type de los puntos de history.get
+        :return: (bloque de bytes, cantidad de filas)
+        """
+        items = {item["itemid"]: item for item in items}
+        if self.fmt == "csv":
+            text = io.StringIO()
+            writer = csv.writer(text)
+            for point in points:
+                item = items[point["itemid"]]
+                row = [item["hosts"][0]["host"] if item.get("hosts") else "", point["itemid"], item["key_"],
+                       int(point["clock"])]
+                if self.trends:
+                    row.extend((point["num"], point["value_min"], point["value_avg"], point["value_max"]))
+                else:
+                    row.append(point["value"])
+                writer.writerow(row)
+            return self._compress(text.getvalue().encode("utf-8")), len(points)
+
+        # JSON Lines: la parte fija de cada fila (host, itemid, key) se codifica una vez por ítem
+        prefixes = {}
+        for itemid, item in items.items():
+            fixed = {"host": item["hosts"][0]["host"] if item.get("hosts") else "", "itemid": itemid, "key": item["key_"]}
+            prefixes[itemid] = json.dumps(fixed, ensure_ascii=False)[:-1] + ', "clock": '
+        lines = []
+        for point in points:
+            line = prefixes[point["itemid"]] + str(int(point["clock"]))
+            if self.trends:
+                item_type = items[point["itemid"]]["value_type"]
+                line += (f', "num": {int(point["num"])}, "min": {json_value(point["value_min"], item_type)}, '
+                         f'"avg": {json_value(point["value_avg"], "0")}, "max": {json_value(point["value_max"], item_type)}}}\n')
+            else:
+                line += f', "value": {json_value(point["value"], value_type)}}}\n'
+            lines.append(line)
+        return self._compress("".join(lines).encode("utf-8")), len(points)
+
+    def _compress(self, data):
+        # zlib libera el GIL: la compresión corre en paralelo con las descargas
+        return gzip.compress(data, compresslevel=self.compresslevel) if self.compress and data else data
+
+    def write(self, block):
+        """
+        Agrega un bloque ya codificado y devuelve el tamaño del archivo tras escribirlo.
+        """
+        self._file.write(block)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def export_history(zb, items, filename, time_from, time_till, trends=False, window=None, items_per_call=100,
+                   workers=4, min_window=600, journal_file=None, resume=False):
+    """
+    Exporta la historia (o las tendencias) de items entre time_from y time_till.
+
+    Una ventana que falla (tras los reintentos del limitador) se parte en dos y
+    se vuelve a pedir, hasta min_window segundos; si aun así falla queda
+    pendiente para la próxima ejecución con resume.
+
+    :param zb: ZabbixManager conectado (usa get_history / get_trends)
+    :param items: Ítems de ZabbixManager.get_items (itemid, key_, value_type, hosts)
+    :param time_from: Inicio en epoch (incluido)
+    :param time_till: Fin en epoch (incluido)
+    :param trends: True para trend.get (promedios horarios) en lugar de history.get
+    :param window: Segundos por ventana (por defecto HISTORY_WINDOW o TREND_WINDOW)
+    :param items_per_call: Ítems por llamada
+    :param workers: Llamadas en paralelo (el limitador de ZabbixManager puede reducirlas)
+    :param journal_file: Diario de la exportación (por defecto filename + ".journal")
+    :param resume: Si True, continúa la exportación del diario (con su mismo rango de tiempo)
+    :return: Cantidad de puntos escritos en esta ejecución, o None si hubo error
+    """
+    journal = None
+    writer = None
+    executor = None
+    written = 0
+    try:
+        items = sorted(items, key=lambda item: int(item["itemid"]))
+        params = {
+            "trends": trends,
+            "items": items_digest(items),
+            "time_from": time_from,
+            "time_till": time_till,
+            "window": window or (TREND_WINDOW if trends else HISTORY_WINDOW),
+            "items_per_call": items_per_call,
+        }
+        journal = Journal(journal_file or filename + ".journal", resume=resume)
+        previous = journal.get("params")
+        if resume and previous:
+            if (previous["trends"], previous["items"]) != (params["trends"], params["items"]):
+                print("❌ El diario corresponde a otra exportación (otros ítems o history/trends); "
+                      "ejecutar sin --resume para empezar de nuevo")
+                return None
+            params = previous  # El rango de tiempo y las ventanas son los de la exportación original
+        else:
+            journal.record("params", params)
+        time_from, time_till = params["time_from"], params["time_till"]
+
+        by_type = {}
+        for item in items:
+            by_type.setdefault("trend" if trends else item["value_type"], []).append(item)
+        tasks = []
+        for value_type, typed_items in by_type.items():
+            for first in range(0, len(typed_items), params["items_per_call"]):
+                chunk = typed_items[first:first + params["items_per_call"]]
+                for start, end in time_windows(time_from, time_till, params["window"]):
+                    tasks.append((f"{value_type}:{first}:{start}", value_type, chunk, start, end))
+
+        done = [task for task in tasks if task[0] in journal]
+        offset = max((journal.get(task[0])["offset"] for task in done), default=None) if resume else None
+        pending = [task for task in tasks if task[0] not in journal]
+        if done:
+            print(f"⏩ Reanudando: {len(done)} ventanas ya exportadas, {len(pending)} pendientes")
+        print(f"📈 Exportando {'tendencias' if trends else 'historia'} de {len(items)} ítems, "
+              f"{datetime.fromtimestamp(time_from):%Y-%m-%d %H:%M} → {datetime.fromtimestamp(time_till):%Y-%m-%d %H:%M} "
+              f"({len(tasks)} ventanas)")
+
+        writer = PointWriter(filename, trends=trends, offset=offset)
+
+        def fetch(value_type, chunk, start, end):
+            itemids = [item["itemid"] for item in chunk]
+            try:
+                if trends:
+                    return zb.get_trends(itemids, start, end)
+                return zb.get_history(itemids, value_type, start, end)
+            except Exception:
+                if end - start + 1 < 2 * min_window:
+                    raise
+                middle = start + (end - start + 1) // 2
+                return fetch(value_type, chunk, start, middle - 1) + fetch(value_type, chunk, middle, end)
+
+        def fetch_block(value_type, chunk, start, end):
+            return writer.encode(fetch(value_type, chunk, start, end), chunk, value_type)
+
+        # Pocas ventanas en vuelo: las terminadas se escriben antes de pedir más
+        executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        queued = iter(pending)
+        running = {}
+        failed = 0
+        completed = 0
+        while True:
+            for key, value_type, chunk, start, end in queued:
+                running[executor.submit(fetch_block, value_type, chunk, start, end)] = (key, chunk, start, end)
+                if len(running) >= 2 * max(1, workers):
+                    break
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                key, chunk, start, end = running.pop(future)
+                try:
+                    block, count = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"❌ Ventana {datetime.fromtimestamp(start):%Y-%m-%d %H:%M} de {len(chunk)} ítems "
+                          f"({chunk[0]['key_']}): {e}")
+                    continue
+                journal.record(key, {"points": count, "offset": writer.write(block)})
+                written += count
+                completed += 1
+                if completed % 50 == 0:
+                    print(f"🔄 {completed}/{len(pending)} ventanas exportadas ({written} puntos)")
+
+        if failed:
+            print(f"⚠️ {failed} ventanas fallaron: volver a ejecutar con --resume para completarlas")
+        print(f"✅ {written} puntos guardados en {filename}")
+        return written
+    except KeyboardInterrupt:
+        print(f"⚠️ Exportación interrumpida con {written} puntos escritos (reanudar con --resume)")
+        return None
+    except Exception as e:
+        print(f"❌ Error al exportar {'tendencias' if trends else 'historia'}: {e}")
+        return None
+    finally:
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+        if writer:
+            writer.close()
+        if journal:
+            journal.close()
@@ -1,17 +1,7 @@
-from dotenv import load_dotenv
-import os
-from zabbix_connector import ZabbixManager
-
-load_dotenv()
-
-ZP_KEY=os.getenv("ZABBIX_API")
-ZB_SERVER=os.getenv("ZABBIX_SERVER")
+import sys
 
 if __name__ == "__main__":
-    zb = ZabbixManager(url=f"http://{ZB_SERVER}/api_jsonrpc.php", token=ZP_KEY)
-    zb.connect()
-    groups = zb.get_host_groups()
+    # Equivale a: python zabbix_cli.py groups
+    from zabbix_cli import main
 
-    print("📦 Grupos disponibles en Zabbix:")
-    for group in groups:
-        print(f"➡️  {group['name']} (ID: {group['groupid']})")  
\ No newline at end of file
+    sys.exit(main(["groups"] + sys.argv[1:]))
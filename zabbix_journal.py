@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+import time
+
+
+class Journal:
+    """
+    Diario de progreso en JSON Lines, solo de escritura al final, para procesos
+    largos (importación de hosts, barridos de Netmiko). Cada línea es
+    {"key": ..., "value": ...}; con resume=True se cargan las entradas previas
+    para saltar el trabajo ya hecho (la última entrada de una clave prevalece).
+
+    Las escrituras se sincronizan a disco (fsync) por lotes: cada sync_every
+    entradas, cada sync_interval segundos o al llamar a sync()/close().
+    Es seguro entre hilos.
+    """
+
+    def __init__(self, path, resume=False, sync_every=50, sync_interval=2.0):
+        """
+        :param path: Archivo del diario
+        :param resume: Si True, conserva y carga el diario existente; si no, lo vacía
+        :param sync_every: Entradas entre fsync
+        :param sync_interval: Segundos máximos entre fsync
+        """
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+        if resume:
+            self._load()
+        self._file = open(path, mode="a" if resume else "w", encoding="utf-8")
+
+    def _load(self):
+        try:
+            with open(self.path, mode="rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return
+
+        # Una línea final incompleta (corte a mitad de escritura) se descarta del archivo
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            with open(self.path, mode="r+b") as file:
+                file.truncate(complete)
+
+        for line in data[:complete].decode("utf-8").splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            self.entries[entry["key"]] = entry["value"]
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        return self.entries.get(key, default)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def record(self, key, value):
+        """
+        Agrega una entrada; se sincroniza a disco según sync_every / sync_interval.
+        """
+        line = json.dumps({"key": key, "value": value}, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.entries[key] = value
+            self._file.write(line)
+            self._pending += 1
+            if self._pending >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+                self._sync()
+
+    def sync(self):
+        with self._lock:
+            self._sync()
+
+    def _sync(self):
+        if self._pending:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._sync()
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,280 @@
+"""
+Cambios masivos de tags, grupos y plantillas sobre muchos hosts.
+
+El estado deseado se describe por host con estas columnas (todas opcionales):
+    tags, groups, templates                      estado exacto (reemplaza el actual)
+    add_tags, add_groups, add_templates          agregar
+    remove_tags, remove_groups, remove_templates quitar
+Tags separados por ";" ("modelo=C9300;sitio=LIM"); en add_tags "k=v" reemplaza
+otros valores del tag k y en remove_tags "k" quita todos sus valores. Grupos y
+plantillas separados por "," (nombre o ID).
+
+plan_changes compara con el estado actual y agrupa los hosts que reciben el
+mismo cambio en una sola llamada host.massadd / host.massremove / host.massupdate.
+Los tags de los hosts cuyo conjunto final no comparte nadie (p.ej. por el tag mac)
+se envían en un host.update con un elemento {hostid, tags} por host.
+"""
+import csv
+import sys
+
+FIELDS = ("tags", "groups", "templates")
+SPEC_COLUMNS = FIELDS + tuple(f"{action}_{field}" for action in ("add", "remove") for field in FIELDS)
+
+
+def parse_tags(text, allow_bare=False):
+    """
+    "marca=cisco;modelo" → [("marca", "cisco"), ("modelo", None)] (sin valor solo si allow_bare).
+    """
+    tags = []
+    for pair in (text or "").split(";"):
+        pair = pair.strip()
+        if not pair:
+            continue
+        if "=" in pair:
+            tag, value = pair.split("=", 1)
+            tags.append((tag.strip(), value.strip()))
+        elif allow_bare:
+            tags.append((pair, None))
+        else:
+            raise ValueError(f"Tag sin valor: '{pair}' (formato tag=valor)")
+    return tags
+
+
+def parse_list(text):
+    return [item.strip() for item in (text or "").split(",") if item.strip()]
+
+
+def parse_spec(row, defaults=None):
+    """
+    Convierte una fila (columnas de SPEC_COLUMNS) en un spec de cambios.
+    defaults agrega los mismos cambios a todas las filas (opciones de línea de comandos).
+    """
+    spec = {}
+    for column in SPEC_COLUMNS:
+        values = []
+        for source in (row, defaults or {}):
+            value = source.get(column)
+            if not value:
+                continue
+            if isinstance(value, str):
+                value = parse_tags(value, allow_bare=column == "remove_tags") if column.endswith("tags") else parse_list(value)
+            values.extend(value)
+        if values:
+            spec[column] = values
+    return spec
+
+
+def read_specs(filename, defaults=None):
+    """
+    Lee el estado deseado de un CSV con columna Host (o hostname) y columnas de SPEC_COLUMNS.
+    Sirve directamente un CSV exportado o filtrado (HOST_FILTRADOS.csv) junto con defaults.
+    :return: dict {hostname: spec}
+    """
+    specs = {}
+    with open(filename, newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            hostname = (row.get("Host") or row.get("hostname") or "").strip()
+            if hostname:
+                specs[hostname] = parse_spec(row, defaults)
+    return specs
+
+
+def _target_tags(current, spec):
+    tags = list(spec["tags"]) if "tags" in spec else list(current)
+    for tag, value in spec.get("add_tags", []):
+        tags = [(t, v) for t, v in tags if t != tag] + [(tag, value)]
+    for tag, value in spec.get("remove_tags", []):
+        tags = [(t, v) for t, v in tags if not (t == tag and (value is None or v == value))]
+    return sorted(set(tags))
+
+
+def _target_ids(current, spec, field):
+    target = set(spec[field]) if field in spec else set(current)
+    return (target | set(spec.get(f"add_{field}", []))) - set(spec.get(f"remove_{field}", []))
+
+
+def plan_changes(current_hosts, specs, chunk_size=500):
+    """
+    Calcula las operaciones mínimas para llevar los hosts al estado deseado.
+
+    :param current_hosts: Hosts de host.get con groups (groupid), parentTemplates (templateid) y tags
+    :param specs: dict {hostname: spec} con grupos y plantillas ya convertidos a IDs
+    :param chunk_size: Máximo de hosts por llamada
+    :return: (operaciones, problemas) — cada operación es un dict con method, params y hosts
+    """
+    adds, removes, tag_updates = {}, {}, {}
+    problems = []
+    found = set()
+
+    for host in current_hosts:
+        name = host["host"]
+        spec = specs.get(name)
+        if spec is None:
+            continue
+        found.add(name)
+        groups = {g["groupid"] for g in host.get("groups", [])}
+        templates = {t["templateid"] for t in host.get("parentTemplates", [])}
+        tags = sorted({(t["tag"], t["value"]) for t in host.get("tags", [])})
+
+        target_groups = _target_ids(groups, spec, "groups")
+        if not target_groups:
+            problems.append((name, "el host quedaría sin grupos"))
+            continue
+        target_templates = _target_ids(templates, spec, "templates")
+        target_tags = _target_tags(tags, spec)
+
+        entry = (host["hostid"], name)
+        add_key = (frozenset(target_groups - groups), frozenset(target_templates - templates))
+        if any(add_key):
+            adds.setdefault(add_key, []).append(entry)
+        remove_key = (frozenset(groups - target_groups), frozenset(templates - target_templates))
+        if any(remove_key):
+            removes.setdefault(remove_key, []).append(entry)
+        if target_tags != tags:
+            tag_updates.setdefault(tuple(target_tags), []).append(entry)
+
+    for name in specs:
+        if name not in found:
+            problems.append((name, "no existe en Zabbix"))
+
+    operations = []
+    # Primero se agrega y después se quita: un host que cambia de grupo nunca queda sin grupos
+    for (group_ids, template_ids), entries in adds.items():
+        for chunk in _chunks(entries, chunk_size):
+            params = {"hosts": [{"hostid": hostid} for hostid, _ in chunk]}
+            if group_ids:
+                params["groups"] = [{"groupid": gid} for gid in sorted(group_ids)]
+            if template_ids:
+                params["templates"] = [{"templateid": tid} for tid in sorted(template_ids)]
+            operations.append({"method": "host.massadd", "params": params, "hosts": [n for _, n in chunk]})
+    for (group_ids, template_ids), entries in removes.items():
+        for chunk in _chunks(entries, chunk_size):
+            params = {"hostids": [hostid for hostid, _ in chunk]}
+            if group_ids:
+                params["groupids"] = sorted(group_ids)
+            if template_ids:
+                params["templateids"] = sorted(template_ids)
+            operations.append({"method": "host.massremove", "params": params, "hosts": [n for _, n in chunk]})
+    # massupdate reemplaza todos los tags: se agrupan los hosts con el mismo conjunto final;
+    # los conjuntos de un solo host van juntos en host.update (un elemento por host)
+    singles = []
+    for target_tags, entries in tag_updates.items():
+        if len(entries) == 1:
+            singles.append((entries[0], target_tags))
+            continue
+        for chunk in _chunks(entries, chunk_size):
+            params = {
+                "hosts": [{"hostid": hostid} for hostid, _ in chunk],
+                "tags": [{"tag": tag, "value": value} for tag, value in target_tags],
+            }
+            operations.append({"method": "host.massupdate", "params": params, "hosts": [n for _, n in chunk]})
+    for chunk in _chunks(singles, chunk_size):
+        params = [
+            {"hostid": hostid, "tags": [{"tag": tag, "value": value} for tag, value in target_tags]}
+            for (hostid, _), target_tags in chunk
+        ]
+        operations.append({"method": "host.update", "params": params, "hosts": [n for (_, n), _ in chunk]})
+    return operations, problems
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def describe(operation, group_names=None, template_names=None):
+    """
+    Descripción de una operación en una línea, para el modo --dry-run.
+    """
+    group_names = group_names or {}
+    template_names = template_names or {}
+    params = operation["params"]
+    hosts = operation["hosts"]
+    sample = ", ".join(hosts[:3]) + (f" y {len(hosts) - 3} más" if len(hosts) > 3 else "")
+    if isinstance(params, list):
+        # host.update por host: tags distintos en cada uno
+        return f"{operation['method']:<16} {len(hosts):>5} hosts  tags por host  ({sample})"
+    parts = []
+    for key, names, label in (("groups", group_names, "grupos"), ("templates", template_names, "plantillas")):
+        if key in params:
+            ids = [item[key[:-1] + "id"] for item in params[key]]
+            sign = "=" if operation["method"] == "host.massupdate" else "+"
+            parts.append(f"{sign}{label} " + ", ".join(names.get(i, i) for i in ids))
+    for key, names, label in (("groupids", group_names, "grupos"), ("templateids", template_names, "plantillas")):
+        if key in params:
+            parts.append(f"-{label} " + ", ".join(names.get(i, i) for i in params[key]))
+    if "tags" in params:
+        parts.append("tags = " + "; ".join(f"{t['tag']}={t['value']}" for t in params["tags"]))
+    return f"{operation['method']:<16} {len(hosts):>5} hosts  {' | '.join(parts)}  ({sample})"
+
+
+if __name__ == "__main__":
+    # Uso:
+    #   python zabbix_mass.py HOST_FILTRADOS.csv --add-tag modelo=C9300 [--dry-run]
+    #   python zabbix_mass.py --query "tag.marca = cisco and groups = switch" --add-group CORE --dry-run
+    #   python zabbix_mass.py cambios.csv      (columnas por host: add_tags, remove_groups, ...)
+    import os
+    from dotenv import load_dotenv
+    from zabbix_connector import ZabbixManager
+    from zabbix_metrics import profile_from_argv
+
+    load_dotenv()
+    metrics = profile_from_argv()
+    usage = (
+        "Uso: python zabbix_mass.py [archivo.csv | --query EXPR] [--dry-run]\n"
+        "       [--add-tag k=v] [--remove-tag k[=v]] [--add-group G] [--remove-group G]\n"
+        "       [--add-template T] [--remove-template T]"
+    )
+    options = {
+        "--add-tag": "add_tags", "--remove-tag": "remove_tags",
+        "--add-group": "add_groups", "--remove-group": "remove_groups",
+        "--add-template": "add_templates", "--remove-template": "remove_templates",
+    }
+    args = sys.argv[1:]
+    defaults = {}
+    source = None
+    query = None
+    dry_run = False
+    try:
+        while args:
+            arg = args.pop(0)
+            if arg == "--dry-run":
+                dry_run = True
+            elif arg == "--query":
+                query = args.pop(0)
+            elif arg in options:
+                column = options[arg]
+                value = args.pop(0)
+                parsed = parse_tags(value, allow_bare=column == "remove_tags") if column.endswith("tags") else parse_list(value)
+                defaults.setdefault(column, []).extend(parsed)
+            elif source is None and not arg.startswith("--"):
+                source = arg
+            else:
+                raise ValueError(f"Argumento desconocido: {arg}")
+    except (IndexError, ValueError) as e:
+        print(f"❌ {e}" if str(e) else "❌ Falta el valor de una opción")
+        print(usage)
+        sys.exit(1)
+
+    if not (source or query):
+        print(usage)
+        sys.exit(1)
+
+    zb = ZabbixManager(url=f"http://{os.getenv('ZABBIX_SERVER')}/api_jsonrpc.php", token=os.getenv("ZABBIX_API"),
+                       metrics=metrics)
+    zb.connect()
+
+    if query:
+        hosts = zb.query_hosts(query)
+        specs = {host["host"]: parse_spec({}, defaults) for host in hosts}
+    else:
+        try:
+            specs = read_specs(source, defaults)
+        except (OSError, ValueError) as e:
+            print(f"❌ Error al leer {source}: {e}")
+            sys.exit(1)
+
+    plan = zb.plan_mass_changes(specs)
+    if plan is None:
+        sys.exit(1)
+    zb.apply_mass_changes(plan, dry_run=dry_run)
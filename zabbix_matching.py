@@ -0,0 +1,78 @@
+from collections import deque
+
+
+class SubstringIndex:
+    """
+    Autómata Aho-Corasick sobre un conjunto de patrones (p.ej. hostnames de
+    dispositivos). Permite responder "qué patrones aparecen dentro de cada
+    texto" recorriendo cada texto una sola vez, en lugar de comparar cada
+    patrón contra cada texto.
+    """
+
+    def __init__(self, patterns):
+        """
+        :param patterns: Iterable de cadenas a buscar (se ignoran las vacías)
+        """
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for pattern in patterns:
+            if pattern:
+                self._add(pattern)
+        self._build()
+
+    def _add(self, pattern):
+        node = 0
+        for char in pattern:
+            following = self._goto[node].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[node][char] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            node = following
+        if pattern not in self._output[node]:
+            self._output[node] = self._output[node] + (pattern,)
+
+    def _build(self):
+        # BFS: el enlace de fallo de cada nodo apunta al sufijo propio más largo del trie
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, following in self._goto[node].items():
+                queue.append(following)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[following] = self._goto[fail].get(char, 0)
+                if self._fail[following] == following:
+                    self._fail[following] = 0
+                self._output[following] = self._output[following] + self._output[self._fail[following]]
+
+    def find_in(self, text):
+        """
+        Retorna el conjunto de patrones contenidos en text.
+        """
+        found = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
+
+    def match_texts(self, texts):
+        """
+        Para cada patrón, lista los textos que lo contienen (en orden de aparición).
+
+        :return: dict {patrón: [texto, ...]} solo con los patrones encontrados
+        """
+        matches = {}
+        for text in texts:
+            for pattern in self.find_in(text):
+                matches.setdefault(pattern, []).append(text)
+        return matches
@@ -0,0 +1,263 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Límites superiores (segundos) de los buckets del histograma de latencia
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float("inf"))
+
+
+def _label_value(value):
+    """
+    Escapa un valor de etiqueta para el formato de texto de Prometheus.
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Call:
+    """
+    Datos de una llamada en curso; el código instrumentado puede completar
+    result_count, request_bytes y response_bytes antes de que termine.
+    """
+
+    def __init__(self):
+        self.result_count = None
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.error = None
+
+
+class Metrics:
+    """
+    Registro de métricas por llamada (API de Zabbix, ping, SSH...) agregadas en
+    histogramas por (tipo, método), más tiempos por fase. Exporta un resumen
+    JSON y el formato de texto de Prometheus. Es seguro entre hilos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._phases = {}
+        self._started = time.perf_counter()
+
+    def _serie(self, kind, method):
+        key = (kind, method)
+        if key not in self._series:
+            self._series[key] = {
+                "count": 0,
+                "errors": 0,
+                "sum": 0.0,
+                "max": 0.0,
+                "buckets": [0] * len(BUCKETS),
+                "request_bytes": 0,
+                "response_bytes": 0,
+                "results": 0,
+            }
+        return self._series[key]
+
+    def record(self, kind, method, latency, request_bytes=0, response_bytes=0, result_count=None, error=None):
+
+        with self._lock:
+            serie = self._serie(kind, method)
+            serie["count"] += 1
+            serie["sum"] += latency
+            serie["max"] = max(serie["max"], latency)
+            serie["request_bytes"] += request_bytes
+            serie["response_bytes"] += response_bytes
+            if result_count:
+                serie["results"] += result_count
+            if error is not None:
+                serie["errors"] += 1
+            for index, limit in enumerate(BUCKETS):
+                if latency <= limit:
+                    serie["buckets"][index] += 1
+                    break
+
+    @contextmanager
+    def track(self, kind, method):
+        """
+        Mide un bloque: with metrics.track("ssh", "huawei") as call: ...
+        Las excepciones se registran como error y se vuelven a lanzar.
+        """
+        call = _Call()
+        started = time.perf_counter()
+        try:
+            yield call
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            self.record(kind, method, time.perf_counter() - started,
+                        call.request_bytes, call.response_bytes, call.result_count, call.error)
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Acumula el tiempo de reloj de una fase (p.ej. "parse_csv", "write_report").
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._phases[name] = self._phases.get(name, 0.0) + time.perf_counter() - started
+
+    def instrument_api(self, zapi, kind="api"):
+        """
+        Envuelve send_api_request de una instancia de ZabbixAPI: cada llamada
+        zapi.objeto.método() queda registrada con su latencia, el tamaño de la
+        petición, la cantidad de resultados y los errores. Con PooledZabbixAPI
+        también se registran los bytes recibidos.
+        """
+        original = zapi.send_api_request
+        # vars(): en ZabbixAPI cualquier atributo desconocido es un objeto de la API
+        transport = vars(zapi).get("transport")
+
+        def send_api_request(method, params=None, need_auth=True):
+            with self.track(kind, method) as call:
+                call.request_bytes = len(json.dumps(params or {}, default=str))
+                response = original(method, params, need_auth)
+                if transport is not None:
+                    call.response_bytes = transport.last_response_bytes
+                result = response.get("result") if isinstance(response, dict) else None
+                if isinstance(result, list):
+                    call.result_count = len(result)
+                elif isinstance(result, dict):
+                    call.result_count = max((len(v) for v in result.values() if isinstance(v, list)), default=1)
+                return response
+
+        zapi.send_api_request = send_api_request
+        return zapi
+
+    def summary(self):
+        """
+        Resumen serializable: por serie (count, errores, latencias, bytes) y por fase.
+        """
+        with self._lock:
+            series = {}
+            for (kind, method), serie in sorted(self._series.items()):
+                series[f"{kind}:{method}"] = {
+                    "count": serie["count"],
+                    "errors": serie["errors"],
+                    "total_seconds": round(serie["sum"], 6),
+                    "avg_ms": round(serie["sum"] / serie["count"] * 1000, 3) if serie["count"] else 0.0,
+                    "p50_ms": self._quantile_ms(serie, 0.50),
+                    "p95_ms": self._quantile_ms(serie, 0.95),
+                    "max_ms": round(serie["max"] * 1000, 3),
+                    "request_bytes": serie["request_bytes"],
+                    "response_bytes": serie["response_bytes"],
+                    "results": serie["results"],
+                }
+            return {
+                "wall_seconds": round(time.perf_counter() - self._started, 6),
+                "series": series,
+                "phases": {name: round(seconds, 6) for name, seconds in self._phases.items()},
+            }
+
+    def _quantile_ms(self, serie, fraction):
+        # Estimación por bucket: límite superior del bucket que contiene el cuantil
+        target = fraction * serie["count"]
+        seen = 0
+        for limit, count in zip(BUCKETS, serie["buckets"]):
+            seen += count
+            if seen >= target and count:
+                return round(min(limit, serie["max"]) * 1000, 3)
+        return round(serie["max"] * 1000, 3)
+
+    def to_prometheus(self):
+        """
+        Texto en formato de exposición de Prometheus.
+        """
+        lines = [
+            "# HELP zabbix_call_duration_seconds Latencia de llamadas (API, ping, SSH).",
+            "# TYPE zabbix_call_duration_seconds histogram",
+        ]
+        with self._lock:
+            series = sorted(self._series.items())
+            phases = sorted(self._phases.items())
+        for (kind, method), serie in series:
+            labels = f'kind="{_label_value(kind)}",method="{_label_value(method)}"'
+            cumulative = 0
+            for limit, count in zip(BUCKETS, serie["buckets"]):
+                cumulative += count
+                le = "+Inf" if limit == float("inf") else repr(limit)
+                lines.append(f'zabbix_call_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"zabbix_call_duration_seconds_sum{{{labels}}} {serie['sum']}")
+            lines.append(f"zabbix_call_duration_seconds_count{{{labels}}} {serie['count']}")
+
+        for name, help_text, field in (
+            ("zabbix_call_errors_total", "Llamadas con error.", "errors"),
+            ("zabbix_call_request_bytes_total", "Bytes enviados en las peticiones.", "request_bytes"),
+            ("zabbix_call_response_bytes_total", "Bytes recibidos en las respuestas.", "response_bytes"),
+            ("zabbix_call_results_total", "Elementos devueltos por las llamadas.", "results"),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (kind, method), serie in series:
+                lines.append(f'{name}{{kind="{_label_value(kind)}",method="{_label_value(method)}"}} {serie[field]}')
+
+        lines.append("# HELP zabbix_phase_seconds Tiempo acumulado por fase.")
+        lines.append("# TYPE zabbix_phase_seconds gauge")
+        for name, seconds in phases:
+            lines.append(f'zabbix_phase_seconds{{phase="{_label_value(name)}"}} {seconds}')
+        return "\n".join(lines) + "\n"
+
+    def print_profile(self):
+        """
+        Desglose de tiempos: fases, tiempo en llamadas por tipo y resto.
+        """
+        summary = self.summary()
+        wall = summary["wall_seconds"] or 1e-9
+        print("\n⏱️ Perfil de ejecución:")
+        for name, seconds in sorted(summary["phases"].items(), key=lambda item: -item[1]):
+            print(f"➡️  fase {name:<24} {seconds:>9.3f}s {seconds / wall:>6.1%}")
+        by_kind = {}
+        for key, serie in summary["series"].items():
+            kind = key.split(":", 1)[0]
+            by_kind[kind] = by_kind.get(kind, 0.0) + serie["total_seconds"]
+        for key, serie in sorted(summary["series"].items(), key=lambda item: -item[1]["total_seconds"]):
+            print(
+                f"➡️  {key:<30} {serie['count']:>6} llamadas {serie['total_seconds']:>9.3f}s "
+                f"p50 {serie['p50_ms']:.1f} ms p95 {serie['p95_ms']:.1f} ms errores {serie['errors']}"
+            )
+        print(f"➡️  total {wall:.3f}s (" + ", ".join(f"{k}: {v:.3f}s" for k, v in by_kind.items()) + ")")
+
+    def export(self, json_file=None, prometheus_file=None):
+
+        try:
+            if json_file:
+                with open(json_file, mode="w", encoding="utf-8") as file:
+                    json.dump(self.summary(), file, indent=2)
+            if prometheus_file:
+                with open(prometheus_file, mode="w", encoding="utf-8") as file:
+                    file.write(self.to_prometheus())
+        except Exception as e:
+            print(f"❌ Failed to export metrics: {e}")
+
+
+def profile_from_argv(argv=None):
+    """
+    Si --profile está en los argumentos, lo quita y devuelve un Metrics que al
+    salir imprime el desglose por fase y exporta el resumen JSON y el texto de
+    Prometheus (ZABBIX_METRICS_FILE, por defecto zabbix_metrics.json / .prom).
+    Sin --profile devuelve None (sin instrumentación).
+    """
+    argv = sys.argv if argv is None else argv
+    if "--profile" not in argv:
+        return None
+    argv.remove("--profile")
+
+    metrics = Metrics()
+    json_file = os.getenv("ZABBIX_METRICS_FILE", "zabbix_metrics.json")
+    prometheus_file = os.path.splitext(json_file)[0] + ".prom"
+
+    def finish():
+        metrics.print_profile()
+        metrics.export(json_file, prometheus_file)
+        print(f"✅ Métricas guardadas en {json_file} y {prometheus_file}")
+
+    atexit.register(finish)
+    return metrics
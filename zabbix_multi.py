@@ -0,0 +1,164 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from zabbix_connector import ZabbixManager
+
+
+def servers_from_env(names=None):
+    """
+    Lista de servidores (nombre, url, token) a partir del entorno:
+
+        ZABBIX_SERVERS="CL,PE"
+        ZABBIX_SERVER_CL="zabbix-cl.ejemplo.com"   ZABBIX_API_CL="token_cl"
+        ZABBIX_SERVER_PE="zabbix-pe.ejemplo.com"   ZABBIX_API_PE="token_pe"
+
+    :param names: Nombres a usar (por defecto todos los de ZABBIX_SERVERS)
+    """
+    available = [name.strip() for name in os.getenv("ZABBIX_SERVERS", "").split(",") if name.strip()]
+    names = names or available
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"Servidores no definidos en ZABBIX_SERVERS: {', '.join(unknown)}")
+
+    servers = []
+    for name in names:
+        server = os.getenv(f"ZABBIX_SERVER_{name}")
+        if not server:
+            raise ValueError(f"Falta ZABBIX_SERVER_{name}")
+        servers.append((name, f"http://{server}/api_jsonrpc.php", os.getenv(f"ZABBIX_API_{name}")))
+    return servers
+
+
+class MultiZabbixManager:
+    """
+    Consulta varias instancias de Zabbix a la vez: un ZabbixManager por servidor,
+    cada uno en su hilo, de modo que el tiempo total es el del servidor más lento
+    y no la suma. Cada registro devuelto lleva "source" con el nombre del servidor.
+
+    Ofrece la misma interfaz de lectura que ZabbixManager (get_host_groups,
+    get_templates, get_host_interfaces, query_hosts, iter_raw_hosts), así que
+    sirve directamente para zabbix_export.export_hosts y export_zabbix_hosts_to_csv.
+
+    Uso:
+        zb = MultiZabbixManager(servers_from_env())
+        zb.connect()
+        export_hosts(zb.iter_raw_hosts(), "zabbix_hosts.csv", columns=DEFAULT_COLUMNS + ("Source",))
+    """
+
+    def __init__(self, servers, metrics=None, **kwargs):
+        """
+        :param servers: Lista de (nombre, url, token)
+        :param metrics: zabbix_metrics.Metrics compartido por todos los servidores (opcional)
+        :param kwargs: Resto de parámetros de ZabbixManager (cache_ttl, transport, timeout, ...)
+        """
+        self.managers = {name: ZabbixManager(url, token, metrics=metrics, **kwargs) for name, url, token in servers}
+        self.metrics = metrics
+
+    def _run(self, function):
+        """
+        Ejecuta function(nombre, manager) en paralelo para cada servidor.
+        :return: dict {nombre: resultado}, en el orden de los servidores
+        """
+        with ThreadPoolExecutor(max_workers=max(1, len(self.managers))) as executor:
+            futures = {name: executor.submit(function, name, zb) for name, zb in self.managers.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+    def connect(self):
+        """
+        Conecta con todos los servidores en paralelo. Los que fallan se descartan
+        con un aviso; si no queda ninguno, termina como ZabbixManager.connect.
+        """
+        def connect_one(name, zb):
+            try:
+                return zb.connect()
+            except SystemExit:  # ZabbixManager.connect llama a exit() si falla
+                return False
+
+        failed = [name for name, ok in self._run(connect_one).items() if not ok]
+        for name in failed:
+            print(f"⚠️ Servidor {name} sin conexión: se omite")
+            del self.managers[name]
+        if not self.managers:
+            print("❌ No se pudo conectar con ningún servidor de Zabbix")
+            exit()
+            return False
+        print(f"✅ Conectado a {len(self.managers)} servidores: {', '.join(self.managers)}")
+        return True
+
+    def map(self, function):
+        """
+        Ejecuta function(manager) en cada servidor a la vez y une los resultados
+        (listas de dicts), agregando "source" a cada registro.
+        """
+        merged = []
+        for name, items in self._run(lambda name, zb: function(zb)).items():
+            for item in items or []:
+                item["source"] = name
+                merged.append(item)
+        return merged
+
+    def get_host_groups(self, group_names=None):
+        return self.map(lambda zb: [dict(group) for group in zb.get_host_groups(group_names)])
+
+    def get_templates(self, template_names=None):
+        return self.map(lambda zb: [dict(template) for template in zb.get_templates(template_names)])
+
+    def get_host_interfaces(self, refresh=False):
+        return self.map(lambda zb: [dict(interface) for interface in zb.get_host_interfaces(refresh)])
+
+    def query_hosts(self, expression=None, output=None, select=None, group_ids=None):
+        return self.map(lambda zb: zb.query_hosts(expression, output, select, group_ids))
+
+    def iter_raw_hosts(self, group_ids=None, page_size=500, buffer_pages=4):
+        """
+        Hosts de todos los servidores en streaming: cada servidor pagina en su
+        hilo y los hosts se entregan en cuanto llega su página, sin esperar a
+        los demás servidores. La cola acotada (buffer_pages páginas por
+        servidor) frena a los servidores rápidos si el consumidor es lento.
+
+        Si un servidor falla a mitad de camino, el error se propaga al
+        consumidor (no se entrega un inventario parcial como si fuera completo).
+
+        :param group_ids: IDs de grupo (son propios de cada servidor; normalmente None)
+        """
+        pages = queue.Queue(maxsize=buffer_pages * max(1, len(self.managers)))
+        stop = threading.Event()
+
+        def produce(name, zb):
+            try:
+                page = []
+                for host in zb.iter_raw_hosts(group_ids, page_size):
+                    if stop.is_set():
+                        return
+                    host["source"] = name
+                    page.append(host)
+                    if len(page) >= page_size:
+                        pages.put(page)
+                        page = []
+                if page:
+                    pages.put(page)
+            except Exception as e:
+                pages.put(RuntimeError(f"Error al obtener hosts de {name}: {e}"))
+            finally:
+                pages.put(None)  # Fin de este servidor
+
+        threads = [threading.Thread(target=produce, args=(name, zb), daemon=True) for name, zb in self.managers.items()]
+        for thread in threads:
+            thread.start()
+        pending = len(threads)
+        try:
+            while pending:
+                page = pages.get()
+                if page is None:
+                    pending -= 1
+                    continue
+                if isinstance(page, Exception):
+                    raise page
+                yield from page
+        finally:
+            # Si el consumidor corta antes, se vacía la cola para liberar a los productores
+            stop.set()
+            while pending:
+                if pages.get() is None:
+                    pending -= 1
@@ -1,96 +1,429 @@
 import csv
+import json
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from ping3 import ping
 from netmiko import ConnectHandler, NetMikoTimeoutException, NetMikoAuthenticationException
+from paramiko.ssh_exception import SSHException
 import os
+from contextlib import nullcontext
 from dotenv import load_dotenv
+from zabbix_access_cache import AccessCache
+from zabbix_export import HostExporter, detect_format
+from zabbix_journal import Journal
+from zabbix_ratelimit import AdaptiveLimiter
+from zabbix_ssh_pool import SessionPool
 
 load_dotenv()
 
+# Columnas de la salida de run_commands (una fila por equipo y comando)
+COMMAND_COLUMNS = ("Hostname", "IP", "Device_Type", "Command", "Output", "Parsed", "Error", "Seconds")
+
+# Valor del tag "marca" de Zabbix → device_type de Netmiko a probar primero
+BRAND_DEVICE_TYPES = {
+    "huawei": "huawei",
+    "cisco": "cisco_ios",
+}
+
+def _ssh_transient(error):
+    """
+    Errores SSH que suelen indicar saturación del equipo o de la red (no
+    credenciales ni equipos apagados): vale la pena reintentarlos más tarde.
+    """
+    if isinstance(error, (NetMikoTimeoutException, NetMikoAuthenticationException)):
+        return False
+    if isinstance(error, (ConnectionResetError, EOFError)):
+        return True
+    return isinstance(error, SSHException) and any(
+        text in str(error).lower() for text in ("banner", "reset", "closed by remote")
+    )
+
 class NetmikoManager:
-    def __init__(self):
+    def __init__(self, access_cache_file=None, access_max_age=7 * 86400, metrics=None, ssh_limiter=None):
+        """
+        :param access_cache_file: JSON con el último device_type/credencial que
+                                  funcionó por equipo (None desactiva la caché)
+        :param access_max_age: Segundos de validez de cada entrada de la caché
+        :param metrics: zabbix_metrics.Metrics para registrar cada ping/SSH (opcional)
+        :param ssh_limiter: zabbix_ratelimit.AdaptiveLimiter para las sesiones SSH (por defecto
+                            uno configurado con SSH_MAX_CONCURRENCY, SSH_PER_DEVICE, ...)
+        """
+        self.metrics = metrics
         self.usuario_no_radius = os.getenv("USUARIO_NO_RADIUS")
         self.clave = os.getenv("CLAVE")
         self.usuario_radius = os.getenv("USUARIO_RADIUS")
         self.clave_radius = os.getenv("CLAVE_RADIUS", self.clave)  # Usa CLAVE si no hay CLAVE_RADIUS
+        self.access_cache = AccessCache(access_cache_file, max_age=access_max_age) if access_cache_file else None
+        self.ssh_limiter = ssh_limiter or AdaptiveLimiter.from_env(
+            "ssh", "SSH", initial=8, max_limit=64, tolerance=None, retries=1, backoff=2.0,
+            per_target_concurrency=int(os.getenv("SSH_PER_DEVICE", "1")),
+        )
+        # Sesiones autenticadas reutilizables: un probe seguido de run_commands no vuelve a conectar
+        self.sessions = SessionPool(self._connect, max_per_key=int(os.getenv("SSH_PER_DEVICE", "1")),
+                                    max_idle=int(os.getenv("SSH_POOL_IDLE", "32")))
+
+    def close(self):
+        """
+        Cierra las sesiones SSH que quedaron abiertas en el pool.
+        """
+        self.sessions.close()
+
+    def _credentials(self):
+        return {
+            "no_radius": (self.usuario_no_radius, self.clave),
+            "radius": (self.usuario_radius, self.clave_radius),
+        }
 
     def ping_host(self, ip, timeout=1):
         """
         Hace ping a una IP usando ping3 y devuelve True si responde, False si no.
         """
-        try:
-            result = ping(ip, timeout=timeout)
-            return result is not None and result is not False
-        except Exception:
-            return False
+        with self._track("ping", "icmp") as call:
+            try:
+                result = ping(ip, timeout=timeout)
+                ok = result is not None and result is not False
+            except Exception as e:
+                ok = False
+                if call:
+                    call.error = e
+            if call:
+                call.result_count = int(ok)
+            return ok
+
+    def _track(self, kind, method):
+        return self.metrics.track(kind, method) if self.metrics else nullcontext()
 
-    def test_ssh_connection(self, ip, username, password):
+    def tcp_port_open(self, ip, port=22, timeout=2):
+        """
+        Comprueba si un puerto TCP acepta conexiones (por defecto SSH).
+        """
+        with self._track("tcp", str(port)) as call:
+            try:
+                with socket.create_connection((ip, port), timeout=timeout):
+                    if call:
+                        call.result_count = 1
+                    return True
+            except OSError as e:
+                if call:
+                    call.error = e
+                return False
+
+    def test_ssh_connection(self, ip, username, password, timeout=10, device_types=None, deadline=None):
         """
         Intenta conectar via SSH primero con Huawei, si falla con Cisco.
         Devuelve el device_type exitoso o None.
+
+        :param timeout: Segundos máximos por intento (conexión, banner y autenticación)
+        :param deadline: Instante (time.monotonic) tras el que no se prueban más
+                         device_types; cada intento se acorta al tiempo que queda
         """
-        device_types = ['huawei', 'cisco_ios']
+        device_types = device_types or ['huawei', 'cisco_ios']
         for device_type in device_types:
+            if deadline is not None and deadline - time.monotonic() <= 0:
+                break
             try:
                 device = {
                     'device_type': device_type,
                     'host': ip,
                     'username': username,
                     'password': password,
-                    'timeout': 10,
+                    'timeout': timeout,
                 }
-                with ConnectHandler(**device):
+                if deadline is not None:
+                    device['deadline'] = deadline
+                # La sesión queda en el pool para los comandos que vengan después
+                with self.sessions.session(device):
                     return device_type  # Devolver el tipo que funcionó
             except (NetMikoTimeoutException, NetMikoAuthenticationException, Exception):
                 continue  # Intentar el siguiente
         return None
 
-    def process_hosts_from_csv(self, csv_file, output_csv="netmiko_results.csv"):
+    def _connect(self, device):
+        # El limitador acota las conexiones simultáneas (en total y por equipo)
+        # y reintenta los cortes transitorios (banner, conexión reiniciada), salvo
+        # que el reintento ya no quepa antes de device["deadline"]
+        return self.ssh_limiter.call(self._open_session, device, target=device["host"], is_transient=_ssh_transient,
+                                     deadline=device.get("deadline"))
+
+    def _open_session(self, device):
+        """
+        ConnectHandler con todas las esperas de Netmiko (conexión TCP, banner,
+        autenticación y lectura) acotadas por device["timeout"] y, si hay
+        device["deadline"], por el tiempo que queda hasta entonces.
+        """
+        device = dict(device)
+        deadline = device.pop("deadline", None)
+        timeout = device.get("timeout", 10)
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                raise NetMikoTimeoutException(f"Tiempo agotado para {device['host']}")
+        device.update(timeout=timeout, conn_timeout=timeout, auth_timeout=timeout, banner_timeout=timeout)
+        with self._track("ssh", device["device_type"]):
+            return ConnectHandler(**device)
+
+    def _device_type_order(self, cached=None, brand=None):
+        """
+        Orden de device_types a probar: el de la caché, luego la pista de la marca.
+        """
+        order = ['huawei', 'cisco_ios']
+        hints = [cached["device_type"] if cached else None, BRAND_DEVICE_TYPES.get((brand or "").strip().lower())]
+        for hint in reversed(hints):
+            if hint:
+                order = [hint] + [dt for dt in order if dt != hint]
+        return order
+
+    def probe_host(self, host, ip, deadline=None, skip_unreachable=True, brand=None):
+        """
+        Ping + SSH con ambos usuarios para un host. Devuelve la fila de resultado.
+
+        Si la caché de accesos conoce el equipo, se prueba primero su
+        credencial/device_type y, si funciona, no se prueba la otra credencial
+        (su columna queda vacía: no probada).
+
+        :param deadline: Segundos máximos para todo el host; los intentos SSH
+                         pendientes se omiten cuando se agota
+        :param skip_unreachable: Omite SSH si no responde ni ping ni TCP/22
+        :param brand: Valor del tag "marca" de Zabbix, usado como pista de device_type
+        """
+        host_deadline = None if deadline is None else time.monotonic() + deadline
+        ping_ok = False
+        ssh = {"no_radius": None, "radius": None}
+        tested = set()
+        cached = self.access_cache.get(ip, host) if self.access_cache else None
+
+        if ip:
+            ping_ok = self.ping_host(ip)
+            reachable = ping_ok or self.tcp_port_open(ip, 22)
+            if reachable or not skip_unreachable:
+                credentials = self._credentials()
+                attempts = ["no_radius", "radius"]
+                if cached and cached["credential"] == "radius":
+                    attempts.reverse()
+                device_types = self._device_type_order(cached, brand)
+
+                for attempt in attempts:
+                    if host_deadline is not None and host_deadline - time.monotonic() <= 0:
+                        break
+                    username, password = credentials[attempt]
+                    ssh[attempt] = self.test_ssh_connection(ip, username, password, timeout=10, device_types=device_types,
+                                                            deadline=host_deadline)
+                    tested.add(attempt)
+                    if ssh[attempt]:
+                        if self.access_cache:
+                            self.access_cache.record(ip, host, ssh[attempt], attempt)
+                        if cached:
+                            break  # Equipo conocido: basta con el acceso que ya funcionaba
+                        device_types = [ssh[attempt]] + [dt for dt in device_types if dt != ssh[attempt]]
+
+                # Olvidar el acceso solo si se probó y falló: no si se omitió el SSH
+                # o el plazo del host cortó los intentos antes de terminarlos
+                timed_out = host_deadline is not None and time.monotonic() >= host_deadline
+                if cached and tested and not timed_out and not any(ssh.values()):
+                    self.access_cache.forget(ip, host)
+
+        def column(attempt):
+            if ip and attempt not in tested and any(ssh.values()):
+                return ""  # No probada
+            return ssh[attempt] is not None
+
+        return {
+            "Hostname": host,
+            "IP": ip,
+            "Ping_OK": ping_ok,
+            "SSH": any(ssh.values()),
+            "NO_RADIUS": column("no_radius"),
+            "RADIUS": column("radius"),
+            "Device_Type": ssh["no_radius"] or ssh["radius"]  # Tomar el primero que funcionó
+        }
+
+    def process_hosts_from_csv(self, csv_file, output_csv="netmiko_results.csv", workers=1, host_deadline=None,
+                               skip_unreachable=True, journal_file=None, resume=False):
         """
         Procesa hosts de csv_file: ping y SSH con ambos usuarios, guarda en output_csv.
+        Cada resultado se registra en un diario (fsync por lotes) en cuanto está listo
+        y output_csv se reconstruye desde el diario, en el orden del CSV, al terminar
+        o al interrumpir el barrido.
+
+        :param workers: Hosts probados en paralelo (1 = secuencial, en el orden del CSV)
+        :param host_deadline: Segundos máximos por host (None = sin límite)
+        :param skip_unreachable: Omite SSH si no responde ni ping ni TCP/22
+        :param journal_file: Diario del barrido (por defecto output_csv + ".journal")
+        :param resume: Si True, salta los hosts que ya figuran en el diario
         """
+        journal = None
+        rows = []
         try:
-            results = []
             with open(csv_file, mode='r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    ip = row.get('IP', '').strip()
-                    host = row.get('Host', '').strip()
-                    if ip:
-                        ping_ok = self.ping_host(ip)
-                        ssh_no_radius = self.test_ssh_connection(ip, self.usuario_no_radius, self.clave)
-                        ssh_radius = self.test_ssh_connection(ip, self.usuario_radius, self.clave_radius)
-                        ssh_ok = ssh_no_radius is not None or ssh_radius is not None
-                        device_type = ssh_no_radius if ssh_no_radius else ssh_radius  # Tomar el primero que funcionó
-                    else:
-                        ping_ok = False
-                        ssh_ok = False
-                        ssh_no_radius = None
-                        ssh_radius = None
-                        device_type = None
-
-                    results.append({
-                        "Hostname": host,
-                        "IP": ip,
-                        "Ping_OK": ping_ok,
-                        "SSH": ssh_ok,
-                        "NO_RADIUS": ssh_no_radius is not None,
-                        "RADIUS": ssh_radius is not None,
-                        "Device_Type": device_type
-                    })
-
-            # Guardar en CSV
-            with open(output_csv, mode='w', newline='', encoding='utf-8') as file:
-                writer = csv.DictWriter(file, fieldnames=["Hostname", "IP", "Ping_OK", "SSH", "NO_RADIUS", "RADIUS", "Device_Type"])
-                writer.writeheader()
-                writer.writerows(results)
+                rows = [
+                    (f"{line}:{row.get('Host', '').strip()}:{row.get('IP', '').strip()}",
+                     row.get('Host', '').strip(), row.get('IP', '').strip(), self._brand_from_tags(row.get('Tags', '')))
+                    for line, row in enumerate(csv.DictReader(file), start=2)
+                ]
+
+            journal = Journal(journal_file or output_csv + ".journal", resume=resume, sync_every=max(20, workers))
+            pending = [row for row in rows if row[0] not in journal]
+            if resume and len(pending) < len(rows):
+                print(f"⏩ Reanudando: {len(rows) - len(pending)} hosts ya procesados, {len(pending)} pendientes")
+
+            if workers <= 1:
+                for key, host, ip, brand in pending:
+                    journal.record(key, self.probe_host(host, ip, host_deadline, skip_unreachable, brand))
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = {
+                        executor.submit(self.probe_host, host, ip, host_deadline, skip_unreachable, brand): key
+                        for key, host, ip, brand in pending
+                    }
+                    try:
+                        for done, future in enumerate(as_completed(futures), start=1):
+                            journal.record(futures[future], future.result())
+                            if done % 50 == 0:
+                                print(f"🔄 {done}/{len(pending)} hosts procesados")
+                    except BaseException:
+                        # Ctrl-C: no esperar a los hosts que aún no empezaron
+                        for future in futures:
+                            future.cancel()
+                        raise
 
         except FileNotFoundError:
             print(f"❌ Error: Archivo {csv_file} no encontrado.")
+        except KeyboardInterrupt:
+            print("⚠️ Barrido interrumpido: el progreso queda en el diario (reanudar con --resume)")
         except Exception as e:
             print(f"❌ Error al procesar {csv_file}: {e}")
+        finally:
+            if journal:
+                journal.close()
+                self._write_results(rows, journal, output_csv)
+            if self.access_cache:
+                self.access_cache.save()
+
+    def run_commands(self, hosts, commands, output_file="netmiko_commands.jsonl", workers=8, use_textfsm=False,
+                     read_timeout=30):
+        """
+        Ejecuta commands en cada equipo, en paralelo, y escribe las salidas en
+        output_file (JSON Lines o CSV según la extensión, con .gz opcional) a
+        medida que termina cada equipo.
+
+        Solo se conecta con el device_type y la credencial que la caché de accesos
+        guardó en el último probe; los equipos sin acceso conocido se informan
+        con error, nunca se prueban device_types a ciegas. Las sesiones salen del
+        pool, así que un probe previo en el mismo proceso no se repite.
+
+        :param hosts: Iterable de (hostname, ip)
+        :param commands: Lista de comandos, p.ej. ["show version", "show inventory"]
+        :param workers: Equipos en paralelo
+        :param use_textfsm: Parsear las salidas con TextFSM (ntc-templates) → columna Parsed
+        :param read_timeout: Segundos máximos por comando
+        :return: Cantidad de equipos con todos los comandos ejecutados, o None si hubo error
+        """
+        hosts = list(hosts)
+        fmt, _ = detect_format(output_file)
+
+        def row_builder(row):
+            if fmt == "csv" and row["Parsed"] is not None:
+                return dict(row, Parsed=json.dumps(row["Parsed"], ensure_ascii=False))
+            return row
+
+        completed = 0
+        try:
+            with HostExporter(output_file, columns=COMMAND_COLUMNS, row_builder=row_builder,
+                              available_columns=COMMAND_COLUMNS) as exporter, \
+                    ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                futures = [
+                    executor.submit(self._run_on_host, host, ip, commands, use_textfsm, read_timeout)
+                    for host, ip in hosts
+                ]
+                try:
+                    for done, future in enumerate(as_completed(futures), start=1):
+                        rows = future.result()
+                        exporter.write_all(rows)
+                        completed += not any(row["Error"] for row in rows)
+                        if done % 50 == 0:
+                            print(f"🔄 {done}/{len(hosts)} equipos procesados")
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+            print(f"✅ Salidas guardadas en {output_file} ({completed}/{len(hosts)} equipos sin errores)")
+            return completed
+        except KeyboardInterrupt:
+            print(f"⚠️ Ejecución interrumpida: {output_file} tiene las salidas de los equipos terminados")
+            return None
+        except Exception as e:
+            print(f"❌ Error al ejecutar comandos: {e}")
+            return None
+
+    def _run_on_host(self, host, ip, commands, use_textfsm=False, read_timeout=30):
+        """
+        Ejecuta los comandos en un equipo por una sesión del pool. Devuelve una fila por comando.
+        """
+        cached = self.access_cache.get(ip, host) if self.access_cache else None
+        base = {"Hostname": host, "IP": ip, "Device_Type": cached["device_type"] if cached else None}
+        rows = []
+
+        def failed(error):
+            return [dict(base, Command=command, Output="", Parsed=None, Error=error, Seconds=None)
+                    for command in commands[len(rows):]]
+
+        if not cached:
+            return failed("sin acceso conocido (ejecutar probe primero)")
+        username, password = self._credentials()[cached["credential"]]
+        device = {
+            'device_type': cached["device_type"],
+            'host': ip,
+            'username': username,
+            'password': password,
+            'timeout': 10,
+        }
+        try:
+            with self.sessions.session(device) as connection:
+                for index, command in enumerate(commands):
+                    started = time.monotonic()
+                    # Etiqueta acotada (posición + primera palabra), no el comando completo
+                    with self._track("ssh_cmd", f"{index}:{(command.split() or [''])[0].lower()}"):
+                        output = connection.send_command(command, read_timeout=read_timeout, use_textfsm=use_textfsm)
+                    parsed = None if isinstance(output, str) else output  # TextFSM devuelve listas de dicts
+                    rows.append(dict(base, Command=command, Output=output if parsed is None else "", Parsed=parsed,
+                                     Error="", Seconds=round(time.monotonic() - started, 3)))
+        except Exception as e:
+            # La sesión se descarta; los comandos que faltaban quedan con el error
+            return rows + failed(f"{type(e).__name__}: {e}")
+        return rows
+
+    def _write_results(self, rows, journal, output_csv):
+        """
+        Reconstruye output_csv desde el diario, en el orden del CSV de entrada.
+        """
+        try:
+            with open(output_csv, mode='w', newline='', encoding='utf-8') as file:
+                writer = csv.DictWriter(file, fieldnames=["Hostname", "IP", "Ping_OK", "SSH", "NO_RADIUS", "RADIUS", "Device_Type"])
+                writer.writeheader()
+                written = 0
+                for key, *_ in rows:
+                    result = journal.get(key)
+                    if result is not None:
+                        writer.writerow(result)
+                        written += 1
+            print(f"✅ Resultados guardados en {output_csv} ({written}/{len(rows)} hosts)")
+        except Exception as e:
+            print(f"❌ Error al guardar {output_csv}: {e}")
+
+    def _brand_from_tags(self, tags):
+        """
+        Extrae la marca de la columna Tags exportada ("marca:cisco, modelo:...").
+        """
+        for pair in (tags or "").split(","):
+            tag, _, value = pair.strip().partition(":")
+            if tag == "marca":
+                return value
+        return None
 
 if __name__ == "__main__":
-    manager = NetmikoManager()
-    csv_file = "HOST_FILTRADOS.csv"
-    output_csv = "netmiko_results.csv"
-    manager.process_hosts_from_csv(csv_file, output_csv)
\ No newline at end of file
+    # Equivale a: python zabbix_cli.py probe [--resume]
+    from zabbix_cli import main
+
+    sys.exit(main(["probe"] + sys.argv[1:]))
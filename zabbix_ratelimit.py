@@ -0,0 +1,252 @@
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# Métodos de la API que se pueden reintentar sin riesgo (solo lectura)
+READ_ONLY_METHODS = ("apiinfo.version",)
+
+
+class TokenBucket:
+    """
+    Límite de tasa: rate operaciones por segundo con ráfagas de hasta burst.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Bloquea hasta que haya un token disponible.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveLimiter:
+    """
+    Control de concurrencia AIMD compartido entre hilos.
+
+    El límite de operaciones simultáneas sube de a poco (+1 por cada "ventana"
+    de llamadas exitosas) y se reduce a la mitad ante errores transitorios o
+    cuando la latencia supera tolerance veces la latencia base observada
+    (o latency_target, si se indica). Opcionalmente limita la tasa global y,
+    por destino (un servidor, un equipo), la tasa y las sesiones simultáneas.
+    Los errores transitorios se reintentan con backoff exponencial y jitter.
+    """
+
+    def __init__(self, name, initial=4, min_limit=1, max_limit=32, latency_target=None, tolerance=3.0,
+                 rate=None, burst=None, per_target_rate=None, per_target_concurrency=None,
+                 retries=3, backoff=0.5, max_backoff=10.0, cooldown=1.0):
+        """
+        :param name: Nombre del limitador (para mensajes)
+        :param initial: Concurrencia inicial
+        :param min_limit: Concurrencia mínima
+        :param max_limit: Concurrencia máxima
+        :param latency_target: Latencia (s) a partir de la cual se reduce la concurrencia
+                               (None = tolerance × latencia base observada)
+        :param tolerance: Múltiplo de la latencia base considerado congestión
+                          (None = la latencia no reduce el límite, solo los errores)
+        :param rate: Operaciones por segundo en total (None = sin límite)
+        :param per_target_rate: Operaciones por segundo por destino (None = sin límite)
+        :param per_target_concurrency: Operaciones simultáneas por destino (None = sin límite)
+        :param retries: Reintentos ante errores transitorios
+        :param backoff: Espera base (s) del primer reintento; se duplica en cada uno
+        :param cooldown: Segundos mínimos entre dos reducciones del límite
+        """
+        self.name = name
+        self.limit = float(max(min_limit, min(initial, max_limit)))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.tolerance = tolerance
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.per_target_rate = per_target_rate
+        self.per_target_concurrency = per_target_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cooldown = cooldown
+
+        self.in_flight = 0
+        self.baseline = None
+        self.decreases = 0
+        self.retried = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+        self._targets = {}
+
+    @classmethod
+    def from_env(cls, name, prefix, **defaults):
+        """
+        Crea un limitador con valores de entorno: <prefix>_MAX_CONCURRENCY, <prefix>_RATE_LIMIT,
+        <prefix>_LATENCY_TARGET y <prefix>_RETRIES (p.ej. ZABBIX_MAX_CONCURRENCY=16).
+        """
+        if os.getenv(f"{prefix}_LATENCY_TARGET"):
+            defaults["latency_target"] = float(os.getenv(f"{prefix}_LATENCY_TARGET"))
+        if os.getenv(f"{prefix}_MAX_CONCURRENCY"):
+            defaults["max_limit"] = int(os.getenv(f"{prefix}_MAX_CONCURRENCY"))
+        if os.getenv(f"{prefix}_RATE_LIMIT"):
+            defaults["rate"] = float(os.getenv(f"{prefix}_RATE_LIMIT")) or None
+        if os.getenv(f"{prefix}_RETRIES"):
+            defaults["retries"] = int(os.getenv(f"{prefix}_RETRIES"))
+        return cls(name, **defaults)
+
+    def _target(self, target):
+        with self._condition:
+            if target not in self._targets:
+                self._targets[target] = (
+                    TokenBucket(self.per_target_rate) if self.per_target_rate else None,
+                    threading.BoundedSemaphore(self.per_target_concurrency) if self.per_target_concurrency else None,
+                )
+            return self._targets[target]
+
+    @contextmanager
+    def slot(self, target=None):
+        """
+        Reserva un lugar (y un token) para una operación sobre target.
+        El llamador informa el resultado con feedback().
+        """
+        bucket, semaphore = self._target(target) if target is not None else (None, None)
+        if semaphore:
+            semaphore.acquire()
+        try:
+            with self._condition:
+                while self.in_flight >= int(self.limit):
+                    self._condition.wait()
+                self.in_flight += 1
+            try:
+                if self.bucket:
+                    self.bucket.acquire()
+                if bucket:
+                    bucket.acquire()
+                yield
+            finally:
+                with self._condition:
+                    self.in_flight -= 1
+                    self._condition.notify()
+        finally:
+            if semaphore:
+                semaphore.release()
+
+    def feedback(self, latency=None, overloaded=False):
+        """
+        Ajusta el límite: overloaded (error transitorio) o latencia alta → reducción
+        multiplicativa; éxito con latencia normal → aumento aditivo.
+        """
+        with self._condition:
+            if latency is not None and not overloaded:
+                if self.baseline is None or latency < self.baseline:
+                    self.baseline = latency
+                else:
+                    # La base se adapta lentamente hacia arriba (p.ej. si cambia la red)
+                    self.baseline += (latency - self.baseline) * 0.01
+                threshold = self.latency_target or (self.tolerance * self.baseline if self.tolerance else None)
+                overloaded = threshold is not None and latency > threshold and self.in_flight > 1
+
+            now = time.monotonic()
+            if overloaded:
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.min_limit, self.limit / 2)
+                    self._last_decrease = now
+                    self.decreases += 1
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                self._condition.notify_all()
+
+    def call(self, fn, *args, target=None, retry=True, is_transient=None, deadline=None, **kwargs):
+        """
+        Ejecuta fn(*args, **kwargs) respetando los límites. Los errores para los que
+        is_transient(error) es True reducen la concurrencia y, si retry, se reintentan
+        con backoff exponencial y jitter; el resto se propaga sin tocar el límite.
+
+        :param deadline: Instante (time.monotonic) tras el que ya no se reintenta
+        """
+        attempt = 0
+        while True:
+            with self.slot(target):
+                started = time.monotonic()
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as e:
+                    transient = bool(is_transient and is_transient(e))
+                    if transient:
+                        self.feedback(overloaded=True)
+                    delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                    if not (transient and retry and attempt < self.retries):
+                        raise
+                    if deadline is not None and time.monotonic() + delay >= deadline:
+                        raise
+                else:
+                    self.feedback(time.monotonic() - started)
+                    return result
+            # Backoff "full jitter" fuera del slot, para no bloquear a otros hilos
+            time.sleep(delay)
+            attempt += 1
+            with self._condition:
+                self.retried += 1
+
+    def stats(self):
+        with self._condition:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "baseline_ms": round(self.baseline * 1000, 3) if self.baseline is not None else None,
+                "decreases": self.decreases,
+                "retries": self.retried,
+            }
+
+    def limit_api(self, zapi, target=None):
+        """
+        Envuelve send_api_request de una instancia de ZabbixAPI (como
+        Metrics.instrument_api): toda llamada pasa por el limitador y las de
+        solo lectura (*.get, apiinfo.version) se reintentan ante errores
+        transitorios. Las escrituras nunca se reintentan: un timeout no
+        garantiza que el servidor no la haya aplicado.
+        """
+        original = zapi.send_api_request
+
+        def send_api_request(method, params=None, need_auth=True):
+            retry = method.endswith(".get") or method in READ_ONLY_METHODS
+            return self.call(original, method, params, need_auth, target=target, retry=retry,
+                             is_transient=is_transient_api_error)
+
+        zapi.send_api_request = send_api_request
+        return zapi
+
+
+def is_transient_api_error(error):
+    """
+    True para errores de conexión, timeouts, HTTP 429 y 5xx; False para errores
+    de la API (APIRequestError), respuestas inválidas y HTTP 4xx.
+    """
+    # Import diferido: zabbix_utils carga aiohttp/asyncio y el sondeo SSH no lo necesita
+    from zabbix_utils.exceptions import ProcessingError
+
+    if isinstance(error, ProcessingError):
+        # ProcessingError une sus argumentos en un solo mensaje; el HTTPError de urllib
+        # queda en __context__ ("raise ... from None") y su código también en el texto
+        message = str(error)
+        cause = error.__cause__ or error.__context__
+        code = getattr(cause, "code", None)
+        if not isinstance(code, int):
+            match = re.search(r"HTTP error (\d{3})", message, re.IGNORECASE)
+            code = int(match.group(1)) if match else None
+        if isinstance(code, int):
+            return code == 429 or code >= 500
+        return message.startswith("Unable to connect")
+    return isinstance(error, (OSError, TimeoutError))
@@ -0,0 +1,140 @@
+import csv
+import json
+import re
+import sys
+
+STATUSES = ("matched", "missing", "renamed", "conflicting")
+
+
+def normalize_hostname(name):
+    """
+    Normaliza un hostname para compararlo: mayúsculas y espacios/guiones bajos como '-'.
+    """
+    return re.sub(r"[\s_]+", "-", (name or "").strip().upper())
+
+
+def normalize_mac(mac):
+    return re.sub(r"[^0-9A-F]", "", (mac or "").upper())
+
+
+def _mac_from_tags(tags):
+    """
+    Extrae el tag mac de la columna Tags exportada ("marca:cisco, mac:00:1A:...").
+    """
+    for pair in (tags or "").split(","):
+        tag, _, value = pair.strip().partition(":")
+        if tag == "mac":
+            return value
+    return None
+
+
+class ZabbixIndex:
+    """
+    Índices hash por IP, hostname normalizado y MAC sobre el CSV exportado de Zabbix.
+    """
+
+    def __init__(self, rows):
+        self.by_ip = {}
+        self.by_name = {}
+        self.by_mac = {}
+        for row in rows:
+            host = {
+                "host": (row.get("Host") or "").strip(),
+                "ip": (row.get("IP") or "").strip(),
+                "mac": normalize_mac(_mac_from_tags(row.get("Tags"))),
+                "source": (row.get("Source") or "").strip(),
+            }
+            if host["ip"]:
+                self.by_ip.setdefault(host["ip"], []).append(host)
+            if host["host"]:
+                self.by_name.setdefault(normalize_hostname(host["host"]), host)
+            if host["mac"]:
+                self.by_mac.setdefault(host["mac"], host)
+
+    def __len__(self):
+        return len(self.by_name)
+
+    def classify(self, name, ip=None, mac=None):
+        """
+        Clasifica un dispositivo:
+            matched      el hostname existe en Zabbix (y su IP no la usa otro host)
+            conflicting  el hostname existe, pero su IP pertenece a otro host de Zabbix
+            renamed      el hostname no existe, pero su IP (o MAC) sí, con otro nombre
+            missing      no hay coincidencia por hostname, IP ni MAC
+
+        :return: (status, match_key, host de Zabbix o None)
+        """
+        by_name = self.by_name.get(normalize_hostname(name)) if name else None
+        by_ip = self.by_ip.get(ip, []) if ip else []
+
+        if by_name:
+            if by_ip and by_name not in by_ip:
+                return "conflicting", "ip", by_ip[0]
+            return "matched", "hostname", by_name
+        if by_ip:
+            return "renamed", "ip", by_ip[0]
+        by_mac = self.by_mac.get(normalize_mac(mac)) if mac else None
+        if by_mac:
+            return "renamed", "mac", by_mac
+        return "missing", None, None
+
+
+def reconcile(device_rows, index):
+    """
+    Recorre los dispositivos una sola vez y entrega un registro de diff por fila.
+    """
+    for row in device_rows:
+        name = (row.get("Hostname") or row.get("Host") or "").strip()
+        ip = (row.get("IP") or "").strip()
+        mac = (row.get("MAC") or row.get("mac") or "").strip()
+        if not name and not ip:
+            continue
+
+        status, match_key, zabbix_host = index.classify(name, ip, mac)
+        record = {
+            "device": name,
+            "ip": ip,
+            "status": status,
+            "match_key": match_key,
+            "zabbix_host": zabbix_host["host"] if zabbix_host else None,
+            "zabbix_ip": zabbix_host["ip"] if zabbix_host else None,
+        }
+        if zabbix_host and zabbix_host["source"]:
+            record["zabbix_source"] = zabbix_host["source"]  # Exportación de varios servidores
+        yield record
+
+
+def reconcile_csv(devices_csv, zabbix_csv, output="reconciliation.jsonl"):
+    """
+    Concilia el CSV de dispositivos con el CSV exportado de Zabbix y escribe
+    el diff en JSON Lines (un objeto por dispositivo).
+
+    :return: dict con el total por status, o None si hubo error
+    """
+    try:
+        with open(zabbix_csv, mode='r', encoding='utf-8') as file:
+            index = ZabbixIndex(csv.DictReader(file))
+
+        counts = dict.fromkeys(STATUSES, 0)
+        with open(devices_csv, mode='r', encoding='utf-8') as devices, \
+                open(output, mode='w', encoding='utf-8') as out:
+            for record in reconcile(csv.DictReader(devices), index):
+                counts[record["status"]] += 1
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        print(f"✅ Conciliación guardada en {output}: " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+        return counts
+    except FileNotFoundError as e:
+        print(f"❌ Error: Archivo {e.filename} no encontrado.")
+        return None
+    except Exception as e:
+        print(f"❌ Error al conciliar inventario: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    devices_csv = sys.argv[1] if len(sys.argv) > 1 else "host.csv"
+    zabbix_csv = sys.argv[2] if len(sys.argv) > 2 else "zabbix_hosts.csv"
+    output = sys.argv[3] if len(sys.argv) > 3 else "reconciliation.jsonl"
+
+    reconcile_csv(devices_csv, zabbix_csv, output)
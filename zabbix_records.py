@@ -0,0 +1,78 @@
+import sys
+from collections.abc import Mapping
+
+
+class GroupTable:
+    """
+    Tabla compartida nombre de grupo ↔ id entero pequeño.
+    Los registros guardan solo los ids; cada nombre existe una única vez.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self.names = []
+
+    def id_for(self, name):
+        group_id = self._ids.get(name)
+        if group_id is None:
+            group_id = len(self.names)
+            name = sys.intern(name)
+            self._ids[name] = group_id
+            self.names.append(name)
+        return group_id
+
+    def ids_for(self, names):
+        return tuple(sorted({self.id_for(name) for name in names}))
+
+    def __len__(self):
+        return len(self.names)
+
+
+class HostRecord(Mapping):
+    """
+    Host procesado compacto: atributos en __slots__, grupos como ids de una
+    GroupTable compartida y el valor del tag internado.
+
+    Se comporta como el dict que devolvía get_processed_hosts:
+    record["hostname"], record.get("tags"), dict(record), record == {...}.
+    """
+
+    __slots__ = ("hostid", "hostname", "name", "ip", "group_ids", "tags", "_table")
+
+    _KEYS = ("hostid", "hostname", "name", "ip", "groups", "tags")
+
+    def __init__(self, hostid, hostname, name, ip, group_ids, tags, table):
+        self.hostid = hostid
+        self.hostname = hostname
+        # El nombre visible suele ser igual al técnico: se comparte el mismo string
+        self.name = hostname if name == hostname else name
+        self.ip = ip
+        self.group_ids = group_ids
+        self.tags = tags
+        self._table = table
+
+    @property
+    def groups(self):
+        """
+        Nombres de los grupos (frozenset construido a partir de los ids).
+        """
+        names = self._table.names
+        return frozenset(names[group_id] for group_id in self.group_ids)
+
+    def __getitem__(self, key):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+    def __repr__(self):
+        return f"HostRecord({dict(self)!r})"
+
+
+def intern_value(value):
+    return sys.intern(value) if isinstance(value, str) else value
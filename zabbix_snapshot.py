@@ -0,0 +1,312 @@
+from dotenv import load_dotenv
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from zabbix_connector import ZabbixManager
+
+load_dotenv()
+
+ZP_KEY = os.getenv("ZABBIX_API")
+ZB_SERVER = os.getenv("ZABBIX_SERVER")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hosts (
+    hostid INTEGER PRIMARY KEY,
+    host TEXT NOT NULL,
+    name TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS interfaces (
+    hostid INTEGER NOT NULL,
+    interfaceid TEXT,
+    ip TEXT
+);
+CREATE TABLE IF NOT EXISTS host_groups (
+    hostid INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    hostid INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_hosts_host ON hosts(host);
+CREATE INDEX IF NOT EXISTS idx_interfaces_hostid ON interfaces(hostid);
+CREATE INDEX IF NOT EXISTS idx_interfaces_ip ON interfaces(ip);
+CREATE INDEX IF NOT EXISTS idx_host_groups_hostid ON host_groups(hostid);
+CREATE INDEX IF NOT EXISTS idx_host_groups_name ON host_groups(name);
+CREATE INDEX IF NOT EXISTS idx_tags_hostid ON tags(hostid);
+CREATE INDEX IF NOT EXISTS idx_tags_tag ON tags(tag, value);
+"""
+
+
+class HostSnapshot:
+    """
+    Copia local (SQLite) de hosts, interfaces, grupos y tags de Zabbix.
+
+    refresh() lista de forma liviana nombre, IPs y pertenencia a grupos de todos
+    los hosts (sin tags ni subobjetos completos) y solo descarga el detalle de los
+    hosts nuevos, de los que cambiaron (nombre, IP o grupo), de los `verify` con
+    el sync más antiguo (rotación que detecta cambios de tags) y de los que superan
+    stale_after; los hosts borrados en Zabbix se eliminan.
+    Expone iter_raw_hosts() con el mismo formato que ZabbixManager, así que
+    los scripts existentes pueden usar el snapshot en lugar de la API.
+    """
+
+    def __init__(self, path="zabbix_snapshot.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def refresh(self, zb, full=False, stale_after=86400, page_size=500, verify=None):
+        """
+        Sincroniza el snapshot con Zabbix.
+
+        :param zb: ZabbixManager conectado
+        :param full: Si True, vuelve a descargar el detalle de todos los hosts
+        :param stale_after: Segundos tras los que un host se vuelve a descargar
+                            aunque su fingerprint no haya cambiado (None para nunca)
+        :param page_size: Hosts por petición host.get de detalle
+        :param verify: Hosts sin cambios visibles (los de sync más antiguo) que se vuelven
+                       a descargar en cada refresh para detectar cambios de tags
+                       (por defecto page_size: una petición más)
+        :return: dict con los contadores added/updated/unchanged/removed, o None si falla
+                 (en ese caso el snapshot queda como estaba)
+        """
+        started = time.time()
+        verify = page_size if verify is None else verify
+        print("🔄 Actualizando snapshot local de hosts...")
+        try:
+            # Listado liviano: ids, nombres, IPs y pertenencia a grupos (sin tags)
+            listing = zb.zapi.host.get(output=["hostid", "host", "name"])
+            ips = {}
+            for interface in zb.zapi.hostinterface.get(output=["hostid", "ip"]):
+                ips.setdefault(int(interface["hostid"]), []).append(interface["ip"])
+            groups = {}
+            for group in zb.zapi.hostgroup.get(output=["name"], selectHosts=["hostid"]):
+                for member in group.get("hosts", []):
+                    groups.setdefault(int(member["hostid"]), []).append(group["name"])
+        except Exception as e:
+            print(f"❌ Failed to list hosts: {e}")
+            return None
+
+        local = {
+            row[0]: (row[1], row[2], row[3])
+            for row in self.conn.execute("SELECT hostid, host, name, synced_at FROM hosts")
+        }
+        local_ips = {}
+        for hostid, ip in self.conn.execute("SELECT hostid, ip FROM interfaces"):
+            local_ips.setdefault(hostid, []).append(ip)
+        local_groups = {}
+        for hostid, name in self.conn.execute("SELECT hostid, name FROM host_groups"):
+            local_groups.setdefault(hostid, []).append(name)
+
+        remote_ids = set()
+        to_fetch = []
+        unchanged = []
+        for host in listing:
+            hostid = int(host["hostid"])
+            remote_ids.add(hostid)
+            known = local.get(hostid)
+            if (
+                full
+                or known is None
+                or known[:2] != (host["host"], host["name"])
+                or sorted(ips.get(hostid, [])) != sorted(local_ips.get(hostid, []))
+                or sorted(groups.get(hostid, [])) != sorted(local_groups.get(hostid, []))
+                or (stale_after is not None and started - known[2] > stale_after)
+            ):
+                to_fetch.append(hostid)
+            else:
+                unchanged.append((known[2], hostid))
+        # Rotación: los tags no están en el listado, se verifican los de sync más antiguo
+        to_fetch.extend(hostid for _, hostid in sorted(unchanged)[:verify])
+
+        removed = [hostid for hostid in local if hostid not in remote_ids]
+        stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": len(removed)}
+
+        try:
+            # Una sola transacción: si falla una página, se deshace todo el refresh
+            with self.conn:
+                for hostid in removed:
+                    self._delete_host(hostid)
+
+                for start in range(0, len(to_fetch), page_size):
+                    page = [str(hostid) for hostid in to_fetch[start:start + page_size]]
+                    hosts = zb.zapi.host.get(
+                        output=["hostid", "host", "name"],
+                        hostids=page,
+                        selectInterfaces=["interfaceid", "ip"],
+                        selectGroups=["name"],
+                        selectTags=["tag", "value"],
+                    )
+                    for host in hosts:
+                        stats[self._store_host(host, started)] += 1
+
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta(key, value) VALUES ('last_sync', ?)", (str(started),)
+                )
+        except Exception as e:
+            print(f"❌ Failed to fetch host details: {e}")
+            return None
+
+        elapsed = time.time() - started
+        print(
+            f"✅ Snapshot actualizado en {elapsed:.1f}s: {stats['added']} nuevos, "
+            f"{stats['updated']} modificados, {stats['unchanged']} sin cambios, "
+            f"{stats['removed']} eliminados"
+        )
+        return stats
+
+    def _fingerprint(self, host):
+
+        data = [
+            host["host"],
+            host["name"],
+            sorted(i.get("ip", "") for i in host.get("interfaces", [])),
+            sorted(g["name"] for g in host.get("groups", [])),
+            sorted((t["tag"], t.get("value", "")) for t in host.get("tags", [])),
+        ]
+        return hashlib.sha1(json.dumps(data).encode("utf-8")).hexdigest()
+
+    def _store_host(self, host, synced_at):
+        """
+        Guarda un host si su fingerprint cambió. Retorna added/updated/unchanged.
+        """
+        hostid = int(host["hostid"])
+        fingerprint = self._fingerprint(host)
+        row = self.conn.execute("SELECT fingerprint FROM hosts WHERE hostid = ?", (hostid,)).fetchone()
+
+        if row and row[0] == fingerprint:
+            self.conn.execute("UPDATE hosts SET synced_at = ? WHERE hostid = ?", (synced_at, hostid))
+            return "unchanged"
+
+        self._delete_host(hostid)
+        self.conn.execute(
+            "INSERT INTO hosts(hostid, host, name, fingerprint, synced_at) VALUES (?, ?, ?, ?, ?)",
+            (hostid, host["host"], host["name"], fingerprint, synced_at),
+        )
+        self.conn.executemany(
+            "INSERT INTO interfaces(hostid, interfaceid, ip) VALUES (?, ?, ?)",
+            [(hostid, i.get("interfaceid"), i.get("ip")) for i in host.get("interfaces", [])],
+        )
+        self.conn.executemany(
+            "INSERT INTO host_groups(hostid, name) VALUES (?, ?)",
+            [(hostid, g["name"]) for g in host.get("groups", [])],
+        )
+        self.conn.executemany(
+            "INSERT INTO tags(hostid, tag, value) VALUES (?, ?, ?)",
+            [(hostid, t["tag"], t.get("value", "")) for t in host.get("tags", [])],
+        )
+        return "updated" if row else "added"
+
+    def _delete_host(self, hostid):
+
+        for table in ("hosts", "interfaces", "host_groups", "tags"):
+            self.conn.execute(f"DELETE FROM {table} WHERE hostid = ?", (hostid,))
+
+    def last_sync(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'last_sync'").fetchone()
+        return float(row[0]) if row else None
+
+    def iter_raw_hosts(self, group_ids=None, page_size=500):
+        """
+        Entrega los hosts del snapshot con el formato de ZabbixManager.get_raw_hosts.
+        group_ids se ignora: el snapshot guarda nombres de grupo (ver query_hosts).
+        """
+        yield from self.query_hosts(page_size=page_size)
+
+    def query_hosts(self, ip=None, group_name=None, tag=None, tag_value=None, page_size=500):
+        """
+        Consulta el snapshot usando los índices locales.
+
+        :param ip: IP exacta de alguna interfaz
+        :param group_name: Nombre exacto de grupo
+        :param tag: Nombre de tag (opcionalmente con tag_value)
+        """
+        sql = "SELECT hostid, host, name FROM hosts WHERE 1 = 1"
+        args = []
+        if ip:
+            sql += " AND hostid IN (SELECT hostid FROM interfaces WHERE ip = ?)"
+            args.append(ip)
+        if group_name:
+            sql += " AND hostid IN (SELECT hostid FROM host_groups WHERE name = ?)"
+            args.append(group_name)
+        if tag:
+            if tag_value is None:
+                sql += " AND hostid IN (SELECT hostid FROM tags WHERE tag = ?)"
+                args.append(tag)
+            else:
+                sql += " AND hostid IN (SELECT hostid FROM tags WHERE tag = ? AND value = ?)"
+                args.extend([tag, tag_value])
+        sql += " ORDER BY hostid"
+
+        cursor = self.conn.execute(sql, args)
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if not rows:
+                return
+            yield from self._hydrate(rows)
+
+    def _hydrate(self, rows):
+        """
+        Completa un bloque de hosts con sus interfaces, grupos y tags.
+        """
+        hosts = {
+            hostid: {"hostid": str(hostid), "host": host, "name": name, "interfaces": [], "groups": [], "tags": []}
+            for hostid, host, name in rows
+        }
+        marks = ",".join("?" * len(hosts))
+        ids = list(hosts)
+
+        for hostid, interfaceid, ip in self.conn.execute(
+            f"SELECT hostid, interfaceid, ip FROM interfaces WHERE hostid IN ({marks}) ORDER BY rowid", ids
+        ):
+            hosts[hostid]["interfaces"].append({"interfaceid": interfaceid, "ip": ip})
+        for hostid, name in self.conn.execute(
+            f"SELECT hostid, name FROM host_groups WHERE hostid IN ({marks}) ORDER BY rowid", ids
+        ):
+            hosts[hostid]["groups"].append({"name": name})
+        for hostid, tag, value in self.conn.execute(
+            f"SELECT hostid, tag, value FROM tags WHERE hostid IN ({marks}) ORDER BY rowid", ids
+        ):
+            hosts[hostid]["tags"].append({"tag": tag, "value": value})
+
+        return list(hosts.values())
+
+    def get_all_host_names(self):
+        return [row[0] for row in self.conn.execute("SELECT host FROM hosts ORDER BY hostid")]
+
+
+if __name__ == "__main__":
+    # Uso:
+    #   python zabbix_snapshot.py refresh [--full]
+    #   python zabbix_snapshot.py export [zabbix_hosts.csv]
+    if len(sys.argv) < 2 or sys.argv[1] not in ("refresh", "export"):
+        print("Uso: python zabbix_snapshot.py refresh [--full] | export [archivo.csv]")
+        sys.exit(1)
+
+    snapshot = HostSnapshot(os.getenv("ZABBIX_SNAPSHOT_DB", "zabbix_snapshot.db"))
+
+    if sys.argv[1] == "refresh":
+        zb = ZabbixManager(url=f"http://{ZB_SERVER}/api_jsonrpc.php", token=ZP_KEY)
+        zb.connect()
+        snapshot.refresh(zb, full="--full" in sys.argv[2:])
+    else:
+        from zabbix_compare_hosts import export_zabbix_hosts_to_csv
+
+        filename = sys.argv[2] if len(sys.argv) > 2 else "zabbix_hosts.csv"
+        export_zabbix_hosts_to_csv(snapshot, filename)
+
+    snapshot.close()
@@ -0,0 +1,147 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class SessionPool:
+    """
+    Sesiones SSH autenticadas reutilizables, por (host, device_type, usuario).
+
+    Una sesión la usa un solo hilo a la vez; al devolverla queda ociosa y el
+    siguiente que pida la misma clave la reutiliza sin volver a conectar ni
+    autenticarse. Se limitan las sesiones abiertas por clave (los equipos
+    tienen pocas líneas vty) y las ociosas en total: con el pool lleno, la
+    sesión devuelta se cierra. Así un recorrido de más equipos que max_idle
+    (probe y luego comandos sobre la misma lista) conserva las primeras en
+    lugar de ir descartando cada una antes de reutilizarla.
+
+    Uso:
+        pool = SessionPool(lambda device: ConnectHandler(**device))
+        with pool.session(device) as connection:
+            connection.send_command("show version")
+    """
+
+    def __init__(self, connect, max_per_key=1, max_idle=32, idle_timeout=300):
+        """
+        :param connect: Función device (dict de ConnectHandler) → conexión abierta
+        :param max_per_key: Sesiones abiertas simultáneas por clave
+        :param max_idle: Sesiones ociosas conservadas en total (0 = no reutilizar)
+        :param idle_timeout: Segundos tras los que una sesión ociosa se descarta
+        """
+        self.connect = connect
+        self.max_per_key = max_per_key
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.opened = 0
+        self.reused = 0
+        self._idle = {}  # conexión → (clave, momento en que quedó ociosa)
+        self._open = {}  # clave → sesiones abiertas (ociosas + en uso)
+        self._condition = threading.Condition()
+
+    @staticmethod
+    def key(device):
+        return device["host"], device["device_type"], device.get("username")
+
+    def acquire(self, device):
+        """
+        Devuelve una sesión para device: una ociosa que siga viva o una nueva.
+        """
+        key = self.key(device)
+        while True:
+            connection = None
+            with self._condition:
+                while True:
+                    connection = next((c for c, (k, _) in reversed(self._idle.items()) if k == key), None)
+                    if connection is not None:
+                        _, released = self._idle.pop(connection)
+                        break
+                    if self._open.get(key, 0) < self.max_per_key:
+                        self._open[key] = self._open.get(key, 0) + 1
+                        break
+                    self._condition.wait()
+
+            if connection is None:
+                try:
+                    connection = self.connect(device)
+                except BaseException:
+                    self._forget(key)
+                    raise
+                with self._condition:
+                    self.opened += 1
+                return connection
+
+            # Sesión ociosa: se descarta si venció o si el equipo la cerró
+            if time.monotonic() - released <= self.idle_timeout and self._alive(connection):
+                with self._condition:
+                    self.reused += 1
+                return connection
+            self._discard(key, connection)
+
+    def release(self, device, connection, reuse=True):
+        """
+        Devuelve la sesión al pool (o la cierra si reuse es False o sobran ociosas).
+        """
+        key = self.key(device)
+        now = time.monotonic()
+        with self._condition:
+            # Con el pool lleno, primero se liberan los lugares de las sesiones vencidas
+            expired = []
+            if reuse and len(self._idle) >= self.max_idle:
+                expired = [(c, k) for c, (k, released) in self._idle.items() if now - released > self.idle_timeout]
+                for expired_connection, _ in expired:
+                    del self._idle[expired_connection]
+            kept = reuse and len(self._idle) < self.max_idle
+            if kept:
+                self._idle[connection] = (key, now)
+                self._condition.notify_all()
+        for expired_connection, expired_key in expired:
+            self._discard(expired_key, expired_connection)
+        if not kept:
+            self._discard(key, connection)
+
+    @contextmanager
+    def session(self, device):
+        """
+        Sesión para device durante el bloque; si el bloque falla, la sesión se cierra.
+        """
+        connection = self.acquire(device)
+        try:
+            yield connection
+        except BaseException:
+            self.release(device, connection, reuse=False)
+            raise
+        self.release(device, connection)
+
+    def close(self):
+        """
+        Cierra todas las sesiones ociosas.
+        """
+        with self._condition:
+            idle = list(self._idle.items())
+            self._idle.clear()
+        for connection, (key, _) in idle:
+            self._discard(key, connection)
+
+    def stats(self):
+        with self._condition:
+            return {"opened": self.opened, "reused": self.reused, "idle": len(self._idle)}
+
+    def _alive(self, connection):
+        try:
+            return connection.is_alive()
+        except Exception:
+            return False
+
+    def _discard(self, key, connection):
+        try:
+            connection.disconnect()
+        except Exception:
+            pass
+        self._forget(key)
+
+    def _forget(self, key):
+        with self._condition:
+            self._open[key] -= 1
+            if not self._open[key]:
+                del self._open[key]
+            self._condition.notify_all()
@@ -1,22 +1,7 @@
-from dotenv import load_dotenv
-import os
-from zabbix_connector import ZabbixManager
-
-load_dotenv()
-
-ZP_KEY = os.getenv("ZABBIX_API")
-ZB_SERVER = os.getenv("ZABBIX_SERVER")
+import sys
 
 if __name__ == "__main__":
-    zb = ZabbixManager(url=f"http://{ZB_SERVER}/api_jsonrpc.php", token=ZP_KEY)
-    zb.connect()
-
-    # Obtenemos las plantillas usando el nuevo método del conector
-    templates = zb.get_templates()
+    # Equivale a: python zabbix_cli.py templates
+    from zabbix_cli import main
 
-    if templates:
-        print("📦 Plantillas disponibles en Zabbix:")
-        for tpl in templates:
-            print(f"➡️  {tpl['name']} (ID: {tpl['templateid']})")
-    else:
-        print("🤷 No se encontraron plantillas o hubo un error.")
\ No newline at end of file
+    sys.exit(main(["templates"] + sys.argv[1:]))
@@ -0,0 +1,228 @@
+import codecs
+import http.client
+import json
+import queue
+import ssl
+import threading
+import zlib
+from urllib.parse import urlsplit
+from uuid import uuid4
+
+from zabbix_utils import ZabbixAPI
+from zabbix_utils.common import ModuleUtils
+from zabbix_utils.exceptions import APIRequestError, ProcessingError
+from zabbix_utils.version import __version__ as zabbix_utils_version
+
+CHUNK_SIZE = 64 * 1024
+
+# Errores de una conexión keep-alive que el servidor cerró mientras estaba inactiva
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+class PooledTransport:
+    """
+    Transporte HTTP para JSON-RPC con conexiones keep-alive reutilizables,
+    respuestas comprimidas (gzip/deflate) y lectura en streaming.
+
+    La respuesta se descomprime y decodifica a texto por bloques, sin mantener
+    en memoria el cuerpo recibido completo junto al texto y los objetos.
+    """
+
+    def __init__(self, url, timeout=30, pool_size=8, compress=True, validate_certs=True, ssl_context=None):
+        """
+        :param url: URL completa de api_jsonrpc.php
+        :param timeout: Segundos de timeout de conexión y lectura
+        :param pool_size: Conexiones inactivas que se conservan para reutilizar
+        :param compress: Pide respuestas gzip/deflate
+        """
+        parts = urlsplit(url)
+        self.url = url
+        self.scheme = parts.scheme
+        self.netloc = parts.netloc
+        self.path = parts.path or "/"
+        if parts.query:
+            self.path += "?" + parts.query
+        self.timeout = timeout
+        self.compress = compress
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._local = threading.local()
+
+        if self.scheme == "https":
+            if ssl_context is not None:
+                self._ssl_context = ssl_context
+            elif not validate_certs:
+                self._ssl_context = ssl.create_default_context()
+                self._ssl_context.check_hostname = False
+                self._ssl_context.verify_mode = ssl.CERT_NONE
+            else:
+                self._ssl_context = ssl.create_default_context()
+
+    @property
+    def last_response_bytes(self):
+        """
+        Bytes recibidos (comprimidos) en la última respuesta de este hilo.
+        """
+        return getattr(self._local, "response_bytes", 0)
+
+    def _new_connection(self):
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.netloc, timeout=self.timeout, context=self._ssl_context)
+        return http.client.HTTPConnection(self.netloc, timeout=self.timeout)
+
+    def _get_connection(self):
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _release(self, connection):
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def post(self, body, headers, idempotent=True):
+        """
+        Envía body (bytes) y devuelve la respuesta JSON decodificada.
+        Si una conexión reutilizada resulta estar cerrada, se reintenta una vez
+        con una nueva (en la fase de respuesta solo si la llamada es idempotente).
+        """
+        headers = dict(headers)
+        headers["Connection"] = "keep-alive"
+        if self.compress:
+            headers["Accept-Encoding"] = "gzip, deflate"
+
+        for attempt in range(2):
+            connection, reused = self._get_connection()
+            sent = False
+            try:
+                connection.request("POST", self.path, body=body, headers=headers)
+                sent = True
+                response = connection.getresponse()
+                result = self._read_json(response)
+            except _STALE_CONNECTION_ERRORS as err:
+                connection.close()
+                if reused and attempt == 0 and (not sent or idempotent):
+                    continue
+                raise ProcessingError(f"Unable to connect to {self.url}:", err) from None
+            except (OSError, http.client.HTTPException) as err:
+                connection.close()
+                raise ProcessingError(f"Unable to connect to {self.url}:", err) from None
+            except ValueError as err:
+                connection.close()
+                raise ProcessingError("Unable to parse json:", err) from None
+
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(connection)
+            return result
+
+    def _read_json(self, response):
+        if response.status >= 400:
+            response.read()
+            raise ProcessingError(f"HTTP error {response.status} {response.reason} from {self.url}")
+        encoding = (response.getheader("Content-Encoding") or "").lower()
+        self._local.response_bytes = 0
+        # Un único json.loads sobre el texto completo: decodificar elemento a elemento
+        # con raw_decode no comparte las claves entre objetos y ocupa más memoria
+        return json.loads("".join(self._text_chunks(response, encoding)))
+
+    def _text_chunks(self, response, encoding):
+        """
+        Bloques de texto de la respuesta, ya descomprimidos y decodificados en UTF-8.
+        """
+        if encoding == "gzip":
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            decompressor = None  # zlib o deflate "crudo": se detecta con el primer bloque
+        else:
+            decompressor = False
+        decoder = codecs.getincrementaldecoder("utf-8")()
+
+        while True:
+            data = response.read(CHUNK_SIZE)
+            if not data:
+                break
+            self._local.response_bytes += len(data)
+            if decompressor is None:
+                decompressor = zlib.decompressobj(zlib.MAX_WBITS if data[:1] == b"\x78" else -zlib.MAX_WBITS)
+            if decompressor:
+                data = decompressor.decompress(data)
+            text = decoder.decode(data)
+            if text:
+                yield text
+        tail = (decompressor.flush() if decompressor else b"")
+        text = decoder.decode(tail, final=True)
+        if text:
+            yield text
+
+
+class PooledZabbixAPI(ZabbixAPI):
+    """
+    ZabbixAPI que envía las peticiones por PooledTransport en lugar de urllib.
+    Todos los métodos (zapi.host.get(...), etc.) funcionan igual.
+    """
+
+    def __init__(self, url=None, token=None, timeout=30, pool_size=8, compress=True,
+                 validate_certs=True, ssl_context=None, **kwargs):
+        # El transporte debe existir antes de que ZabbixAPI consulte la versión en su __init__
+        self.transport = PooledTransport(
+            ModuleUtils.check_url(url or "http://localhost/zabbix/api_jsonrpc.php"),
+            timeout=timeout, pool_size=pool_size, compress=compress,
+            validate_certs=validate_certs, ssl_context=ssl_context,
+        )
+        super().__init__(url=url, token=token, timeout=timeout, validate_certs=validate_certs,
+                         ssl_context=ssl_context, **kwargs)
+
+    def send_api_request(self, method, params=None, need_auth=True):
+        """
+        Igual que ZabbixAPI.send_api_request, pero por el transporte con pool.
+        """
+        request_json = {
+            'jsonrpc': '2.0',
+            'method': method,
+            'params': params or {},
+            'id': str(uuid4()),
+        }
+        headers = {
+            'Accept': 'application/json',
+            'Content-Type': 'application/json-rpc',
+            'User-Agent': f"zabbix_utils.api/{zabbix_utils_version}",
+        }
+
+        # Estado de sesión de ZabbixAPI (atributos privados de la clase base)
+        session_id = self._ZabbixAPI__session_id
+        basic_cred = self._ZabbixAPI__basic_cred
+        if need_auth:
+            if not session_id:
+                raise ProcessingError("You're not logged in Zabbix API")
+            if self.version < 6.4:
+                request_json['auth'] = session_id
+            elif self.version <= 7.0 and basic_cred is not None:
+                request_json['auth'] = session_id
+            else:
+                headers["Authorization"] = f"Bearer {session_id}"
+        if basic_cred is not None:
+            headers["Authorization"] = f"Basic {basic_cred}"
+
+        idempotent = method.endswith(".get") or method == "apiinfo.version"
+        resp_json = self.transport.post(json.dumps(request_json).encode("utf-8"), headers, idempotent=idempotent)
+
+        if 'error' in resp_json:
+            err = resp_json['error'].copy()
+            err['body'] = request_json.copy()
+            raise APIRequestError(err)
+
+        return resp_json
+
+    def logout(self):
+        super().logout()
+        self.transport.close()